@@ -0,0 +1,133 @@
+"""Measure the memory allocated per request with tracemalloc, and fail if the part allocated by bravado_asyncio
+itself exceeds its budget.
+
+Requests are sent to the integration server's application in-process. In CALLING_THREAD mode they don't run before
+the loop does, so creating requests and completing them can be measured separately. In THREAD mode they run on the
+loop's thread right away; they are measured once their responses have arrived, before they are unmarshalled. Every
+object a request keeps alive until it completes adds to the work of the garbage collector, whose young generation is
+collected after every 700 allocations of container objects.
+"""
+import asyncio
+import concurrent.futures
+import gc
+import statistics
+import tracemalloc
+
+import pytest
+from bravado.client import SwaggerClient
+
+from bravado_asyncio.definitions import SessionConfig
+from bravado_asyncio.http_client import AsyncioClient
+from bravado_asyncio.http_client import RunMode
+from bravado_asyncio.request_template import EMPTY_HEADERS
+from testing.integration_server import create_app
+
+REQUESTS = 1000
+# memory blocks and bytes that bravado_asyncio's own code allocates for a request in flight. Averages vary slightly
+# from run to run, one more object per request exceeds the budget.
+BLOCKS_BUDGET = 7.5
+BYTES_BUDGET = 600
+# memory blocks still allocated per request after the request has completed and its result is gone; anything
+# kept per request would add at least one
+RETAINED_BLOCKS_BUDGET = 1
+
+OWN_CODE = tracemalloc.Filter(True, "*/bravado_asyncio/*")
+# the snapshot of requests in flight is still alive when the retained memory is measured
+NOT_SNAPSHOTS = tracemalloc.Filter(False, tracemalloc.__file__)
+
+
+def per_request(before, after, filters=()):
+    stats = after.filter_traces(filters).compare_to(
+        before.filter_traces(filters), "filename"
+    )
+    return (
+        sum(stat.count_diff for stat in stats) / REQUESTS,
+        sum(stat.size_diff for stat in stats) / REQUESTS,
+    )
+
+
+@pytest.mark.parametrize("run_mode", (RunMode.CALLING_THREAD, RunMode.THREAD))
+def test_allocations(run_mode):
+    http_client = AsyncioClient(
+        run_mode=run_mode,
+        session_config=SessionConfig(in_process_app=create_app()),
+    )
+    swagger_client = SwaggerClient.from_url(
+        "http://in-process/swagger.yaml",
+        http_client=http_client,
+        config={"validate_swagger_spec": False},
+    )
+
+    def get_pet():
+        return swagger_client.pet.getPetById(petId=42)
+
+    gc.disable()
+    tracemalloc.start()
+    try:
+        # fill caches and the connection pool. Objects that are replaced later on (e.g. the state of connections)
+        # need to be allocated while tracing, or their successors would look like leaks.
+        for _ in range(2):
+            for future in [get_pet() for _ in range(REQUESTS)]:
+                future.result(timeout=5)
+        gc.collect()
+
+        start = tracemalloc.take_snapshot()
+        futures = [get_pet() for _ in range(REQUESTS)]
+        if run_mode == RunMode.THREAD:
+            # the responses have arrived, but haven't been unmarshalled yet
+            concurrent.futures.wait([future.future.future for future in futures])
+        in_flight = tracemalloc.take_snapshot()
+        for future in futures:
+            future.result(timeout=5)
+        del futures
+        if run_mode == RunMode.THREAD:
+            # let the loop finish releasing the responses
+            asyncio.run_coroutine_threadsafe(
+                asyncio.sleep(0.1), http_client.loop
+            ).result()
+        gc.collect()
+        completed = tracemalloc.take_snapshot()
+
+        peaks = []
+        for _ in range(100):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            get_pet().result(timeout=5)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+        http_client.close()
+
+    blocks, size = per_request(start, in_flight)
+    own_blocks, own_size = per_request(start, in_flight, [OWN_CODE])
+    retained_blocks, retained_size = per_request(start, completed, [NOT_SNAPSHOTS])
+
+    print()
+    print("Memory allocated per request, {}".format(run_mode.name))
+    print("  {:<45} {:6.1f} blocks {:8.0f} bytes".format("in flight", blocks, size))
+    print(
+        "  {:<45} {:6.1f} blocks {:8.0f} bytes  (budget {} blocks, {} bytes)".format(
+            "in flight, by bravado_asyncio",
+            own_blocks,
+            own_size,
+            BLOCKS_BUDGET,
+            BYTES_BUDGET,
+        )
+    )
+    print(
+        "  {:<45} {:6.1f} blocks {:8.0f} bytes".format(
+            "retained after completion", retained_blocks, retained_size
+        )
+    )
+    print(
+        "  {:<45} {:22.0f} bytes".format(
+            "peak while sending and unmarshalling", statistics.median(peaks)
+        )
+    )
+
+    assert own_blocks <= BLOCKS_BUDGET
+    assert own_size <= BYTES_BUDGET
+    assert retained_blocks < RETAINED_BLOCKS_BUDGET
+    # requests without headers share a read-only mapping, which none of them may have changed
+    assert EMPTY_HEADERS == {}
@@ -0,0 +1,51 @@
+"""Compare CPU cost and compression ratio of the request body codecs at different levels."""
+import json
+
+from bravado_asyncio.compression import compress_request
+from bravado_asyncio.compression import COMPRESSORS
+from bravado_asyncio.definitions import CompressionConfig
+from testing.benchmark import report
+from testing.benchmark import run_benchmark
+
+
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 9), "zstd": (1, 3, 12)}
+
+
+def make_body(pet_count):
+    return json.dumps(
+        [
+            {
+                "id": i,
+                "name": "Pet {}".format(i),
+                "category": {"id": i % 10, "name": "category {}".format(i % 10)},
+                "photoUrls": ["http://example.com/pets/{}.jpg".format(i)],
+                "status": "available",
+            }
+            for i in range(pet_count)
+        ]
+    )
+
+
+def test_compression_levels():
+    body = make_body(5000)
+    results = []
+    for encoding in sorted(COMPRESSORS):
+        for level in LEVELS[encoding]:
+            config = CompressionConfig(encoding=encoding, level=level)
+            compressed = compress_request(
+                body, {"Content-Type": "application/json"}, config
+            )
+            results.append(
+                run_benchmark(
+                    "{:<4} level {:<2} ratio {:5.1f}x".format(
+                        encoding, level, len(body) / len(compressed)
+                    ),
+                    lambda: compress_request(
+                        body, {"Content-Type": "application/json"}, config
+                    ),
+                    iterations=20,
+                    warmup=2,
+                )
+            )
+
+    report("Compressing a {} KiB JSON body".format(len(body) // 1024), *results)
@@ -0,0 +1,97 @@
+import multiprocessing
+import os.path
+import shutil
+import socket
+import tempfile
+import time
+import urllib.request
+
+import ephemeral_port_reserve
+import pytest
+
+from testing.integration_server import INTEGRATION_SERVER_HOST
+from testing.integration_server import start_integration_server
+from testing.integration_server import wait_for_unix_socket
+
+
+def start_server_process(port=None, unix_socket_path=None, **kwargs):
+    process = multiprocessing.Process(
+        target=start_integration_server,
+        args=(port, multiprocessing.Value("i", 0, lock=False), unix_socket_path),
+        kwargs=kwargs,
+        daemon=True,
+    )
+    process.start()
+    return process
+
+
+def wait_for_tcp_server(url, timeout=10):
+    start = time.time()
+    while time.time() < start + timeout:
+        try:
+            urllib.request.urlopen(url, timeout=timeout)
+            return
+        except urllib.error.HTTPError:
+            return
+        except urllib.error.URLError:
+            time.sleep(0.1)
+
+
+@pytest.fixture(scope="session")
+def tcp_server():
+    port = ephemeral_port_reserve.reserve()
+    process = start_server_process(port=port)
+    url = "http://{host}:{port}".format(host=INTEGRATION_SERVER_HOST, port=port)
+    wait_for_tcp_server(url)
+
+    yield url
+
+    process.terminate()
+    process.join(timeout=1)
+
+
+@pytest.fixture
+def stub_server():
+    """Return a function that starts the integration server with the given route behaviors
+    (see testing.fault_injection) in workers processes, and returns its URL. The servers
+    are stopped at the end of the test."""
+    processes = []
+
+    def start(behaviors, workers=1, seed=0):
+        port = ephemeral_port_reserve.reserve()
+        for worker in range(workers):
+            processes.append(
+                start_server_process(
+                    port=port,
+                    behaviors=behaviors,
+                    seed=seed + worker,
+                    reuse_port=workers > 1,
+                )
+            )
+        url = "http://{host}:{port}".format(host=INTEGRATION_SERVER_HOST, port=port)
+        wait_for_tcp_server(url)
+        return url
+
+    yield start
+
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(timeout=1)
+
+
+@pytest.fixture(scope="session")
+def unix_socket_server():
+    if not hasattr(socket, "AF_UNIX"):
+        pytest.skip("Unix domain sockets are not supported on this platform")
+
+    socket_dir = tempfile.mkdtemp()
+    socket_path = os.path.join(socket_dir, "server.sock")
+    process = start_server_process(unix_socket_path=socket_path)
+    wait_for_unix_socket(socket_path)
+
+    yield socket_path
+
+    process.terminate()
+    process.join(timeout=1)
+    shutil.rmtree(socket_dir, ignore_errors=True)
@@ -0,0 +1,54 @@
+"""Compare writing a large response body to disk via raw_bytes to streaming it with download()."""
+import os
+import tempfile
+import tracemalloc
+
+from bravado_asyncio.http_client import AsyncioClient
+from testing.benchmark import report
+from testing.benchmark import run_benchmark
+
+BODY_SIZE = 16 * 1024 * 1024
+
+
+def measure_peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_download(tcp_server):
+    url = "{}/blob?size={}".format(tcp_server, BODY_SIZE)
+    client = AsyncioClient()
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+
+    def raw_bytes():
+        body = (
+            client.request({"method": "GET", "url": url}).result(timeout=10).raw_bytes
+        )
+        with open(path, "wb") as f:
+            f.write(body)
+
+    def download():
+        client.request({"method": "GET", "url": url}).download(path, timeout=10)
+
+    try:
+        report(
+            "Writing a {} MiB response body to a file".format(
+                BODY_SIZE // 1024 // 1024
+            ),
+            run_benchmark("raw_bytes + write", raw_bytes, 20, 2),
+            run_benchmark("download()", download, 20, 2),
+        )
+        print(
+            "  peak Python memory: raw_bytes {:.1f} MiB, download() {:.1f} MiB".format(
+                measure_peak_memory(raw_bytes) / 1024 / 1024,
+                measure_peak_memory(download) / 1024 / 1024,
+            )
+        )
+    finally:
+        client.close()
+        os.unlink(path)
@@ -0,0 +1,49 @@
+"""Compare encoding query strings and form bodies with form_encoding to going through aiohttp and yarl."""
+from aiohttp import FormData
+from yarl import URL
+
+from bravado_asyncio.form_encoding import add_query
+from bravado_asyncio.form_encoding import encode_form
+from bravado_asyncio.http_client import AsyncioClient
+from testing.benchmark import report
+from testing.benchmark import run_benchmark
+
+URL_STRING = "http://localhost:8080/pets"
+PARAMS = {"petIds": list(range(50)), "status": "sold out"}
+FORM = {"userId": 1, "name": "Lili", "status": "sold", "photoUrls": ["a", "b", "c"]}
+
+
+def test_query_encoding():
+    client = AsyncioClient()
+
+    def multidict():
+        # what aiohttp does with the params argument
+        URL(URL_STRING).extend_query(client.prepare_params(PARAMS))
+
+    def direct():
+        URL(add_query(URL_STRING, PARAMS))
+
+    report(
+        "Building a URL with 51 query values",
+        run_benchmark("prepare_params + URL.extend_query", multidict, 10000),
+        run_benchmark("add_query", direct, 10000),
+    )
+    client.close()
+
+
+def test_form_encoding():
+    def form_data():
+        data = FormData()
+        for name, value in FORM.items():
+            data.add_field(
+                name,
+                str(value) if not isinstance(value, list) else [str(v) for v in value],
+            )
+        # what aiohttp does when it sends the request
+        data()
+
+    report(
+        "Encoding a form with 4 fields",
+        run_benchmark("FormData", form_data, 10000),
+        run_benchmark("encode_form", lambda: encode_form(FORM), 10000),
+    )
@@ -0,0 +1,74 @@
+"""Measure the import time of bravado_asyncio with ``python -X importtime``, and fail if it exceeds its budget.
+
+bravado and bravado-core are imported up front: AsyncioClient subclasses bravado's HttpClient, so they can't be
+deferred, and their import time would drown out ours. aiohttp isn't imported until the first request is made.
+"""
+import subprocess
+import sys
+from typing import Dict
+from typing import Set
+from typing import Tuple
+
+# seconds to import bravado_asyncio.http_client and create an AsyncioClient, on top of importing bravado
+IMPORT_BUDGET = 0.15
+RUNS = 5
+
+BRAVADO_IMPORTS = (
+    "import bravado.exception, bravado.http_client, bravado.http_future, bravado.response, "
+    "bravado_core.response"
+)
+CLIENT_IMPORT = (
+    "import bravado_asyncio.http_client; bravado_asyncio.http_client.AsyncioClient()"
+)
+
+
+def measure_imports(code: str) -> Tuple[Dict[str, float], Set[str]]:
+    """Run code in a new interpreter. Return the cumulative import time in seconds of the modules code
+    imports directly, and the names of all modules imported along the way."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    times = {}
+    modules = set()
+    for line in process.stderr.splitlines():
+        fields = line.split("|")
+        if not line.startswith("import time:") or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].strip()
+        modules.add(name)
+        # nested imports are indented by two more spaces per level
+        if not fields[2].startswith("  "):
+            times[name] = int(fields[1]) / 1e6
+    return times, modules
+
+
+def test_import_time():
+    runs = [
+        measure_imports("; ".join((BRAVADO_IMPORTS, CLIENT_IMPORT)))
+        for _ in range(RUNS)
+    ]
+    client_time = min(times["bravado_asyncio.http_client"] for times, _ in runs)
+    bravado_time = min(
+        sum(
+            time
+            for name, time in times.items()
+            if name.startswith("bravado") and not name.startswith("bravado_asyncio")
+        )
+        for times, _ in runs
+    )
+
+    print()
+    print("Import time (best of {} runs)".format(RUNS))
+    print("  {:<45} {:9.1f}ms".format("bravado, bravado-core", bravado_time * 1e3))
+    print(
+        "  {:<45} {:9.1f}ms  (budget {:.0f}ms)".format(
+            "bravado_asyncio.http_client", client_time * 1e3, IMPORT_BUDGET * 1e3
+        )
+    )
+
+    for _, modules in runs:
+        assert "aiohttp" not in modules
+    assert client_time < IMPORT_BUDGET
@@ -0,0 +1,39 @@
+"""Measure calling an operation on the integration server over TCP, and on the integration server's application
+in-process. In-process requests still go through aiohttp's HTTP implementation on both ends, but leave out the
+kernel, the network stack and the scheduling of a second process."""
+from bravado.client import SwaggerClient
+
+from bravado_asyncio.definitions import SessionConfig
+from bravado_asyncio.http_client import AsyncioClient
+from testing.benchmark import report
+from testing.benchmark import run_benchmark
+from testing.integration_server import create_app
+
+
+def get_pet(http_client, spec_url):
+    swagger_client = SwaggerClient.from_url(
+        spec_url,
+        http_client=http_client,
+        # the integration server's spec uses integer status codes, which the validator doesn't accept
+        config={"validate_swagger_spec": False},
+    )
+    return lambda: swagger_client.pet.getPetById(petId=42).result(timeout=5)
+
+
+def test_in_process(tcp_server):
+    tcp_client = AsyncioClient()
+    in_process_client = AsyncioClient(
+        session_config=SessionConfig(in_process_app=create_app())
+    )
+
+    report(
+        "getPetById over TCP and in-process",
+        run_benchmark("tcp", get_pet(tcp_client, tcp_server + "/swagger.yaml"), 2000),
+        run_benchmark(
+            "in-process",
+            get_pet(in_process_client, "http://in-process/swagger.yaml"),
+            2000,
+        ),
+    )
+    tcp_client.close()
+    in_process_client.close()
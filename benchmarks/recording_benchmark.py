@@ -0,0 +1,37 @@
+"""Measure calling an operation against the integration server, and replaying the same calls from a recording.
+Replaying leaves out the network and the server, so what remains is the cost of the client and of unmarshalling."""
+from bravado.client import SwaggerClient
+
+from bravado_asyncio.definitions import RecordingConfig
+from bravado_asyncio.definitions import RecordingMode
+from bravado_asyncio.http_client import AsyncioClient
+from testing.benchmark import report
+from testing.benchmark import run_benchmark
+
+
+def get_pets(swagger_client):
+    return lambda: swagger_client.pet.getPetsByIds(petIds=[23, 42]).result(timeout=5)
+
+
+def test_replay(tcp_server, tmp_path):
+    spec_url = "{}/swagger.yaml".format(tcp_server)
+    path = str(tmp_path / "traffic.rec")
+    # the integration server's spec uses integer status codes, which the validator doesn't accept
+    config = {"validate_swagger_spec": False}
+
+    recording_client = AsyncioClient(
+        recording=RecordingConfig(path, mode=RecordingMode.RECORD)
+    )
+    swagger_client = SwaggerClient.from_url(
+        spec_url, http_client=recording_client, config=config
+    )
+    live = run_benchmark("live", get_pets(swagger_client), 1000)
+    recording_client.close()
+
+    replaying_client = AsyncioClient(recording=RecordingConfig(path))
+    swagger_client = SwaggerClient.from_url(
+        spec_url, http_client=replaying_client, config=config
+    )
+    replayed = run_benchmark("replayed", get_pets(swagger_client), 1000)
+
+    report("getPetsByIds, live while recording and replayed", live, replayed)
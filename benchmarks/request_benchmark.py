@@ -0,0 +1,92 @@
+"""Measure the CPU time AsyncioClient.request() spends preparing a request, without sending it."""
+import concurrent.futures
+import os.path
+import warnings
+
+import pytest
+import yaml
+from bravado.client import construct_request
+from bravado.client import SwaggerClient
+
+from bravado_asyncio.http_client import AsyncioClient
+from testing.benchmark import report
+from testing.benchmark import run_benchmark
+
+
+@pytest.fixture(autouse=True)
+def ignore_unawaited_coroutines():
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="coroutine .* was never awaited")
+        yield
+
+
+def discard_coroutine(coroutine, loop):
+    coroutine.close()
+    return concurrent.futures.Future()
+
+
+@pytest.fixture
+def swagger_client():
+    spec_path = os.path.join(os.path.dirname(__file__), "..", "testing", "swagger.yaml")
+    with open(spec_path) as f:
+        spec_dict = yaml.safe_load(f)
+
+    http_client = AsyncioClient()
+    http_client.run_coroutine_func = discard_coroutine
+    yield SwaggerClient.from_spec(
+        spec_dict,
+        origin_url="http://localhost:8080/swagger.yaml",
+        http_client=http_client,
+        # the integration server's spec uses integer status codes, which the validator doesn't accept
+        config={"validate_swagger_spec": False},
+    )
+    http_client.close()
+
+
+def prepare(swagger_client, resource, operation_id, **kwargs):
+    operation = getattr(getattr(swagger_client, resource), operation_id).operation
+    request_params = construct_request(operation, {}, **kwargs)
+    request = swagger_client.swagger_spec.http_client.request
+
+    # request() may modify the parameters, so pass in a fresh copy each time
+    return lambda: request(dict(request_params), operation)
+
+
+def test_request_preparation(swagger_client):
+    report(
+        "Preparing a request in AsyncioClient.request()",
+        run_benchmark(
+            "GET /pet/{petId}",
+            prepare(swagger_client, "pet", "getPetById", petId=42),
+            10000,
+        ),
+        run_benchmark(
+            "GET /pets with 50 query values",
+            prepare(swagger_client, "pet", "getPetsByIds", petIds=list(range(50))),
+            10000,
+        ),
+        run_benchmark(
+            "POST /pet/{petId} form",
+            prepare(
+                swagger_client,
+                "pet",
+                "updatePetWithForm",
+                petId=42,
+                userId=1,
+                name="Lili",
+                status="sold",
+                photoUrls=["a", "b", "c"],
+            ),
+            10000,
+        ),
+        run_benchmark(
+            "PUT /pet JSON",
+            prepare(
+                swagger_client,
+                "pet",
+                "updatePet",
+                body={"id": 42, "name": "Lili", "photoUrls": []},
+            ),
+            10000,
+        ),
+    )
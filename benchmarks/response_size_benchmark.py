@@ -0,0 +1,51 @@
+"""Compare the heap memory needed to read a large response body with raw_bytes, with and without spilling
+it to disk. A spilled body is memory-mapped, so it doesn't count towards the Python heap."""
+import tracemalloc
+
+from bravado_asyncio.definitions import ResponseSizeConfig
+from bravado_asyncio.http_client import AsyncioClient
+from testing.benchmark import report
+from testing.benchmark import run_benchmark
+
+BODY_SIZE = 16 * 1024 * 1024
+
+
+def measure_peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_read_large_body(tcp_server):
+    url = "{}/blob?chunked=1&size={}".format(tcp_server, BODY_SIZE)
+    client = AsyncioClient()
+    spilling_client = AsyncioClient(
+        response_size=ResponseSizeConfig(spill_threshold=1024 * 1024)
+    )
+
+    def raw_bytes():
+        response = client.request({"method": "GET", "url": url}).result(timeout=10)
+        assert len(response.raw_bytes) == BODY_SIZE
+
+    def raw_buffer():
+        response = spilling_client.request({"method": "GET", "url": url}).result(
+            timeout=10
+        )
+        assert len(response.raw_buffer) == BODY_SIZE
+
+    report(
+        "Reading a {} MiB body".format(BODY_SIZE // (1024 * 1024)),
+        run_benchmark("raw_bytes", raw_bytes, 10, 2),
+        run_benchmark("spilled, raw_buffer", raw_buffer, 10, 2),
+    )
+    for name, func in (("raw_bytes", raw_bytes), ("spilled, raw_buffer", raw_buffer)):
+        print(
+            "  {:<45} peak heap {:.1f} MiB".format(
+                name, measure_peak_memory(func) / (1024 * 1024)
+            )
+        )
+    spilling_client.close()
+    client.close()
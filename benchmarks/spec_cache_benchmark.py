@@ -0,0 +1,45 @@
+"""Measure loading a Swagger spec with SwaggerClient.from_url, with and without the spec cache."""
+import tempfile
+
+from bravado.client import SwaggerClient
+
+from bravado_asyncio.definitions import SpecCacheConfig
+from bravado_asyncio.http_client import AsyncioClient
+from testing.benchmark import report
+from testing.benchmark import run_benchmark
+
+
+def test_load_spec(tcp_server):
+    spec_url = "{}/swagger.yaml".format(tcp_server)
+    client = AsyncioClient()
+    with tempfile.TemporaryDirectory() as directory:
+        cached_client = AsyncioClient(
+            spec_cache=SpecCacheConfig(directory, revalidate_after=None)
+        )
+
+        def fetch_spec(client):
+            # bravado's own parsing and validation of the spec isn't affected by the cache
+            client.request({"method": "GET", "url": spec_url}).result(timeout=5).text
+
+        report(
+            "Fetching the integration server's spec",
+            run_benchmark("network", lambda: fetch_spec(client), 200, 10),
+            run_benchmark("spec cache", lambda: fetch_spec(cached_client), 200, 10),
+        )
+        report(
+            "SwaggerClient.from_url",
+            run_benchmark(
+                "network",
+                lambda: SwaggerClient.from_url(spec_url, http_client=client),
+                50,
+                5,
+            ),
+            run_benchmark(
+                "spec cache",
+                lambda: SwaggerClient.from_url(spec_url, http_client=cached_client),
+                50,
+                5,
+            ),
+        )
+        cached_client.close()
+    client.close()
@@ -0,0 +1,28 @@
+"""Measure loading a spec split into many files with SwaggerClient.from_url, with and without prefetching
+the files first. The integration server takes 5ms to return each file, like a server in another zone would."""
+from bravado.client import SwaggerClient
+
+from bravado_asyncio.http_client import AsyncioClient
+from testing.benchmark import report
+from testing.benchmark import run_benchmark
+
+
+def test_load_split_spec(tcp_server):
+    spec_url = "{}/split/40/5/swagger.json".format(tcp_server)
+    client = AsyncioClient()
+
+    def load_with_prefetch():
+        with client.prefetch_specs([spec_url]):
+            SwaggerClient.from_url(spec_url, http_client=client)
+
+    report(
+        "SwaggerClient.from_url for a spec in 42 files",
+        run_benchmark(
+            "serial",
+            lambda: SwaggerClient.from_url(spec_url, http_client=client),
+            10,
+            2,
+        ),
+        run_benchmark("prefetch", load_with_prefetch, 10, 2),
+    )
+    client.close()
@@ -0,0 +1,100 @@
+"""Measure the per-request cost of handing coroutines to the event loop thread, compared to
+running them on the calling thread's own loop."""
+import asyncio
+
+from bravado_asyncio.http_client import AsyncioClient
+from bravado_asyncio.http_client import RunMode
+from bravado_asyncio.submission_queue import get_submission_queue
+from bravado_asyncio.thread_loop import get_thread_loop
+from testing.benchmark import report
+from testing.benchmark import run_benchmark
+
+
+BURST_SIZE = 50
+
+
+async def noop():
+    pass
+
+
+def test_submission_overhead():
+    loop = get_thread_loop()
+    queue = get_submission_queue(loop)
+
+    def run_coroutine_threadsafe():
+        futures = [
+            asyncio.run_coroutine_threadsafe(noop(), loop) for _ in range(BURST_SIZE)
+        ]
+        for future in futures:
+            future.result()
+
+    def submit():
+        futures = [queue.submit(noop()) for _ in range(BURST_SIZE)]
+        for future in futures:
+            future.result()
+
+    def submit_many():
+        for future in queue.submit_many(noop() for _ in range(BURST_SIZE)):
+            future.result()
+
+    report(
+        "Handing {} coroutines to the loop thread".format(BURST_SIZE),
+        run_benchmark("asyncio.run_coroutine_threadsafe", run_coroutine_threadsafe),
+        run_benchmark("SubmissionQueue.submit", submit),
+        run_benchmark("SubmissionQueue.submit_many", submit_many),
+    )
+
+
+def test_request_burst(tcp_server):
+    url = "{}/pet/42".format(tcp_server)
+    client = AsyncioClient()
+    batching_client = AsyncioClient(batch_submissions=True)
+    calling_thread_client = AsyncioClient(run_mode=RunMode.CALLING_THREAD)
+
+    def burst(client):
+        futures = [
+            client.request({"method": "GET", "url": url}) for _ in range(BURST_SIZE)
+        ]
+        for future in futures:
+            future.result(timeout=5).raw_bytes
+
+    def explicit_batch():
+        with batching_client.batch():
+            futures = [
+                batching_client.request({"method": "GET", "url": url})
+                for _ in range(BURST_SIZE)
+            ]
+        for future in futures:
+            future.result(timeout=5).raw_bytes
+
+    report(
+        "Burst of {} GET /pet/42 requests".format(BURST_SIZE),
+        run_benchmark("run_coroutine_threadsafe", lambda: burst(client), 100, 10),
+        run_benchmark(
+            "batch_submissions=True", lambda: burst(batching_client), 100, 10
+        ),
+        run_benchmark("AsyncioClient.batch()", explicit_batch, 100, 10),
+        run_benchmark(
+            "RunMode.CALLING_THREAD", lambda: burst(calling_thread_client), 100, 10
+        ),
+    )
+    client.close()
+    batching_client.close()
+    calling_thread_client.close()
+
+
+def test_single_request(tcp_server):
+    url = "{}/pet/42".format(tcp_server)
+    client = AsyncioClient()
+    calling_thread_client = AsyncioClient(run_mode=RunMode.CALLING_THREAD)
+
+    def request(client):
+        client.request({"method": "GET", "url": url}).result(timeout=5).raw_bytes
+
+    report(
+        "Single GET /pet/42 request",
+        run_benchmark("RunMode.THREAD", lambda: request(client)),
+        run_benchmark("RunMode.CALLING_THREAD", lambda: request(calling_thread_client)),
+    )
+    client.close()
+    calling_thread_client.close()
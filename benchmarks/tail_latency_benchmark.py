@@ -0,0 +1,32 @@
+"""Measure how the size of the connection pool affects latencies when some responses are slow. The stub server
+answers 2% of the requests after 50ms and the others after about 1ms, in two worker processes. With a small pool,
+fast requests queue up behind slow ones and the slow tail spreads to the median."""
+from bravado_asyncio.definitions import SessionConfig
+from bravado_asyncio.http_client import AsyncioClient
+from bravado_asyncio.loadgen import format_report
+from bravado_asyncio.loadgen import run_load
+from testing.fault_injection import Bimodal
+from testing.fault_injection import Fixed
+from testing.fault_injection import LogNormal
+from testing.fault_injection import RouteBehavior
+
+
+def test_pool_size(stub_server):
+    latency = Bimodal(
+        fast=LogNormal(median=0.001, sigma=0.3), slow=Fixed(0.05), slow_fraction=0.02
+    )
+    url = stub_server({"/stub/bimodal": RouteBehavior(latency=latency)}, workers=2)
+
+    for limit in (2, 8, 32):
+        client = AsyncioClient(session_config=SessionConfig(limit=limit))
+        result = run_load(
+            lambda: client.request({"method": "GET", "url": url + "/stub/bimodal"}),
+            lambda index: {},
+            concurrency=32,
+            requests=3000,
+        )
+        print()
+        print("32 callers, {} connections".format(limit))
+        print(format_report(result))
+        assert not result.errors
+        client.close()
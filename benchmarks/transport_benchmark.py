@@ -0,0 +1,23 @@
+"""Compare request latency over TCP loopback and over a Unix domain socket."""
+from bravado_asyncio.http_client import AsyncioClient
+from testing.benchmark import report
+from testing.benchmark import run_benchmark
+
+
+def fetch(client, url):
+    client.request({"method": "GET", "url": url}).result(timeout=5).raw_bytes
+
+
+def test_tcp_vs_unix_socket(tcp_server, unix_socket_server):
+    tcp_client = AsyncioClient()
+    unix_socket_client = AsyncioClient(unix_socket_path=unix_socket_server)
+    url = "{}/pet/42".format(tcp_server)
+
+    results = [
+        run_benchmark("TCP loopback", lambda: fetch(tcp_client, url)),
+        run_benchmark("Unix domain socket", lambda: fetch(unix_socket_client, url)),
+    ]
+
+    report("Sequential GET /pet/42", *results)
+    tcp_client.close()
+    unix_socket_client.close()
@@ -0,0 +1,209 @@
+"""Module for waiting on many THREAD-mode futures at once.
+
+Instead of blocking on each :py:class:`bravado.http_future.HttpFuture` in turn, a
+:py:class:`BulkRequest` waits for all of them in a single coroutine on the event loop, using one
+shared deadline. Response bodies are read on the loop as soon as a response arrives, and requests
+that haven't completed by the deadline are cancelled. Responses that are unmarshalled in the
+background (see ``unmarshal_executor``) count as completed once they have been unmarshalled.
+"""
+import asyncio
+import queue
+import time
+from typing import Any
+from typing import cast
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+from bravado.exception import BravadoTimeoutError
+from bravado.http_future import HttpFuture
+from bravado.response import BravadoResponse
+
+from bravado_asyncio.future_adapter import FutureAdapter
+from bravado_asyncio.http_future import ThreadHttpFuture
+from bravado_asyncio.response_adapter import AioHTTPResponseAdapter
+
+
+class BulkRequest:
+    """Waits for a group of THREAD-mode futures on the event loop.
+
+    :param futures: futures returned by an AsyncioClient in THREAD mode
+    :param loop: the event loop the requests are running on
+    :param timeout: number of seconds after which all requests that haven't completed yet are cancelled
+    """
+
+    def __init__(
+        self,
+        futures: Sequence[HttpFuture],
+        loop: asyncio.AbstractEventLoop,
+        timeout: Optional[float] = None,
+    ) -> None:
+        for future in futures:
+            if not isinstance(future.future, FutureAdapter):
+                raise ValueError(
+                    "Bulk requests are only supported for futures created in THREAD mode"
+                )
+
+        self.futures = list(futures)
+        self.loop = loop
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        # indices of completed futures, in completion order; None signals the end
+        self._completed: "queue.Queue[Optional[int]]" = queue.Queue()
+        self._wait_future = asyncio.run_coroutine_threadsafe(self._wait_all(), loop)
+
+    def remaining_timeout(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    async def _wait_one(self, index: int) -> int:
+        http_future = self.futures[index]
+        concurrent_future = cast(FutureAdapter, http_future.future).future
+        response = await asyncio.wrap_future(concurrent_future)
+        background_result = (
+            http_future._background_result
+            if isinstance(http_future, ThreadHttpFuture)
+            else None
+        )
+        if background_result is not None:
+            # the body is being read and unmarshalled in the background already, reading it here as well would
+            # race with that. Shielded, so that the deadline doesn't cancel the result of unmarshalling.
+            try:
+                await asyncio.shield(asyncio.wrap_future(background_result))
+            except Exception:
+                # the error is raised again when the caller asks for the response
+                pass
+            return index
+
+        # read the body here, so that the calling thread doesn't need to hop to the loop for it. The response
+        # adapter enforces the size limits of the client, and spills large bodies to disk.
+        response_adapter = cast(AioHTTPResponseAdapter, http_future.response_adapter)
+        try:
+            await response_adapter.preload_body(response)
+        except asyncio.CancelledError:
+            # the deadline passed while the body was being read; don't put a half-read connection back into the pool
+            response.close()
+            raise
+        except Exception:
+            # the error is raised again when the caller asks for the response
+            pass
+        return index
+
+    async def _wait_all(self) -> None:
+        tasks = {
+            asyncio.ensure_future(self._wait_one(i)): i
+            for i in range(len(self.futures))
+        }
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self.remaining_timeout(),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    break
+                for task in done:
+                    if not task.cancelled():
+                        # errors are raised when the caller asks for the response; mark them as retrieved
+                        task.exception()
+                    self._completed.put(tasks[task])
+        finally:
+            # cancelling a task cancels the wrapped future, which in turn cancels the request
+            for task in tasks:
+                task.cancel()
+            self._completed.put(None)
+
+    def cancel(self) -> None:
+        """Cancel all requests that haven't completed yet."""
+        self._wait_future.cancel()
+
+    def _completed_indices(self) -> Iterator[int]:
+        for _ in range(len(self.futures)):
+            index = self._completed.get()
+            if index is None:
+                raise BravadoTimeoutError(
+                    "Not all requests completed before the deadline"
+                )
+            yield index
+
+    def as_completed(self) -> Iterator[HttpFuture]:
+        """Yield the futures in the order they complete. Their responses are available immediately.
+
+        :raises BravadoTimeoutError: if the deadline passes before all futures have completed
+        """
+        try:
+            for index in self._completed_indices():
+                yield self.futures[index]
+        finally:
+            # stop waiting for the remaining requests if the caller stops iterating early
+            self.cancel()
+
+    def _get_response(self, future: HttpFuture) -> BravadoResponse:
+        # all the waiting has been done already, this only unmarshals the response
+        return future.response(timeout=self.remaining_timeout())
+
+    def gather(
+        self, return_exceptions: bool = False
+    ) -> List[Union[BravadoResponse, BaseException]]:
+        """Return the responses of all futures, in the order the futures were passed in.
+
+        :param return_exceptions: If False, the first error is raised and all other requests are cancelled.
+            If True, errors (including BravadoTimeoutError for requests that didn't complete in time) are
+            returned in place of the response.
+        """
+        results: List[Any] = [None] * len(self.futures)
+        completed = set()
+        try:
+            for index in self._completed_indices():
+                completed.add(index)
+                try:
+                    results[index] = self._get_response(self.futures[index])
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[index] = e
+        except BravadoTimeoutError as e:
+            if not return_exceptions:
+                raise
+            for index in range(len(self.futures)):
+                if index not in completed:
+                    results[index] = e
+        finally:
+            self.cancel()
+
+        return results
+
+    def first_successful(self, count: int = 1) -> List[BravadoResponse]:
+        """Return the first count successful responses, in completion order, and cancel the
+        remaining requests.
+
+        :raises: the last error if fewer than count requests succeed, or BravadoTimeoutError if the deadline
+            passes before count requests have succeeded.
+        """
+        if not 0 < count <= len(self.futures):
+            raise ValueError(
+                "count must be between 1 and the number of futures ({})".format(
+                    len(self.futures)
+                )
+            )
+
+        responses: List[BravadoResponse] = []
+        last_error: Optional[Exception] = None
+        try:
+            for future in self.as_completed():
+                try:
+                    responses.append(self._get_response(future))
+                except Exception as e:
+                    last_error = e
+                    continue
+                if len(responses) >= count:
+                    return responses
+        finally:
+            self.cancel()
+
+        # only reachable if at least one request failed
+        raise cast(Exception, last_error)
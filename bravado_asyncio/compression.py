@@ -0,0 +1,120 @@
+"""Module for compressing request bodies with gzip, brotli or zstd."""
+import gzip
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import MutableMapping
+from typing import Optional
+
+from bravado_asyncio.definitions import CompressionConfig
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    from compression import zstd
+except ImportError:  # pragma: no cover
+    try:
+        from backports import zstd
+    except ImportError:
+        zstd = None
+
+try:
+    # aiohttp only decodes zstd responses starting with version 3.12
+    from aiohttp.compression_utils import HAS_ZSTD
+except ImportError:  # pragma: no cover
+    HAS_ZSTD = False
+
+
+Compressor = Callable[[bytes, int], bytes]
+
+
+def compress_gzip(data: bytes, level: int) -> bytes:
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_brotli(data: bytes, level: int) -> bytes:
+    return brotli.compress(data, quality=level)
+
+
+def compress_zstd(data: bytes, level: int) -> bytes:
+    return zstd.compress(data, level=level)
+
+
+COMPRESSORS: Dict[str, Compressor] = {"gzip": compress_gzip}
+# default levels are chosen to be cheap on CPU while still shrinking JSON considerably
+DEFAULT_LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+ACCEPT_ENCODINGS = ["gzip", "deflate"]
+
+if brotli is not None:  # pragma: no branch
+    COMPRESSORS["br"] = compress_brotli
+    ACCEPT_ENCODINGS.append("br")
+if zstd is not None:  # pragma: no branch
+    COMPRESSORS["zstd"] = compress_zstd
+if HAS_ZSTD:  # pragma: no branch
+    ACCEPT_ENCODINGS.append("zstd")
+
+ACCEPT_ENCODING = ", ".join(ACCEPT_ENCODINGS)
+
+
+def get_compressor(encoding: str) -> Compressor:
+    """Return the compression function for encoding.
+
+    :raises ValueError: if the encoding is unknown or the library implementing it isn't installed
+    """
+    try:
+        return COMPRESSORS[encoding]
+    except KeyError:
+        raise ValueError(
+            "Compression with {} is not available, supported encodings: {}".format(
+                encoding, ", ".join(sorted(COMPRESSORS))
+            )
+        )
+
+
+def _get_header(headers: MutableMapping[str, str], name: str) -> Optional[str]:
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def is_json_content_type(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    mime_type = content_type.split(";", 1)[0].strip().lower()
+    return mime_type == "application/json" or mime_type.endswith("+json")
+
+
+def compress_request(
+    data: Any, headers: MutableMapping[str, str], config: CompressionConfig
+) -> Any:
+    """Compress a JSON request body according to config. Adds the Content-Encoding and
+    Accept-Encoding headers to headers as needed.
+
+    :param data: the request body as passed to aiohttp
+    :param headers: the request headers; will be modified
+    :return: the (possibly compressed) request body
+    """
+    if config.advertise_encodings and _get_header(headers, "Accept-Encoding") is None:
+        headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+    if not isinstance(data, (str, bytes)) or len(data) < config.min_size:
+        return data
+    if _get_header(headers, "Content-Encoding") is not None or not is_json_content_type(
+        _get_header(headers, "Content-Type")
+    ):
+        return data
+
+    body = data.encode("utf-8") if isinstance(data, str) else data
+    level = (
+        config.level if config.level is not None else DEFAULT_LEVELS[config.encoding]
+    )
+    headers["Content-Encoding"] = config.encoding
+    return get_compressor(config.encoding)(body, level)
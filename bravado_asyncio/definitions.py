@@ -1,15 +1,155 @@
+import concurrent.futures
 from enum import Enum
+from typing import Awaitable
+from typing import Callable
+from typing import Mapping
 from typing import NamedTuple
 from typing import Optional
+from typing import TYPE_CHECKING
+from typing import Union
 
-import aiohttp
+if TYPE_CHECKING:  # pragma: no cover
+    # aiohttp is only imported once a client session is created, see bravado_asyncio.session_registry
+    import aiohttp
+    from aiohttp import web
+
+    from bravado_asyncio.tracing import SpanSink
 
 
 class RunMode(Enum):
     THREAD = "thread"
     FULL_ASYNCIO = "full_asyncio"
+    CALLING_THREAD = "calling_thread"
+
+
+class RecordingMode(Enum):
+    RECORD = "record"
+    REPLAY = "replay"
 
 
 class AsyncioResponse(NamedTuple):
-    response: aiohttp.ClientResponse
+    response: "aiohttp.ClientResponse"
     remaining_timeout: Optional[float]
+
+
+class SessionConfig(NamedTuple):
+    """Settings for the :py:class:`aiohttp.ClientSession` (and its connection pool) used by an
+    :py:class:`~bravado_asyncio.http_client.AsyncioClient`. Clients with equal settings on the same
+    event loop share a session; clients with different settings get their own. Fields left at
+    None use aiohttp's defaults. If unix_socket_path is set, all connections of the session go to
+    that Unix domain socket. If in_process_app is set, requests are dispatched to that aiohttp application
+    (or low-level handler) on the loop of the session, without sockets, see :py:mod:`bravado_asyncio.in_process`.
+    If trace_requests is set, the session records the phases of requests in their spans, see
+    :py:mod:`bravado_asyncio.tracing`."""
+
+    limit: Optional[int] = None
+    limit_per_host: Optional[int] = None
+    keepalive_timeout: Optional[float] = None
+    force_close: Optional[bool] = None
+    enable_cleanup_closed: Optional[bool] = None
+    ttl_dns_cache: Optional[int] = None
+    timeout: Optional["aiohttp.ClientTimeout"] = None
+    unix_socket_path: Optional[str] = None
+    in_process_app: Optional[
+        Union[
+            "web.Application",
+            Callable[["web.BaseRequest"], Awaitable["web.StreamResponse"]],
+        ]
+    ] = None
+    trace_requests: bool = False
+
+
+class CompressionConfig(NamedTuple):
+    """Settings for compressing request bodies and negotiating compressed responses.
+
+    JSON request bodies of at least min_size bytes are compressed with encoding (one of ``gzip``,
+    ``br`` or ``zstd``) at the given level; None selects a default that favors speed. If
+    advertise_encodings is set, the Accept-Encoding header lists every encoding that can be
+    decoded, including brotli and zstd if the respective libraries are installed."""
+
+    encoding: str = "gzip"
+    level: Optional[int] = None
+    min_size: int = 1024
+    advertise_encodings: bool = True
+
+
+class JsonDecodeConfig(NamedTuple):
+    """Settings for decoding JSON response bodies without blocking the event loop.
+
+    Bodies of at least offload_threshold bytes are decoded in executor, which can be a thread or
+    process pool. If executor is None, large bodies are decoded in the loop's default executor
+    in FULL_ASYNCIO mode, and on the calling thread in THREAD mode. In THREAD mode, smaller bodies
+    are decoded on the calling thread as well; in FULL_ASYNCIO mode they are decoded on the loop.
+    Bodies accessed on the loop thread, e.g. in callbacks added without an executor, are always
+    decoded right there."""
+
+    offload_threshold: int = 1024 * 1024
+    executor: Optional[concurrent.futures.Executor] = None
+
+
+class ResponseReleaseConfig(NamedTuple):
+    """Settings for giving connections back to the pool as early as possible.
+
+    Response bodies of at most drain_threshold bytes (according to the Content-Length header)
+    are read as soon as the response arrives, which releases the connection right away even if
+    the body is never looked at. If track_leaks is set, a warning including the stack trace of the
+    request is logged for every response that is garbage collected without being released."""
+
+    drain_threshold: int = 64 * 1024
+    track_leaks: bool = False
+
+
+class SpecCacheConfig(NamedTuple):
+    """Settings for keeping fetched Swagger specs on disk, see :py:mod:`bravado_asyncio.spec_cache`.
+
+    Specs are stored in directory, which is created if needed. A cached spec is served right away, and
+    revalidated with the server in the background if it was last validated more than revalidate_after
+    seconds ago; None disables revalidation. Bodies larger than max_size bytes aren't cached."""
+
+    directory: str
+    revalidate_after: Optional[float] = 60.0
+    max_size: int = 10 * 1024 * 1024
+
+
+class ResponseSizeConfig(NamedTuple):
+    """Settings for limiting the size of response bodies, and keeping large ones off the heap.
+
+    Reading a body larger than max_size bytes raises
+    :py:class:`~bravado_asyncio.response_adapter.ResponseTooLargeError` as soon as the Content-Length
+    header or the data received so far exceed the limit, and closes the connection. operation_max_sizes
+    overrides max_size for individual operations, keyed by operation id; None means no limit. Bodies
+    larger than spill_threshold bytes are written to a temporary file in spill_directory (by default the
+    system's temporary directory) as they arrive, and memory-mapped from there."""
+
+    max_size: Optional[int] = None
+    operation_max_sizes: Optional[Mapping[str, Optional[int]]] = None
+    spill_threshold: Optional[int] = None
+    spill_directory: Optional[str] = None
+
+
+class RecordingConfig(NamedTuple):
+    """Settings for recording requests and responses to a file, or answering requests from such a file
+    without opening any connections, see :py:mod:`bravado_asyncio.recording`.
+
+    In RECORD mode, every request made through the client is appended to the file at path. In REPLAY
+    mode, requests are answered with the recorded response for the same method and URL. Responses are
+    returned right away, unless replay_latency is set: then each response takes as long as it did when
+    it was recorded. Responses with bodies larger than the limits of the client's ResponseSizeConfig
+    (max_size, or spill_threshold if that is lower) aren't recorded."""
+
+    path: str
+    mode: RecordingMode = RecordingMode.REPLAY
+    replay_latency: bool = False
+
+
+class TracingConfig(NamedTuple):
+    """Settings for reporting a span per request to sink, see :py:mod:`bravado_asyncio.tracing`.
+
+    If propagate is set, requests carry the W3C ``traceparent`` (and ``tracestate``) header of their span.
+    If request_phases is set, the sessions of the client record how long requests waited for a connection,
+    connected and waited for the response, and how often they were retried or redirected. This adds a few
+    callbacks to every request; without it, spans only tell how long requests took in total."""
+
+    sink: "SpanSink"
+    propagate: bool = True
+    request_phases: bool = True
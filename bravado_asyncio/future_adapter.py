@@ -1,59 +1,205 @@
 import asyncio
 import concurrent.futures
+import functools
 import time
 from typing import Any
+from typing import Callable
 from typing import Optional
+from typing import Tuple
+from typing import Type
+from typing import TYPE_CHECKING
 
-import aiohttp.client_exceptions
 from bravado.http_future import FutureAdapter as BravadoFutureAdapter
 
 from bravado_asyncio.definitions import AsyncioResponse
+from bravado_asyncio.metrics import metrics
+from bravado_asyncio.metrics import REQUESTS_CANCELLED_ON_TIMEOUT
+from bravado_asyncio.metrics import REQUESTS_ORPHANED
+
+if TYPE_CHECKING:  # pragma: no cover
+    import aiohttp
+
+
+class _ConnectionErrors:
+    """Descriptor for FutureAdapter.connection_errors that imports aiohttp on first access rather than
+    when this module is imported."""
+
+    def __get__(
+        self, instance: Any, owner: Any = None
+    ) -> Tuple[Type[BaseException], ...]:
+        import aiohttp
+
+        return (aiohttp.ClientConnectionError,)
 
 
 class BaseFutureAdapter(BravadoFutureAdapter):
-    def __init__(self, future: Any) -> None:
+    def __init__(
+        self,
+        future: Any,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        cancel_on_timeout: bool = True,
+    ) -> None:
         raise NotImplementedError(
             "Do not instantiate BaseFutureAdapter, use one of its subclasses"
         )
 
+    connection_errors = _ConnectionErrors()
+
+
+def _close_response(
+    future: concurrent.futures.Future, loop: asyncio.AbstractEventLoop
+) -> None:
+    """Close the response of a request that completed only after the caller gave up waiting for it."""
+    if future.cancelled() or future.exception() is not None or loop.is_closed():
+        return
+    loop.call_soon_threadsafe(future.result().close)
+
 
 class FutureAdapter(BaseFutureAdapter):
     """FutureAdapter that will be used when run_mode is THREAD. The result method is
-    a normal Python function, and we expect future to be from the concurrent.futures module."""
+    a normal Python function, and we expect future to be from the concurrent.futures module.
+
+    :param future: the future of the request coroutine running on loop
+    :param loop: the event loop the request is running on
+    :param cancel_on_timeout: if True, a timeout in :py:meth:`result` cancels the request, which closes its
+        connection. If False, the request keeps running and :py:meth:`result` can be called again.
+    """
 
     timeout_errors = (concurrent.futures.TimeoutError,)
-    connection_errors = (aiohttp.ClientConnectionError,)
 
-    def __init__(self, future: concurrent.futures.Future) -> None:
+    def __init__(
+        self,
+        future: concurrent.futures.Future,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        cancel_on_timeout: bool = True,
+    ) -> None:
         self.future = future
+        self.loop = loop
+        self.cancel_on_timeout = cancel_on_timeout
 
     def result(self, timeout: Optional[float] = None) -> AsyncioResponse:
         start = time.monotonic()
-        response = self.future.result(timeout)
+        try:
+            response = self.future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            self._abandon()
+            raise
         time_elapsed = time.monotonic() - start
         remaining_timeout = timeout - time_elapsed if timeout else None
 
         return AsyncioResponse(response=response, remaining_timeout=remaining_timeout)
 
+    def _abandon(self) -> None:
+        if not self.cancel_on_timeout:
+            metrics.increment(REQUESTS_ORPHANED)
+            return
+
+        metrics.increment(REQUESTS_CANCELLED_ON_TIMEOUT)
+        # cancelling the future cancels the task running the request
+        if not self.future.cancel() and self.loop is not None:
+            # the request completed right after the timeout; nobody will read the response
+            self.future.add_done_callback(
+                functools.partial(_close_response, loop=self.loop)
+            )
+
     def cancel(self) -> None:
         self.future.cancel()
 
+    def done(self) -> bool:
+        return self.future.done()
+
+    def add_done_callback(self, callback: Callable[["FutureAdapter"], None]) -> None:
+        """Call callback with this adapter once the request has completed, successfully or not, so
+        that :py:meth:`result` won't block anymore. The callback usually runs on the event loop thread,
+        or right away on the calling thread if the request has completed already."""
+        self.future.add_done_callback(lambda _: callback(self))
+
 
 class AsyncioFutureAdapter(BaseFutureAdapter):
     """FutureAdapter that will be used when run_mode is FULL_ASYNCIO. The result method is
-    a coroutine, and we expect future to be awaitable."""
+    a coroutine, and we expect future to be awaitable.
+
+    :param future: the future of the request coroutine
+    :param loop: unused, the request runs on the current event loop
+    :param cancel_on_timeout: if True, a timeout in :py:meth:`result` cancels the request, which closes its
+        connection. If False, the request keeps running and :py:meth:`result` can be awaited again.
+    """
 
     timeout_errors = (asyncio.TimeoutError,)
-    connection_errors = (aiohttp.ClientConnectionError,)
 
-    def __init__(self, future: asyncio.Future) -> None:
+    def __init__(
+        self,
+        future: asyncio.Future,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        cancel_on_timeout: bool = True,
+    ) -> None:
         self.future = future
+        self.cancel_on_timeout = cancel_on_timeout
 
     async def result(self, timeout: Optional[float] = None) -> AsyncioResponse:
         start = time.monotonic()
-        response: aiohttp.ClientResponse = await asyncio.wait_for(
-            self.future, timeout=timeout
-        )
+        try:
+            # wait_for cancels the future on timeout, unless it's shielded
+            response: aiohttp.ClientResponse = await asyncio.wait_for(
+                self.future if self.cancel_on_timeout else asyncio.shield(self.future),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            metrics.increment(
+                REQUESTS_CANCELLED_ON_TIMEOUT
+                if self.cancel_on_timeout
+                else REQUESTS_ORPHANED
+            )
+            raise
+        time_elapsed = time.monotonic() - start
+        remaining_timeout = timeout - time_elapsed if timeout else None
+
+        return AsyncioResponse(response=response, remaining_timeout=remaining_timeout)
+
+    def cancel(self) -> None:
+        self.future.cancel()
+
+
+class CallingThreadFutureAdapter(BaseFutureAdapter):
+    """FutureAdapter that will be used when run_mode is CALLING_THREAD. future is a task on the event
+    loop of the calling thread, which isn't running in the background: :py:meth:`result` runs it until
+    the task is done, progressing all other pending requests of the thread along the way.
+
+    :param future: the task of the request coroutine
+    :param loop: unused, the request runs on the loop of the task
+    :param cancel_on_timeout: if True, a timeout in :py:meth:`result` cancels the request, which closes its
+        connection. If False, the request continues the next time the loop runs.
+    """
+
+    timeout_errors = (asyncio.TimeoutError,)
+
+    def __init__(
+        self,
+        future: asyncio.Future,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        cancel_on_timeout: bool = True,
+    ) -> None:
+        self.future = future
+        self.cancel_on_timeout = cancel_on_timeout
+
+    def result(self, timeout: Optional[float] = None) -> AsyncioResponse:
+        start = time.monotonic()
+        loop = self.future.get_loop()
+        if not self.future.done():
+            try:
+                loop.run_until_complete(
+                    asyncio.wait_for(asyncio.shield(self.future), timeout=timeout)
+                )
+            except asyncio.TimeoutError:
+                if not self.cancel_on_timeout:
+                    metrics.increment(REQUESTS_ORPHANED)
+                    raise
+                metrics.increment(REQUESTS_CANCELLED_ON_TIMEOUT)
+                self.future.cancel()
+                # let the task handle its cancellation, which closes the connection
+                loop.run_until_complete(asyncio.wait([self.future]))
+                raise
+        response: aiohttp.ClientResponse = self.future.result()
         time_elapsed = time.monotonic() - start
         remaining_timeout = timeout - time_elapsed if timeout else None
 
@@ -1,51 +1,93 @@
 import asyncio
+import concurrent.futures
 import logging
 import ssl
+import threading
+import weakref
 from collections.abc import Mapping
+from contextlib import contextmanager
 from typing import Any
 from typing import Callable
 from typing import cast
+from typing import Collection
+from typing import Coroutine
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
 from typing import MutableMapping
 from typing import Optional
 from typing import Sequence
 from typing import Type
+from typing import TYPE_CHECKING
 from typing import Union
+from urllib.parse import urlsplit
 
-import aiohttp
-from aiohttp.formdata import FormData
 from bravado.config import RequestConfig
 from bravado.http_client import HttpClient
 from bravado.http_future import HttpFuture
+from bravado.response import BravadoResponse
 from bravado_core.operation import Operation
 from bravado_core.schema import is_list_like
-from multidict import MultiDict
-from yelp_bytes import from_bytes
 
+from bravado_asyncio.bulk import BulkRequest
+from bravado_asyncio.definitions import CompressionConfig
+from bravado_asyncio.definitions import JsonDecodeConfig
+from bravado_asyncio.definitions import RecordingConfig
+from bravado_asyncio.definitions import RecordingMode
+from bravado_asyncio.definitions import ResponseReleaseConfig
+from bravado_asyncio.definitions import ResponseSizeConfig
 from bravado_asyncio.definitions import RunMode
+from bravado_asyncio.definitions import SessionConfig
+from bravado_asyncio.definitions import SpecCacheConfig
+from bravado_asyncio.definitions import TracingConfig
+from bravado_asyncio.form_encoding import add_query
+from bravado_asyncio.form_encoding import encode_form
 from bravado_asyncio.future_adapter import AsyncioFutureAdapter
 from bravado_asyncio.future_adapter import BaseFutureAdapter
+from bravado_asyncio.future_adapter import CallingThreadFutureAdapter
 from bravado_asyncio.future_adapter import FutureAdapter
+from bravado_asyncio.http_future import ReleasingHttpFuture
+from bravado_asyncio.http_future import ThreadHttpFuture
+from bravado_asyncio.request_template import EMPTY_HEADERS
+from bravado_asyncio.request_template import get_request_template
 from bravado_asyncio.response_adapter import AioHTTPResponseAdapter
 from bravado_asyncio.response_adapter import AsyncioHTTPResponseAdapter
+from bravado_asyncio.response_adapter import CallingThreadResponseAdapter
+from bravado_asyncio.response_release import drain_small_body
+from bravado_asyncio.response_release import track_response
+from bravado_asyncio.session_registry import get_session_registry
+from bravado_asyncio.spec_cache import CachedSpec
+from bravado_asyncio.spec_cache import spec_future
+from bravado_asyncio.spec_cache import SpecCache
+from bravado_asyncio.spec_prefetch import prefetch_specs
+from bravado_asyncio.submission_queue import get_submission_queue
+from bravado_asyncio.submission_queue import Submission
+from bravado_asyncio.submission_queue import submit_coroutine
+from bravado_asyncio.thread_loop import get_calling_thread_loop
 from bravado_asyncio.thread_loop import get_thread_loop
 
+if TYPE_CHECKING:  # pragma: no cover
+    # aiohttp is only imported once the first client session is created
+    import aiohttp
+    from multidict import MultiDict
+
+    from bravado_asyncio.recording import Recorder
+    from bravado_asyncio.recording import Replayer
+    from bravado_asyncio.tracing import Span
+    from bravado_asyncio.tracing import Tracer
+
 log = logging.getLogger(__name__)
 
 
-def get_client_session(loop: asyncio.AbstractEventLoop) -> aiohttp.ClientSession:
-    """Get a shared ClientSession object that can be reused. If none exists yet it will
+def get_client_session(loop: asyncio.AbstractEventLoop) -> "aiohttp.ClientSession":
+    """Get a shared ClientSession object with default settings that can be reused. If none exists yet it will
     create one using the passed-in loop.
 
     :param loop: an active (i.e. not closed) asyncio event loop
     :return: a ClientSession instance that can be used to do HTTP requests
     """
-    try:
-        return loop._bravado_asyncio_client_session  # type: ignore
-    except AttributeError:
-        client_session = aiohttp.ClientSession(loop=loop)
-        loop._bravado_asyncio_client_session = client_session  # type: ignore
-        return client_session
+    return get_session_registry(loop).get(SessionConfig())
 
 
 class AsyncioClient(HttpClient):
@@ -60,10 +102,24 @@ class AsyncioClient(HttpClient):
         loop: Optional[asyncio.AbstractEventLoop] = None,
         ssl_verify: Optional[Union[bool, str]] = None,
         ssl_cert: Optional[Union[str, Sequence[str]]] = None,
+        session_config: Optional[SessionConfig] = None,
+        unix_socket_path: Optional[str] = None,
+        unix_socket_hosts: Optional[Collection[str]] = None,
+        compression: Optional[CompressionConfig] = None,
+        json_decode_config: Optional[JsonDecodeConfig] = None,
+        batch_submissions: bool = False,
+        cancel_on_timeout: bool = True,
+        response_release: ResponseReleaseConfig = ResponseReleaseConfig(),
+        unmarshal_executor: Optional[concurrent.futures.Executor] = None,
+        spec_cache: Optional[SpecCacheConfig] = None,
+        response_size: Optional[ResponseSizeConfig] = None,
+        recording: Optional[RecordingConfig] = None,
+        tracing: Optional[TracingConfig] = None,
     ) -> None:
         """Instantiate a client using the given run_mode. If you do not pass in an event loop, then
         either a shared loop in a separate thread (THREAD mode) or the default asyncio
-        event loop (FULL_ASYNCIO mode) will be used.
+        event loop (FULL_ASYNCIO mode) will be used. In CALLING_THREAD mode, each thread making requests
+        gets its own event loop, so passing in a loop is not supported.
         Not passing in an event loop will make sure we share the :py:class:`aiohttp.ClientSession` object
         between AsyncioClient instances.
 
@@ -72,13 +128,53 @@ class AsyncioClient(HttpClient):
         :param ssl_cert: Provide a client-side certificate to use. Either a sequence of strings pointing
             to the certificate (1) and the private key (2), or a string pointing to the combined certificate
             and key.
+        :param session_config: Settings for the :py:class:`aiohttp.ClientSession` and its connection pool.
+            AsyncioClient instances with equal settings share a session, others get a separate one. Call
+            :py:meth:`close` once you don't need the client anymore to release the session.
+        :param unix_socket_path: Send requests over the Unix domain socket at this path instead of TCP, e.g. to
+            reach a local sidecar proxy. The URL of the request is still used for the Host header and request line.
+        :param unix_socket_hosts: Only send requests for these hosts (either ``host`` or ``host:port``) over
+            the Unix domain socket; all other requests use TCP. By default all requests use the Unix domain socket.
+        :param compression: Compress large JSON request bodies and advertise all supported response encodings,
+            see :py:class:`~bravado_asyncio.definitions.CompressionConfig`. Disabled by default.
+        :param json_decode_config: Decode large JSON response bodies outside of the event loop, see
+            :py:class:`~bravado_asyncio.definitions.JsonDecodeConfig`. By default, response bodies are decoded
+            by aiohttp on the event loop.
+        :param batch_submissions: THREAD mode only. Hand requests to the event loop thread through a
+            :py:class:`~bravado_asyncio.submission_queue.SubmissionQueue`, which wakes up the loop only once
+            for a burst of requests instead of once per request.
+        :param cancel_on_timeout: Cancel a request when waiting for its result times out, which closes its
+            connection instead of leaving it busy with a response nobody will read. Set to False if you poll
+            futures with short timeouts. Either way, such requests are counted in
+            :py:mod:`bravado_asyncio.metrics`.
+        :param response_release: Controls which response bodies are read right away to free their connection,
+            and whether to warn about responses that are never released, see
+            :py:class:`~bravado_asyncio.definitions.ResponseReleaseConfig`.
+        :param unmarshal_executor: THREAD mode only. Read, decode and unmarshal responses in this executor as soon
+            as they arrive, so that waiting for a result returns the finished model and unmarshalling overlaps with
+            waiting for other requests. Unless json_decode_config is given, JSON bodies are then decoded in the
+            executor as well.
+        :param spec_cache: THREAD and CALLING_THREAD mode only. Keep fetched Swagger specs on disk, serve them from
+            there and revalidate them in the background, see :py:mod:`bravado_asyncio.spec_cache`. Disabled by
+            default.
+        :param response_size: Limit the size of response bodies, per client and per operation, and spill large
+            bodies to disk, see :py:class:`~bravado_asyncio.definitions.ResponseSizeConfig`. By default, bodies
+            of any size are read into memory.
+        :param recording: Record requests and responses to a file, or answer requests from such a file without
+            opening any connections, see :py:mod:`bravado_asyncio.recording`.
+        :param tracing: Report a span per request to a sink and propagate trace context to the services requests
+            are sent to, see :py:mod:`bravado_asyncio.tracing`. Disabled by default.
         """
         self.run_mode = run_mode
         self._loop = loop
         if self.run_mode == RunMode.THREAD:
-            self.run_coroutine_func: Callable = asyncio.run_coroutine_threadsafe
+            self.run_coroutine_func: Callable = (
+                submit_coroutine
+                if batch_submissions
+                else asyncio.run_coroutine_threadsafe
+            )
             self.response_adapter = AioHTTPResponseAdapter
-            self.bravado_future_class = HttpFuture
+            self.bravado_future_class: Type[HttpFuture] = ThreadHttpFuture
             self.future_adapter: Type[BaseFutureAdapter] = FutureAdapter
         elif run_mode == RunMode.FULL_ASYNCIO:
             from aiobravado.http_future import HttpFuture as AsyncioHttpFuture
@@ -87,6 +183,13 @@ class AsyncioClient(HttpClient):
             self.response_adapter = AsyncioHTTPResponseAdapter
             self.bravado_future_class = AsyncioHttpFuture
             self.future_adapter = AsyncioFutureAdapter
+        elif run_mode == RunMode.CALLING_THREAD:
+            if loop is not None:
+                raise ValueError("CALLING_THREAD mode uses one event loop per thread")
+            self.run_coroutine_func = asyncio.ensure_future
+            self.response_adapter = CallingThreadResponseAdapter
+            self.bravado_future_class = ReleasingHttpFuture
+            self.future_adapter = CallingThreadFutureAdapter
         else:
             raise ValueError(
                 "Don't know how to handle run mode {}".format(str(run_mode))
@@ -110,6 +213,74 @@ class AsyncioClient(HttpClient):
             self.ssl_verify = ssl_verify
             self.ssl_context = None
 
+        if compression is not None:
+            # the compression libraries are only imported if compression is used
+            from bravado_asyncio.compression import get_compressor
+
+            # fail early if the requested codec isn't installed
+            get_compressor(compression.encoding)
+        self.compression = compression
+        if unmarshal_executor is not None:
+            if run_mode != RunMode.THREAD:
+                raise ValueError("unmarshal_executor is only supported in THREAD mode")
+            if json_decode_config is None:
+                # decode JSON bodies on the thread doing the unmarshalling instead of on the event loop
+                json_decode_config = JsonDecodeConfig()
+        self.json_decode_config = json_decode_config
+        self.unmarshal_executor = unmarshal_executor
+        if spec_cache is not None and run_mode == RunMode.FULL_ASYNCIO:
+            raise ValueError(
+                "spec_cache is only supported in THREAD and CALLING_THREAD mode"
+            )
+        self.spec_cache = SpecCache(spec_cache) if spec_cache is not None else None
+        # documents fetched by prefetch_specs(), by URL
+        self._prefetched_specs: Dict[str, CachedSpec] = {}
+        self._prefetched_specs_lock = threading.Lock()
+        self.cancel_on_timeout = cancel_on_timeout
+        self.response_release = response_release
+        self.response_size = response_size
+        self.recording = recording
+        self._recorder: Optional[Recorder] = None
+        self._replayer: Optional[Replayer] = None
+        if recording is not None:
+            # the recording module is only imported if it is used
+            from bravado_asyncio.recording import Recorder
+            from bravado_asyncio.recording import Replayer
+
+            if recording.mode == RecordingMode.RECORD:
+                self._recorder = Recorder(recording.path)
+            else:
+                self._replayer = Replayer.from_file(
+                    recording.path, replay_latency=recording.replay_latency
+                )
+
+        self.session_config = session_config or SessionConfig()
+        self.tracing = tracing
+        self._tracer: Optional[Tracer] = None
+        if tracing is not None:
+            # the tracing module is only imported if it is used
+            from bravado_asyncio.tracing import Tracer
+
+            self._tracer = Tracer(tracing)
+            if tracing.request_phases:
+                self.session_config = self.session_config._replace(trace_requests=True)
+        self.unix_socket_hosts = (
+            frozenset(unix_socket_hosts) if unix_socket_hosts is not None else None
+        )
+        self.unix_socket_session_config: Optional[SessionConfig] = None
+        if unix_socket_path is not None:
+            self.unix_socket_session_config = self.session_config._replace(
+                unix_socket_path=unix_socket_path
+            )
+            if self.unix_socket_hosts is None:
+                self.session_config = self.unix_socket_session_config
+
+        self._client_sessions: MutableMapping[
+            asyncio.AbstractEventLoop, Dict[SessionConfig, "aiohttp.ClientSession"]
+        ] = weakref.WeakKeyDictionary()
+        self._client_sessions_lock = threading.Lock()
+        self._batch = threading.local()
+
     @property
     def loop(self) -> asyncio.AbstractEventLoop:
         if self._loop is not None:
@@ -118,13 +289,217 @@ class AsyncioClient(HttpClient):
             return get_thread_loop()
         elif self.run_mode == RunMode.FULL_ASYNCIO:
             return asyncio.get_event_loop()
+        elif self.run_mode == RunMode.CALLING_THREAD:
+            return get_calling_thread_loop()
         else:  # pragma: no cover
             # should be impossible because this is validated by __init__
             raise ValueError(self.run_mode)
 
     @property
-    def client_session(self) -> aiohttp.ClientSession:
-        return get_client_session(self.loop)
+    def client_session(self) -> "aiohttp.ClientSession":
+        return self.get_client_session(self.session_config)
+
+    def get_client_session(
+        self,
+        session_config: SessionConfig,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> "aiohttp.ClientSession":
+        """Return the session for session_config on the current loop, acquiring it from the
+        session registry on first use.
+
+        :param loop: the current loop, if the caller has looked it up already
+        """
+        if loop is None:
+            loop = self.loop
+        try:
+            return self._client_sessions[loop][session_config]
+        except KeyError:
+            with self._client_sessions_lock:
+                sessions = self._client_sessions.get(loop)
+                if sessions is None:
+                    sessions = self._client_sessions[loop] = {}
+                    # the sessions reference their loop, so the entry would keep the loop of an exited
+                    # CALLING_THREAD mode thread alive. Forget it once the loop's sessions are closed.
+                    get_session_registry(loop).add_close_callback(self._forget_loop)
+                if session_config not in sessions:
+                    sessions[session_config] = get_session_registry(loop).acquire(
+                        session_config
+                    )
+                return sessions[session_config]
+
+    def _forget_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        with self._client_sessions_lock:
+            self._client_sessions.pop(loop, None)
+
+    def get_session_config(self, url: str) -> SessionConfig:
+        """Return the session configuration to use for a request to url."""
+        if self.unix_socket_hosts is not None:
+            parts = urlsplit(url)
+            if (
+                parts.hostname in self.unix_socket_hosts
+                or parts.netloc in self.unix_socket_hosts
+            ):
+                return cast(SessionConfig, self.unix_socket_session_config)
+        return self.session_config
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Context manager that collects all requests made by the current thread and hands them to
+        the event loop in one go when the block is left. Only has an effect in THREAD mode.
+
+        Don't wait for the result of a request inside the block, it won't be sent before the block is left::
+
+            with http_client.batch():
+                futures = [client.pet.getPetById(petId=pet_id) for pet_id in pet_ids]
+            pets = [future.result() for future in futures]
+        """
+        if (
+            self.run_mode != RunMode.THREAD
+            or getattr(self._batch, "pending", None) is not None
+        ):
+            # not applicable, or nested in another batch that will take care of submitting the requests
+            yield
+            return
+
+        pending: List[Submission] = []
+        self._batch.pending = pending
+        try:
+            yield
+        finally:
+            self._batch.pending = None
+            get_submission_queue(self.loop).enqueue(pending)
+
+    @contextmanager
+    def prefetch_specs(
+        self,
+        urls: Iterable[str],
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[None]:
+        """Context manager that fetches the specs at urls and all documents they reference, fetching
+        documents concurrently rather than one after the other. Inside the block, requests for these
+        documents are answered from memory, so that building SwaggerClients doesn't wait for the network::
+
+            with http_client.prefetch_specs(spec_urls):
+                clients = [SwaggerClient.from_url(url, http_client=http_client) for url in spec_urls]
+
+        Only supported in THREAD and CALLING_THREAD mode. See :py:mod:`bravado_asyncio.spec_prefetch`.
+
+        :param headers: headers to send with every request, e.g. for authentication
+        :param timeout: number of seconds after which to stop waiting for documents
+        """
+        if self.run_mode == RunMode.FULL_ASYNCIO:
+            raise ValueError(
+                "Prefetching specs is only supported in THREAD and CALLING_THREAD mode"
+            )
+
+        specs = prefetch_specs(self, urls, headers, timeout)
+        with self._prefetched_specs_lock:
+            self._prefetched_specs = {**self._prefetched_specs, **specs}
+        try:
+            yield
+        finally:
+            with self._prefetched_specs_lock:
+                # other threads may have prefetched some of the documents again meanwhile
+                self._prefetched_specs = {
+                    url: spec
+                    for url, spec in self._prefetched_specs.items()
+                    if specs.get(url) is not spec
+                }
+
+    def get_max_response_size(self, operation: Optional[Operation]) -> Optional[int]:
+        """Return the size limit for response bodies of operation, if any."""
+        if self.response_size is None:
+            return None
+        operation_max_sizes = self.response_size.operation_max_sizes
+        if (
+            operation is not None
+            and operation_max_sizes is not None
+            and operation.operation_id in operation_max_sizes
+        ):
+            return operation_max_sizes[operation.operation_id]
+        return self.response_size.max_size
+
+    def _get_max_recorded_size(self, operation: Optional[Operation]) -> Optional[int]:
+        """Return the size of the largest response body of operation to record. Recording holds bodies in
+        memory, so neither bodies that are too large nor bodies that would be spilled to disk are recorded."""
+        max_size = self.get_max_response_size(operation)
+        spill_threshold = (
+            self.response_size.spill_threshold
+            if self.response_size is not None
+            else None
+        )
+        if spill_threshold is not None and (
+            max_size is None or spill_threshold < max_size
+        ):
+            return spill_threshold
+        return max_size
+
+    def _run_coroutine(
+        self, coroutine: Coroutine, loop: asyncio.AbstractEventLoop
+    ) -> Any:
+        pending: Optional[List[Submission]] = getattr(self._batch, "pending", None)
+        if pending is not None:
+            future: concurrent.futures.Future = concurrent.futures.Future()
+            pending.append((coroutine, future))
+            return future
+        return self.run_coroutine_func(coroutine, loop=loop)
+
+    def _bulk_request(
+        self, futures: Sequence[HttpFuture], timeout: Optional[float]
+    ) -> BulkRequest:
+        if self.run_mode != RunMode.THREAD:
+            raise ValueError(
+                "Bulk requests are only supported in THREAD mode, use asyncio's functions in FULL_ASYNCIO mode "
+                "or simply wait for each future in CALLING_THREAD mode"
+            )
+        return BulkRequest(futures, self.loop, timeout=timeout)
+
+    def gather(
+        self,
+        futures: Sequence[HttpFuture],
+        timeout: Optional[float] = None,
+        return_exceptions: bool = False,
+    ) -> List[Union[BravadoResponse, BaseException]]:
+        """Wait for all futures and return their responses, in the order the futures were passed in.
+        All requests share one deadline; requests that haven't completed by then are cancelled.
+        See :py:meth:`bravado_asyncio.bulk.BulkRequest.gather`."""
+        return self._bulk_request(futures, timeout).gather(
+            return_exceptions=return_exceptions
+        )
+
+    def as_completed(
+        self, futures: Sequence[HttpFuture], timeout: Optional[float] = None
+    ) -> Iterator[HttpFuture]:
+        """Yield futures in the order they complete; calling ``response()`` on them won't block.
+        All requests share one deadline; requests that haven't completed by then are cancelled.
+        See :py:meth:`bravado_asyncio.bulk.BulkRequest.as_completed`."""
+        return self._bulk_request(futures, timeout).as_completed()
+
+    def first_successful(
+        self,
+        futures: Sequence[HttpFuture],
+        count: int = 1,
+        timeout: Optional[float] = None,
+    ) -> List[BravadoResponse]:
+        """Return the responses of the first count requests that succeed, and cancel the others.
+        See :py:meth:`bravado_asyncio.bulk.BulkRequest.first_successful`."""
+        return self._bulk_request(futures, timeout).first_successful(count=count)
+
+    def close(self) -> None:
+        """Release the client sessions used by this client. Sessions that aren't used by any other
+        AsyncioClient instance anymore will be closed, shutting down their connection pool. When recording,
+        the recording file is closed as well."""
+        if self._recorder is not None:
+            self._recorder.close()
+        with self._client_sessions_lock:
+            sessions = list(self._client_sessions.items())
+            self._client_sessions.clear()
+
+        for loop, configs in sessions:
+            registry = get_session_registry(loop)
+            for session_config in configs:
+                registry.release(session_config)
 
     def request(
         self,
@@ -144,73 +519,150 @@ class AsyncioClient(HttpClient):
         :rtype: :class: `bravado_core.http_future.HttpFuture`
         """
 
+        # looking up the loop isn't free in every run mode, do it once per request
+        loop = self.loop
+        method = request_params.get("method") or "GET"
+        template = get_request_template(operation, method)
+
         orig_data = request_params.get("data", {})
-        if isinstance(orig_data, Mapping):
-            data = FormData()
+        data: Any
+        files = request_params.get("files")
+        if not isinstance(orig_data, Mapping):
+            data = orig_data
+        elif files:
+            # only file uploads need a multipart body
+            import aiohttp
+
+            data = aiohttp.FormData()
             for name, value in orig_data.items():
                 str_value = (
                     str(value) if not is_list_like(value) else [str(v) for v in value]
                 )
                 data.add_field(name, str_value)
-        else:
-            data = orig_data
-
-        if isinstance(data, FormData):
-            for name, file_tuple in request_params.get("files", {}):
+            for name, file_tuple in files:
                 stream_obj = file_tuple[1]
                 data.add_field(name, stream_obj, filename=file_tuple[0])
+        elif not orig_data and template.empty_form_body is not None:
+            data = template.empty_form_body
+        else:
+            data = encode_form(orig_data)
 
-        params = self.prepare_params(request_params.get("params"))
-
-        connect_timeout: Optional[float] = request_params.get("connect_timeout")
-        request_timeout: Optional[float] = request_params.get("timeout")
-        # mypy thinks the type of total and connect is float, even though it is Optional[float]. Let's ignore the error.
-        timeout = (
-            aiohttp.ClientTimeout(total=request_timeout, connect=connect_timeout)
-            if (connect_timeout or request_timeout)
-            else None
+        timeout = template.get_timeout(
+            request_params.get("timeout"), request_params.get("connect_timeout")
         )
 
         follow_redirects = request_params.get("follow_redirects", False)
 
-        # aiohttp always adds a Content-Type header, and this breaks some servers that don't
-        # expect it for non-POST/PUT requests: https://github.com/aio-libs/aiohttp/issues/457
-        skip_auto_headers = (
-            ["Content-Type"]
-            if request_params.get("method") not in ["POST", "PUT"]
-            else None
-        )
+        headers = template.get_headers(request_params.get("headers", EMPTY_HEADERS))
+        if self.compression is not None:
+            from bravado_asyncio.compression import compress_request
 
-        coroutine = self.client_session.request(
-            method=request_params.get("method") or "GET",
-            url=cast(str, request_params.get("url", "")),
-            params=params,
-            data=data,
-            headers={
-                # Convert not string headers to string
-                k: from_bytes(v) if isinstance(v, bytes) else str(v)
-                for k, v in request_params.get("headers", {}).items()
-            },
-            allow_redirects=follow_redirects,
-            skip_auto_headers=skip_auto_headers,
-            timeout=timeout,
-            **self._get_ssl_params()
-        )
+            # get_headers() returns shared, read-only headers for requests without any
+            headers = dict(headers)
+            data = compress_request(data, headers, self.compression)
+
+        url = cast(str, request_params.get("url", ""))
+        session_config = self.get_session_config(url)
+        # the query string is encoded here rather than by aiohttp, see form_encoding
+        url = add_query(url, request_params.get("params"))
+
+        # requests without an operation are made by bravado to fetch specs
+        is_spec_request = operation is None and method == "GET"
+        if is_spec_request and self._prefetched_specs:
+            prefetched_spec = self._prefetched_specs.get(url)
+            if prefetched_spec is not None:
+                return spec_future(prefetched_spec, request_config=request_config)
+        spec_cache = self.spec_cache if is_spec_request else None
+        if spec_cache is not None:
+            cached_spec = spec_cache.get(url)
+            if cached_spec is not None:
+                if spec_cache.needs_revalidation(cached_spec):
+                    # in CALLING_THREAD mode the loop of this thread may not run again anytime soon
+                    revalidation_loop = (
+                        loop if self.run_mode == RunMode.THREAD else get_thread_loop()
+                    )
+                    spec_cache.revalidate_in_background(
+                        cached_spec,
+                        self.get_client_session(session_config, loop=revalidation_loop),
+                        revalidation_loop,
+                        headers,
+                    )
+                return spec_cache.cached_future(cached_spec, request_config)
 
-        future = self.run_coroutine_func(coroutine, loop=self.loop)
+        tracer = self._tracer
+        span: Optional[Span] = None
+        if tracer is not None:
+            span = tracer.start_span(method, url, operation)
+            headers = tracer.inject(span, headers)
 
-        return self.bravado_future_class(
-            self.future_adapter(future),
-            self.response_adapter(loop=self.loop),
+        coroutine: Coroutine[Any, Any, aiohttp.ClientResponse]
+        if self._replayer is not None:
+            # answered from the recording, without a session
+            coroutine = self._replayer.replay(method, url)
+        else:
+            client_session = self.get_client_session(session_config, loop=loop)
+            coroutine = client_session.request(
+                method=method,
+                url=url,
+                data=data,
+                headers=headers,
+                allow_redirects=follow_redirects,
+                skip_auto_headers=template.skip_auto_headers,
+                timeout=timeout,
+                # aiohttp treats None like its default, which is to verify certificates
+                ssl=self.ssl_context or self.ssl_verify,  # type: ignore[arg-type]
+                trace_request_ctx=span,
+            )
+            if self._recorder is not None:
+                coroutine = self._recorder.record(
+                    coroutine,
+                    method,
+                    url,
+                    headers,
+                    data,
+                    self._get_max_recorded_size(operation),
+                )
+
+        if self.response_release.drain_threshold > 0:
+            coroutine = drain_small_body(
+                coroutine, self.response_release.drain_threshold
+            )
+        if spec_cache is not None:
+            coroutine = spec_cache.fetch(coroutine, url)
+        if tracer is not None and span is not None:
+            coroutine = tracer.trace(coroutine, span)
+
+        future = self._run_coroutine(coroutine, loop)
+
+        http_future = self.bravado_future_class(
+            self.future_adapter(
+                future, loop=loop, cancel_on_timeout=self.cancel_on_timeout
+            ),
+            self.response_adapter(
+                loop=loop,
+                json_decode_config=self.json_decode_config,
+                response_size=self.response_size,
+                max_size=self.get_max_response_size(operation),
+            ),
             operation,
             request_config=request_config,
         )
+        if self.response_release.track_leaks:
+            track_response(http_future, future, loop)
+        if self.unmarshal_executor is not None:
+            cast(ThreadHttpFuture, http_future).unmarshal_in_background(
+                self.unmarshal_executor
+            )
+        return http_future
 
     def prepare_params(
         self, params: Optional[Dict[str, Any]]
-    ) -> Union[Optional[Dict[str, Any]], MultiDict]:
+    ) -> Union[Optional[Dict[str, Any]], "MultiDict"]:
+        """Convert params to a MultiDict that can be passed to aiohttp. :py:meth:`request` doesn't use
+        this anymore, it appends the encoded query string to the URL instead."""
         if not params:
             return params
+        from multidict import MultiDict
 
         items = []
         for key, value in params.items():
@@ -221,6 +673,3 @@ class AsyncioClient(HttpClient):
             )
             items.extend(entries)
         return MultiDict(items)
-
-    def _get_ssl_params(self) -> Dict[str, Any]:
-        return {"ssl": self.ssl_context if self.ssl_context else self.ssl_verify}
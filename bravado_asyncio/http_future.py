@@ -0,0 +1,259 @@
+"""Module for consuming THREAD-mode responses without blocking a thread per request.
+
+:py:meth:`ThreadHttpFuture.add_done_callback` calls a function once the response of a request has
+been received and unmarshalled. The response body is read on the event loop, so unmarshalling
+doesn't need to wait for any I/O; it happens either directly on the event loop thread or in an
+executor of your choice.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import time
+from typing import Any
+from typing import Callable
+from typing import cast
+from typing import Optional
+from typing import Union
+
+from bravado.exception import make_http_exception
+from bravado.http_future import HttpFuture
+from bravado.http_future import reraise_errors
+from bravado.response import BravadoResponse
+from bravado_core.response import IncomingResponse
+
+from bravado_asyncio.future_adapter import FutureAdapter
+from bravado_asyncio.response_adapter import AioHTTPResponseAdapter
+from bravado_asyncio.response_adapter import Buffer
+from bravado_asyncio.response_adapter import DownloadTarget
+
+log = logging.getLogger(__name__)
+
+ResponseCallback = Callable[["concurrent.futures.Future[BravadoResponse]"], None]
+
+
+class ReleasingHttpFuture(HttpFuture):
+    """HttpFuture that releases the response of an operation once it has been unmarshalled, so that its
+    connection goes back to the pool even if the body wasn't needed."""
+
+    def _get_swagger_result(self, incoming_response: IncomingResponse) -> Any:
+        swagger_result = super()._get_swagger_result(incoming_response)
+        # without an operation or with also_return_response, the caller gets the response itself and may read
+        # the body later on. So may callers handling an HTTPError raised above, through its response attribute.
+        if self.operation is not None and not self.request_config.also_return_response:
+            cast(AioHTTPResponseAdapter, incoming_response).release()
+        return swagger_result
+
+    @reraise_errors
+    def download(
+        self, target: Union[DownloadTarget, Buffer], timeout: Optional[float] = None
+    ) -> int:
+        """Wait for the response and write its body to target as it arrives, instead of unmarshalling it.
+        This keeps memory usage constant for large bodies, and avoids copying them around.
+
+        :param target: the path of the file to write, an open file descriptor, a binary file object,
+            or a preallocated bytearray or memoryview the body must fit into
+        :param timeout: number of seconds to wait for the response and its whole body
+        :return: the size of the body
+        :raises HTTPError: if the response status isn't 2xx; the body is not written to target then
+        :raises ValueError: if the body is larger than the buffer passed as target
+        """
+        incoming_response = cast(
+            AioHTTPResponseAdapter, self._get_incoming_response(timeout)
+        )
+        try:
+            if not 200 <= incoming_response.status_code < 300:
+                raise make_http_exception(response=incoming_response)
+            if not isinstance(target, (bytearray, memoryview)):
+                return incoming_response.download_to(target)
+
+            size = incoming_response.readinto(target)
+            if size == len(target) and incoming_response.readinto(bytearray(1)):
+                raise ValueError(
+                    "Response body is larger than the buffer of {} bytes".format(size)
+                )
+            return size
+        finally:
+            incoming_response.release()
+
+
+class ThreadHttpFuture(ReleasingHttpFuture):
+    """HttpFuture used when run_mode is THREAD. In addition to the blocking methods of
+    :py:class:`bravado.http_future.HttpFuture`, it supports completion callbacks and unmarshalling
+    the response in the background."""
+
+    # result of unmarshalling the response in the background, see unmarshal_in_background()
+    _background_result: "Optional[concurrent.futures.Future[Any]]" = None
+
+    def unmarshal_in_background(self, executor: concurrent.futures.Executor) -> None:
+        """Read, decode and unmarshal the response in executor as soon as it arrives, so that
+        :py:meth:`response` and :py:meth:`result` can return the finished result right away.
+        Has no effect for requests without an operation."""
+        if self.operation is None:
+            return
+
+        def unmarshal() -> Any:
+            incoming_response = super(ThreadHttpFuture, self)._get_incoming_response()
+            return super(ThreadHttpFuture, self)._get_swagger_result(incoming_response)
+
+        self._background_result = concurrent.futures.Future()
+        self._unmarshal_when_done(self._background_result, None, executor, unmarshal)
+
+    @reraise_errors
+    def _get_incoming_response(self, timeout: Optional[float] = None) -> Any:
+        background_result = self._background_result
+        if background_result is not None and not background_result.done():
+            # wait for unmarshalling as well
+            start = time.monotonic()
+            concurrent.futures.wait([background_result], timeout)
+            if timeout is not None:
+                timeout = max(0.0, timeout - (time.monotonic() - start))
+            if not background_result.done():
+                # raises the timeout error of the request if it's still running, which also cancels it
+                super()._get_incoming_response(timeout)
+                # the response has arrived, but is still being read or unmarshalled. Unmarshalling it here as
+                # well would read and decode the same body on two threads at once.
+                raise concurrent.futures.TimeoutError()
+        return super()._get_incoming_response(timeout)
+
+    def _get_swagger_result(self, incoming_response: IncomingResponse) -> Any:
+        if self._background_result is not None:
+            # _get_incoming_response() has waited for it; raises the error unmarshalling ran into, if any
+            return self._background_result.result()
+        return super()._get_swagger_result(incoming_response)
+
+    def response_future(
+        self,
+        executor: Optional[concurrent.futures.Executor] = None,
+        **response_kwargs: Any
+    ) -> "concurrent.futures.Future[BravadoResponse]":
+        """Return a :py:class:`concurrent.futures.Future` that resolves to the
+        :py:class:`bravado.response.BravadoResponse` of this request, or to the exception that
+        :py:meth:`response` would raise.
+
+        :param executor: unmarshal the response in this executor. By default, the response is unmarshalled
+            on the event loop thread, which blocks all other requests meanwhile.
+        :param response_kwargs: passed on to :py:meth:`response`, e.g. fallback_result
+        """
+        result: "concurrent.futures.Future[BravadoResponse]" = (
+            concurrent.futures.Future()
+        )
+        self._unmarshal_when_done(
+            result, None, executor, lambda: self.response(**response_kwargs)
+        )
+        return result
+
+    def add_done_callback(
+        self,
+        callback: ResponseCallback,
+        executor: Optional[concurrent.futures.Executor] = None,
+        **response_kwargs: Any
+    ) -> None:
+        """Call callback once the response has been received and unmarshalled. It is called with a
+        completed :py:class:`concurrent.futures.Future`: its ``result()`` returns the
+        :py:class:`bravado.response.BravadoResponse`, or raises the error of the request.
+
+        :param callback: function to call; it runs on the event loop thread, or in executor if given, with the
+            context variables of the thread adding it
+        :param executor: run unmarshalling and callback in this executor instead of on the event loop thread
+        :param response_kwargs: passed on to :py:meth:`response`, e.g. fallback_result
+        """
+        self._unmarshal_when_done(
+            concurrent.futures.Future(),
+            callback,
+            executor,
+            lambda: self.response(**response_kwargs),
+        )
+
+    def _unmarshal_when_done(
+        self,
+        result: "concurrent.futures.Future[Any]",
+        callback: Optional[ResponseCallback],
+        executor: Optional[concurrent.futures.Executor],
+        unmarshal_response: Callable[[], Any],
+    ) -> None:
+        """Once the request has completed, read the response body on the loop, then set the outcome of
+        unmarshal_response on result and call callback, either on the loop thread or in executor. Both
+        run in a copy of the context of the calling thread, so that e.g. the current span is the same."""
+        future_adapter = cast(FutureAdapter, self.future)
+        response_adapter = cast(AioHTTPResponseAdapter, self.response_adapter)
+        loop = response_adapter._loop
+        context = contextvars.copy_context()
+
+        def unmarshal() -> None:
+            if not result.set_running_or_notify_cancel():
+                return
+            try:
+                # the request has completed and its body has been read, so this won't block
+                result.set_result(unmarshal_response())
+            except BaseException as e:
+                result.set_exception(e)
+            call_callback()
+
+        def call_callback() -> None:
+            if callback is None:
+                return
+            try:
+                # called directly rather than through result.add_done_callback(), so that it runs on this thread
+                callback(result)
+            except Exception:
+                log.exception("Error in response callback %r", callback)
+
+        def on_body_read() -> None:
+            if executor is None:
+                context.run(unmarshal)
+                return
+            try:
+                executor.submit(context.run, unmarshal)
+            except Exception as e:
+                # e.g. the executor has been shut down. Nobody would complete result otherwise.
+                if result.set_running_or_notify_cancel():
+                    result.set_exception(e)
+                    context.run(call_callback)
+
+        background_result = self._background_result
+        if background_result is not None and result is not background_result:
+            # the body is being read and unmarshalled in the background already. Reading it again would race
+            # with that, and waiting for it on the loop thread would block the loop it needs to be read.
+            def on_unmarshalled(_: "concurrent.futures.Future[Any]") -> None:
+                if executor is not None or loop.is_closed():
+                    on_body_read()
+                    return
+                try:
+                    loop.call_soon_threadsafe(on_body_read)
+                except RuntimeError:
+                    # the loop has been closed in the meantime
+                    on_body_read()
+
+            background_result.add_done_callback(on_unmarshalled)
+            return
+
+        async def read_body() -> None:
+            try:
+                # the request has completed, so this doesn't block
+                response = future_adapter.future.result()
+                await response_adapter.preload_body(response)
+            except Exception:
+                # the error is raised again by response(), which handles it like a blocking call would
+                pass
+            on_body_read()
+
+        def on_done(_: FutureAdapter) -> None:
+            if loop.is_closed():
+                on_body_read()
+                return
+            try:
+                running_loop: Optional[
+                    asyncio.AbstractEventLoop
+                ] = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
+            if running_loop is loop:
+                # the usual case: the request completed on the loop thread. Starting the task directly doesn't
+                # need a concurrent Future, nor a wakeup of the loop through its self-pipe.
+                loop.create_task(read_body())
+            else:
+                # the request had completed already when the callback was added
+                asyncio.run_coroutine_threadsafe(read_body(), loop)
+
+        future_adapter.add_done_callback(on_done)
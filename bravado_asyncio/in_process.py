@@ -0,0 +1,215 @@
+"""Module for sending requests to an aiohttp application running in the same process, without sockets.
+
+With ``SessionConfig(in_process_app=app)``, the client session of an AsyncioClient uses an
+:py:class:`InProcessConnector`. Instead of opening a TCP connection, the connector connects aiohttp's client
+protocol to a server protocol of app through a pair of in-memory transports, on the loop of the session. Requests
+and responses still go through aiohttp's HTTP implementation on both ends, so streaming, chunked bodies, keep-alive
+and flow control behave like they do over the network, without the kernel, the network stack or another process
+being involved. All requests go to app, whatever the host of their URL.
+
+app is either an :py:class:`aiohttp.web.Application`, or a low-level handler as accepted by
+:py:class:`aiohttp.web.Server`. The application is started on the first request, and cleaned up when the
+session is closed.
+"""
+import asyncio
+from collections import deque
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import cast
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import aiohttp
+from aiohttp import web
+from aiohttp.client_proto import ResponseHandler
+
+Handler = Callable[[web.BaseRequest], Awaitable[web.StreamResponse]]
+InProcessApp = Union[web.Application, Handler]
+
+# the other end is asked to pause writing once this many bytes wait to be received, and to resume
+# once no more than LOW_WATER_MARK bytes are left
+HIGH_WATER_MARK = 256 * 1024
+LOW_WATER_MARK = 64 * 1024
+
+# what the server sees as the address of the client, and vice versa
+_ADDRESS = ("127.0.0.1", 0)
+
+
+class InProcessTransport(asyncio.Transport):
+    """One end of an in-memory connection. Data written to it is delivered to the protocol of the other
+    end on a later iteration of the loop, in order, unless that end has paused reading."""
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        protocol: asyncio.Protocol,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(extra)
+        self._loop = loop
+        self._protocol = protocol
+        self._peer: Optional["InProcessTransport"] = None
+        # data written by the other end that hasn't been delivered to our protocol yet
+        self._buffer: Deque[bytes] = deque()
+        self._buffer_size = 0
+        self._flush_scheduled = False
+        self._reading_paused = False
+        # whether we asked the protocol of the other end to stop writing
+        self._peer_writing_paused = False
+        self._peer_closed = False
+        self._closing = False
+
+    def get_protocol(self) -> asyncio.BaseProtocol:
+        return self._protocol
+
+    def set_protocol(self, protocol: asyncio.BaseProtocol) -> None:
+        self._protocol = cast(asyncio.Protocol, protocol)
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def is_reading(self) -> bool:
+        return not self._reading_paused and not self._closing
+
+    def pause_reading(self) -> None:
+        self._reading_paused = True
+
+    def resume_reading(self) -> None:
+        self._reading_paused = False
+        self._schedule_flush()
+
+    def get_write_buffer_size(self) -> int:
+        return 0
+
+    def set_write_buffer_limits(
+        self, high: Optional[int] = None, low: Optional[int] = None
+    ) -> None:
+        pass
+
+    def can_write_eof(self) -> bool:
+        return False
+
+    def write(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        if self._closing or self._peer is None or not data:
+            return
+        self._peer._receive(bytes(data))
+
+    def writelines(self, list_of_data: Any) -> None:
+        self.write(b"".join(list_of_data))
+
+    def close(self) -> None:
+        """Close this end. Data that hasn't been delivered to our protocol yet is discarded, like the
+        receive buffer of a socket; data written to the other end is still delivered before it learns
+        that the connection has been closed."""
+        if self._closing:
+            return
+        self._closing = True
+        self._buffer.clear()
+        self._buffer_size = 0
+        self._loop.call_soon(self._protocol.connection_lost, None)
+        if self._peer is not None:
+            self._peer._on_peer_closed()
+
+    abort = close
+
+    def _receive(self, data: bytes) -> None:
+        if self._closing:
+            return
+        self._buffer.append(data)
+        self._buffer_size += len(data)
+        if self._buffer_size > HIGH_WATER_MARK and not self._peer_writing_paused:
+            self._peer_writing_paused = True
+            cast(InProcessTransport, self._peer)._protocol.pause_writing()
+        self._schedule_flush()
+
+    def _on_peer_closed(self) -> None:
+        self._peer_closed = True
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if not self._flush_scheduled and not self._closing:
+            self._flush_scheduled = True
+            self._loop.call_soon(self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        while self._buffer and not self._reading_paused and not self._closing:
+            data = self._buffer.popleft()
+            self._buffer_size -= len(data)
+            self._protocol.data_received(data)
+
+        if self._closing:
+            return
+        if self._peer_writing_paused and self._buffer_size <= LOW_WATER_MARK:
+            self._peer_writing_paused = False
+            peer = cast(InProcessTransport, self._peer)
+            if not peer._closing:
+                peer._protocol.resume_writing()
+        if self._peer_closed and not self._buffer:
+            # like a socket whose peer has closed it: everything has been read, so close our end too
+            if not self._protocol.eof_received():
+                self.close()
+
+
+def create_transport_pair(
+    loop: asyncio.AbstractEventLoop,
+    client_protocol: asyncio.Protocol,
+    server_protocol: asyncio.Protocol,
+) -> Tuple[InProcessTransport, InProcessTransport]:
+    """Return the client and server transports of a new in-memory connection between the two protocols.
+    The protocols still need to be told that the connection has been made."""
+    extra = {"peername": _ADDRESS, "sockname": _ADDRESS}
+    client_transport = InProcessTransport(loop, client_protocol, extra)
+    server_transport = InProcessTransport(loop, server_protocol, extra)
+    client_transport._peer = server_transport
+    server_transport._peer = client_transport
+    return client_transport, server_transport
+
+
+class InProcessConnector(aiohttp.BaseConnector):
+    """Connector that connects to app through in-memory transports instead of the network. Connection
+    pooling and limits work as for :py:class:`aiohttp.TCPConnector`."""
+
+    def __init__(self, app: InProcessApp, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._app = app
+        self._runner: Optional[web.BaseRunner] = None
+        self._server: Optional["asyncio.Future[web.Server]"] = None
+
+    async def _start(self) -> web.Server:
+        runner: web.BaseRunner = (
+            web.AppRunner(self._app, handle_signals=False)
+            if isinstance(self._app, web.Application)
+            else web.ServerRunner(web.Server(self._app), handle_signals=False)
+        )
+        await runner.setup()
+        self._runner = runner
+        return cast(web.Server, runner.server)
+
+    async def _create_connection(
+        self, req: Any, traces: Any, timeout: Any
+    ) -> ResponseHandler:
+        if self._server is None:
+            self._server = asyncio.ensure_future(self._start(), loop=self._loop)
+        server = await asyncio.shield(self._server)
+
+        client_protocol = ResponseHandler(loop=self._loop)
+        server_protocol = server()
+        client_transport, server_transport = create_transport_pair(
+            self._loop, client_protocol, server_protocol
+        )
+        server_protocol.connection_made(server_transport)
+        client_protocol.connection_made(client_transport)
+        return client_protocol
+
+    def _close(self, *args: Any, **kwargs: Any) -> List[Awaitable[object]]:
+        waiters: List[Awaitable[object]] = super()._close(*args, **kwargs) or []
+        if self._runner is not None and not self._loop.is_closed():
+            waiters.append(self._loop.create_task(self._runner.cleanup()))
+            self._runner = None
+        return waiters
@@ -0,0 +1,447 @@
+"""Module for load testing a service through AsyncioClient, with the same client stack used in production.
+
+Run it as ``python -m bravado_asyncio.loadgen SPEC OPERATION_ID``. SPEC is the URL or path of a Swagger spec;
+requests for OPERATION_ID are sent in THREAD mode, either by a fixed number of concurrent callers (closed loop,
+``--concurrency``) or at a fixed rate (open loop, ``--rate``). In open-loop mode, the latency of a request is measured
+from the time it was scheduled to be sent, not from the time it was actually sent, so a server that slows down
+doesn't hide its latency by slowing down the load generator (coordinated omission).
+
+Parameters are either the same for every request (``--params '{"petId": 42}'``), or are returned by a function
+(``--params-generator package.module:function``) that is called with the sequence number of each request.
+Latencies are collected in a :py:class:`LatencyHistogram`, and reported as percentiles along with the
+throughput and the number of errors of each kind.
+"""
+import argparse
+import concurrent.futures
+import functools
+import importlib
+import json
+import math
+import os.path
+import pathlib
+import sys
+import threading
+import time
+from typing import Any
+from typing import Callable
+from typing import cast
+from typing import Dict
+from typing import Iterator
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from bravado.client import SwaggerClient
+from bravado.exception import HTTPError
+from bravado.http_future import HttpFuture
+
+from bravado_asyncio.definitions import RunMode
+from bravado_asyncio.definitions import SessionConfig
+from bravado_asyncio.http_client import AsyncioClient
+from bravado_asyncio.http_future import ThreadHttpFuture
+
+# a function returning the keyword arguments of the operation for the request with the given sequence number
+ParamsGenerator = Callable[[int], Dict[str, Any]]
+# a function sending a request with the given keyword arguments, e.g. a bravado CallableOperation
+Operation = Callable[..., HttpFuture]
+
+# percentiles included in reports
+PERCENTILES = (50.0, 90.0, 99.0, 99.9, 99.99, 100.0)
+
+
+class LatencyHistogram:
+    """Counts latencies in buckets whose width grows with their magnitude, like HdrHistogram. Values are kept
+    in microseconds with a relative error of less than 1 / 2 ** SUB_BUCKET_BITS, and the number of buckets only
+    grows with the logarithm of the largest value. Not thread-safe."""
+
+    SUB_BUCKET_BITS = 7
+
+    def __init__(self) -> None:
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def _bucket(self, microseconds: int) -> int:
+        # values below 2 ** (SUB_BUCKET_BITS + 1) are counted exactly, larger ones are shifted down so that
+        # SUB_BUCKET_BITS + 1 significant bits remain
+        magnitude = max(0, microseconds.bit_length() - self.SUB_BUCKET_BITS - 1)
+        return (magnitude << (self.SUB_BUCKET_BITS + 1)) + (microseconds >> magnitude)
+
+    def _highest_value(self, bucket: int) -> int:
+        """The largest value in microseconds that falls into bucket."""
+        magnitude = bucket >> (self.SUB_BUCKET_BITS + 1)
+        sub_bucket = bucket & ((1 << (self.SUB_BUCKET_BITS + 1)) - 1)
+        return ((sub_bucket + 1) << magnitude) - 1
+
+    def record(self, seconds: float) -> None:
+        bucket = self._bucket(max(0, int(seconds * 1e6)))
+        self._counts[bucket] = self._counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Return the latency in seconds that percent of the recorded latencies don't exceed. As with
+        HdrHistogram, this is the highest value of the bucket the percentile falls into."""
+        if not self.count:
+            return 0.0
+        if percent >= 100.0:
+            return self.max
+        threshold = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for bucket in sorted(self._counts):
+            seen += self._counts[bucket]
+            if seen >= threshold:
+                return min(self._highest_value(bucket) / 1e6, self.max)
+        return self.max  # pragma: no cover
+
+
+class LoadResult(NamedTuple):
+    requests: int
+    # seconds from the start of the test until the last response arrived
+    elapsed: float
+    # latencies of all requests, including failed ones
+    latencies: LatencyHistogram
+    # number of failed requests by kind of error, e.g. "HTTP 503" or "BravadoTimeoutError"
+    errors: Dict[str, int]
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+
+def classify_error(error: BaseException) -> str:
+    """Return the kind of error, as listed in reports."""
+    if isinstance(error, HTTPError):
+        return "HTTP {}".format(error.status_code)
+    return type(error).__name__
+
+
+class _Recorder:
+    """Collects the outcomes of requests from the threads completing them, and limits the number of
+    requests in flight."""
+
+    def __init__(self, max_in_flight: Optional[int]) -> None:
+        self.latencies = LatencyHistogram()
+        self.errors: Dict[str, int] = {}
+        self.last_completion = 0.0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._slots = (
+            threading.Semaphore(max_in_flight) if max_in_flight is not None else None
+        )
+
+    def start(self) -> None:
+        if self._slots is not None:
+            self._slots.acquire()
+        with self._lock:
+            self._in_flight += 1
+
+    def finish(self, start: float, future: "concurrent.futures.Future[Any]") -> None:
+        now = time.perf_counter()
+        error = future.exception()
+        with self._lock:
+            self.latencies.record(now - start)
+            if error is not None:
+                kind = classify_error(error)
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+            self.last_completion = max(self.last_completion, now)
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.notify_all()
+        if self._slots is not None:
+            self._slots.release()
+
+    def wait_idle(self, timeout: Optional[float]) -> bool:
+        """Wait until no request is in flight anymore; return False if that didn't happen within timeout."""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._in_flight, timeout)
+
+
+def _schedule(
+    start: float,
+    rate: Optional[float],
+    duration: Optional[float],
+    requests: Optional[int],
+) -> Iterator[Tuple[int, float]]:
+    """Yield the sequence number and start time of every request, waiting until it is due in open-loop mode."""
+    index = 0
+    while requests is None or index < requests:
+        now = time.perf_counter()
+        if duration is not None and now - start >= duration:
+            return
+        if rate is None:
+            yield index, now
+        else:
+            scheduled = start + index / rate
+            if scheduled > now:
+                time.sleep(scheduled - now)
+            yield index, scheduled
+        index += 1
+
+
+def run_load(
+    operation: Operation,
+    params: ParamsGenerator,
+    concurrency: Optional[int] = None,
+    rate: Optional[float] = None,
+    duration: Optional[float] = None,
+    requests: Optional[int] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+    drain_timeout: Optional[float] = 30.0,
+) -> LoadResult:
+    """Send requests through operation, which must return :py:class:`~bravado_asyncio.http_future.ThreadHttpFuture`
+    instances, until duration seconds have passed or the given number of requests have been sent.
+
+    :param concurrency: closed loop: keep this many requests in flight, sending the next one as soon as one completes
+    :param rate: open loop: send this many requests per second, regardless of how many are in flight. The latency of a
+        request includes the time it had to wait to be sent because the load generator fell behind.
+    :param executor: unmarshal responses in this executor rather than on the event loop thread
+    :param drain_timeout: number of seconds to wait for requests still in flight at the end
+    """
+    if (concurrency is None) == (rate is None):
+        raise ValueError("Pass either concurrency or rate")
+    if duration is None and requests is None:
+        raise ValueError("Pass duration, requests or both")
+
+    recorder = _Recorder(concurrency)
+    start = time.perf_counter()
+    sent = 0
+    for index, request_start in _schedule(start, rate, duration, requests):
+        recorder.start()
+        if concurrency is not None:
+            # in closed-loop mode, the request only starts once a slot has become available
+            request_start = time.perf_counter()
+        try:
+            future = cast(ThreadHttpFuture, operation(**params(index)))
+            response_future = future.response_future(executor)
+        except Exception as e:
+            failed: "concurrent.futures.Future[Any]" = concurrent.futures.Future()
+            failed.set_exception(e)
+            recorder.finish(request_start, failed)
+        else:
+            response_future.add_done_callback(
+                functools.partial(recorder.finish, request_start)
+            )
+        sent += 1
+    end = (
+        recorder.last_completion
+        if recorder.wait_idle(drain_timeout)
+        else time.perf_counter()
+    )
+
+    return LoadResult(
+        requests=sent,
+        elapsed=end - start,
+        latencies=recorder.latencies,
+        errors=dict(recorder.errors),
+    )
+
+
+def format_report(result: LoadResult) -> str:
+    rows = [
+        ("requests", str(result.requests)),
+        ("errors", str(sum(result.errors.values()))),
+        ("elapsed", "{:.2f}s".format(result.elapsed)),
+        ("throughput", "{:.1f} requests/s".format(result.throughput)),
+        ("latency mean", "{:.3f}ms".format(result.latencies.mean * 1e3)),
+    ]
+    rows.extend(
+        (
+            "latency p{:g}".format(percent),
+            "{:.3f}ms".format(result.latencies.percentile(percent) * 1e3),
+        )
+        for percent in PERCENTILES
+    )
+    rows.extend(
+        ("error {}".format(kind), str(count))
+        for kind, count in sorted(result.errors.items())
+    )
+    width = max(len(label) for label, _ in rows)
+    return "\n".join(
+        "{}  {}".format(label.ljust(width), value) for label, value in rows
+    )
+
+
+def result_as_dict(result: LoadResult) -> Dict[str, Any]:
+    return {
+        "requests": result.requests,
+        "elapsed": result.elapsed,
+        "throughput": result.throughput,
+        "latency": {
+            "mean": result.latencies.mean,
+            **{
+                "p{:g}".format(percent): result.latencies.percentile(percent)
+                for percent in PERCENTILES
+            },
+        },
+        "errors": result.errors,
+    }
+
+
+def load_swagger_client(
+    spec: str, http_client: AsyncioClient, base_url: Optional[str] = None
+) -> SwaggerClient:
+    """Load the spec at spec, a URL or a path. Requests go to base_url if given, instead of the
+    URL from the spec."""
+    if os.path.exists(spec):
+        # bravado loads file URLs itself
+        spec = pathlib.Path(spec).resolve().as_uri()
+    swagger_client = SwaggerClient.from_url(  # type: ignore[no-untyped-call]
+        spec, http_client=http_client
+    )
+    if base_url is not None:
+        swagger_client.swagger_spec.api_url = base_url
+    return swagger_client
+
+
+def get_operation(swagger_client: SwaggerClient, operation_id: str) -> Operation:
+    """Return the callable operation with the given id.
+
+    :raises ValueError: if the spec doesn't contain such an operation
+    """
+    for resource_name, resource in swagger_client.swagger_spec.resources.items():
+        if operation_id in resource.operations:
+            return getattr(getattr(swagger_client, resource_name), operation_id)
+    raise ValueError("Operation {} not found in the spec".format(operation_id))
+
+
+def import_params_generator(path: str) -> ParamsGenerator:
+    """Import a function given as ``package.module:function``."""
+    module_name, _, function_name = path.partition(":")
+    if not function_name:
+        raise ValueError("Expected package.module:function, got {}".format(path))
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m bravado_asyncio.loadgen",
+        description="Send requests for a Swagger operation through AsyncioClient and report latencies.",
+    )
+    parser.add_argument("spec", help="URL or path of the Swagger spec")
+    parser.add_argument("operation_id", help="id of the operation to call")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument(
+        "--concurrency",
+        type=int,
+        help="closed loop: number of requests to keep in flight (default: 1)",
+    )
+    load.add_argument(
+        "--rate", type=float, help="open loop: number of requests to send per second"
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help="number of seconds to send requests for (default: 10, unless --requests is given)",
+    )
+    parser.add_argument("--requests", type=int, help="number of requests to send")
+    params = parser.add_mutually_exclusive_group()
+    params.add_argument(
+        "--params",
+        type=json.loads,
+        default={},
+        help="parameters of every request, as a JSON object",
+    )
+    params.add_argument(
+        "--params-generator",
+        help="package.module:function returning the parameters for the request with the given sequence number",
+    )
+    parser.add_argument(
+        "--header",
+        action="append",
+        default=[],
+        metavar="NAME:VALUE",
+        help="header to send with every request; can be given several times",
+    )
+    parser.add_argument(
+        "--base-url", help="send requests here instead of to the URL from the spec"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=10.0,
+        help="timeout of every request in seconds",
+    )
+    parser.add_argument(
+        "--connection-limit",
+        type=int,
+        help="maximum number of connections (default: aiohttp's default of 100)",
+    )
+    parser.add_argument(
+        "--unmarshal-threads",
+        type=int,
+        default=1,
+        help="number of threads unmarshalling responses; 0 unmarshals on the event loop thread",
+    )
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+    if args.concurrency is None and args.rate is None:
+        args.concurrency = 1
+    if args.duration is None and args.requests is None:
+        args.duration = 10.0
+    for header in args.header:
+        if ":" not in header:
+            parser.error("Headers must be given as NAME:VALUE, got {}".format(header))
+    return args
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    headers = dict(
+        (name.strip(), value.strip())
+        for name, _, value in (header.partition(":") for header in args.header)
+    )
+    http_client = AsyncioClient(
+        run_mode=RunMode.THREAD,
+        session_config=SessionConfig(limit=args.connection_limit),
+    )
+    executor = (
+        concurrent.futures.ThreadPoolExecutor(args.unmarshal_threads)
+        if args.unmarshal_threads
+        else None
+    )
+    try:
+        swagger_client = load_swagger_client(args.spec, http_client, args.base_url)
+        operation = get_operation(swagger_client, args.operation_id)
+        params_generator: ParamsGenerator = (
+            import_params_generator(args.params_generator)
+            if args.params_generator
+            else lambda _: args.params
+        )
+        request_options = {"headers": headers, "timeout": args.timeout}
+
+        def send(**params: Any) -> HttpFuture:
+            return operation(_request_options=request_options, **params)
+
+        result = run_load(
+            send,
+            lambda index: dict(params_generator(index)),
+            concurrency=args.concurrency,
+            rate=args.rate,
+            duration=args.duration,
+            requests=args.requests,
+            executor=executor,
+            drain_timeout=args.timeout,
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
+        http_client.close()
+
+    if args.json:
+        print(json.dumps(result_as_dict(result), indent=2, sort_keys=True))
+    else:
+        print(format_report(result))
+    return 1 if result.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
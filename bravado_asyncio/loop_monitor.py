@@ -0,0 +1,199 @@
+"""Module for monitoring the health of an event loop, e.g. the one returned by
+:py:func:`bravado_asyncio.thread_loop.get_thread_loop`.
+
+The :py:class:`LoopMonitor` measures three things:
+
+- scheduling lag: a timer fires every interval seconds; the delay between the time it was scheduled
+  for and the time it actually ran tells how long callbacks have to wait for the loop.
+- slow callbacks: callbacks that run for at least slow_callback_duration seconds, with the same
+  semantics as asyncio's debug mode but without its overhead.
+- pending tasks: the number of tasks that haven't completed yet.
+"""
+import asyncio
+import collections
+import logging
+import time
+from typing import Any
+from typing import Callable
+from typing import NamedTuple
+from typing import Optional
+
+from bravado_asyncio.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+LOOP_LAG = "loop.lag_seconds"
+LOOP_SLOW_CALLBACKS = "loop.slow_callbacks"
+LOOP_PENDING_TASKS = "loop.pending_tasks"
+
+
+class LoopAlert(NamedTuple):
+    """Passed to the on_alert callback of a :py:class:`LoopMonitor` when a threshold is exceeded.
+
+    kind is one of ``lag``, ``slow_callback`` or ``pending_tasks``; for slow callbacks, callback
+    is a string representation of the offending callback."""
+
+    kind: str
+    value: float
+    threshold: float
+    callback: Optional[str] = None
+
+
+class _TimedReadyQueue(collections.deque):
+    """Replacement for the ready queue of an event loop. The loop takes one handle at a time
+    from the queue and runs it, so the time between two calls to popleft() is the time it took
+    to run the previous handle."""
+
+    def __init__(self, iterable: Any, monitor: "LoopMonitor") -> None:
+        super().__init__(iterable)
+        self.monitor = monitor
+
+    def popleft(self) -> Any:
+        handle = super().popleft()
+        self.monitor._callback_started(handle)
+        return handle
+
+
+class LoopMonitor:
+    """Watches an event loop for lag, slow callbacks and a growing number of pending tasks.
+
+    Measurements are recorded in :py:data:`bravado_asyncio.metrics.metrics`. If on_alert is given,
+    it is called with a :py:class:`LoopAlert` whenever a threshold is exceeded. It runs on the
+    loop's thread, so it should return quickly.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        interval: float = 0.25,
+        lag_threshold: float = 0.1,
+        slow_callback_duration: float = 0.1,
+        pending_tasks_threshold: Optional[int] = None,
+        on_alert: Optional[Callable[[LoopAlert], None]] = None,
+    ) -> None:
+        self.loop = loop
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.slow_callback_duration = slow_callback_duration
+        self.pending_tasks_threshold = pending_tasks_threshold
+        self.on_alert = on_alert
+
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.slow_callbacks = 0
+        self.pending_tasks = 0
+
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._expected_time = 0.0
+        self._current_handle: Any = None
+        self._current_handle_start = 0.0
+        self._selector: Any = None
+        self._original_select: Any = None
+
+    def start(self) -> "LoopMonitor":
+        """Start monitoring. Can be called from any thread."""
+        self.loop.call_soon_threadsafe(self._start)
+        return self
+
+    def stop(self) -> None:
+        """Stop monitoring. Can be called from any thread."""
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._stop)
+
+    def _start(self) -> None:
+        self._instrument_callbacks()
+        self._schedule_tick()
+
+    def _stop(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if isinstance(getattr(self.loop, "_ready", None), _TimedReadyQueue):
+            self.loop._ready = collections.deque(self.loop._ready)  # type: ignore
+        if self._selector is not None:
+            self._selector.select = self._original_select
+            self._selector = None
+
+    def _instrument_callbacks(self) -> None:
+        # slow callback detection relies on implementation details of asyncio's event loops. Other loop
+        # implementations (e.g. uvloop) only get lag and pending task monitoring.
+        ready = getattr(self.loop, "_ready", None)
+        selector = getattr(self.loop, "_selector", None) or getattr(
+            self.loop, "_proactor", None
+        )
+        if not isinstance(ready, collections.deque) or selector is None:
+            log.info("Slow callback detection is not supported for %r", self.loop)
+            return
+
+        self.loop._ready = _TimedReadyQueue(ready, self)  # type: ignore
+        self._selector = selector
+        self._original_select = selector.select
+
+        def select(*args: Any, **kwargs: Any) -> Any:
+            # the loop is about to wait for I/O, so the last callback of this iteration has finished
+            self._callback_finished()
+            return self._original_select(*args, **kwargs)
+
+        selector.select = select
+
+    def _callback_started(self, handle: Any) -> None:
+        self._callback_finished()
+        self._current_handle = handle
+        self._current_handle_start = time.monotonic()
+
+    def _callback_finished(self) -> None:
+        if self._current_handle is None:
+            return
+
+        duration = time.monotonic() - self._current_handle_start
+        handle = self._current_handle
+        self._current_handle = None
+        if duration >= self.slow_callback_duration:
+            self.slow_callbacks += 1
+            metrics.increment(LOOP_SLOW_CALLBACKS)
+            log.warning("Executing %r took %.3f seconds", handle, duration)
+            self._alert(
+                LoopAlert(
+                    kind="slow_callback",
+                    value=duration,
+                    threshold=self.slow_callback_duration,
+                    callback=repr(handle),
+                )
+            )
+
+    def _schedule_tick(self) -> None:
+        self._expected_time = self.loop.time() + self.interval
+        self._timer = self.loop.call_at(self._expected_time, self._tick)
+
+    def _tick(self) -> None:
+        self.lag = max(0.0, self.loop.time() - self._expected_time)
+        self.max_lag = max(self.max_lag, self.lag)
+        metrics.observe(LOOP_LAG, self.lag)
+        if self.lag >= self.lag_threshold:
+            self._alert(
+                LoopAlert(kind="lag", value=self.lag, threshold=self.lag_threshold)
+            )
+
+        self.pending_tasks = len(asyncio.all_tasks(self.loop))
+        metrics.observe(LOOP_PENDING_TASKS, self.pending_tasks)
+        if (
+            self.pending_tasks_threshold is not None
+            and self.pending_tasks >= self.pending_tasks_threshold
+        ):
+            self._alert(
+                LoopAlert(
+                    kind="pending_tasks",
+                    value=self.pending_tasks,
+                    threshold=self.pending_tasks_threshold,
+                )
+            )
+
+        self._schedule_tick()
+
+    def _alert(self, alert: LoopAlert) -> None:
+        if self.on_alert is None:
+            return
+        try:
+            self.on_alert(alert)
+        except Exception:
+            log.exception("Error in loop monitor alert callback")
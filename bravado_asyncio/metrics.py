@@ -0,0 +1,89 @@
+"""Module for collecting metrics about the internals of bravado-asyncio.
+
+Metrics are process-wide and kept in the :py:data:`metrics` object. Use
+:py:meth:`Metrics.add_listener` to forward them to your own metrics system.
+"""
+import threading
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+
+
+# time spent decoding JSON response bodies on the event loop, in seconds
+JSON_DECODE_LOOP_BLOCKING = "json_decode.loop_blocking_seconds"
+# number of JSON response bodies of at least JsonDecodeConfig.offload_threshold bytes, which were decoded outside the
+# event loop
+JSON_DECODE_OFFLOADED = "json_decode.offloaded"
+# number of requests (or response body reads) that timed out on the client side and were cancelled
+REQUESTS_CANCELLED_ON_TIMEOUT = "requests.cancelled_on_timeout"
+# number of requests that timed out on the client side but were left running, see cancel_on_timeout
+REQUESTS_ORPHANED = "requests.orphaned"
+# number of responses that were garbage collected without being released, see ResponseReleaseConfig
+RESPONSES_LEAKED = "responses.leaked"
+# number of response bodies that exceeded their size limit, and that were spilled to disk, see ResponseSizeConfig
+RESPONSES_TOO_LARGE = "responses.too_large"
+RESPONSES_SPILLED = "responses.spilled"
+# number of Swagger spec requests served from the spec cache, and sent to the server because of a cache miss
+SPEC_CACHE_HITS = "spec_cache.hits"
+SPEC_CACHE_MISSES = "spec_cache.misses"
+# number of cached Swagger specs that were revalidated in the background, and how many of them had changed
+SPEC_CACHE_REVALIDATIONS = "spec_cache.revalidations"
+SPEC_CACHE_UPDATES = "spec_cache.updates"
+
+
+Listener = Callable[[str, float], None]
+
+
+class Timing(NamedTuple):
+    samples: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+
+class Metrics:
+    """Thread-safe collection of counters and timings."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._timings: Dict[str, Timing] = {}
+        self._listeners: List[Listener] = []
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+        for listener in self._listeners:
+            listener(name, value)
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            timing = self._timings.get(name, Timing())
+            self._timings[name] = Timing(
+                samples=timing.samples + 1,
+                total=timing.total + value,
+                max=max(timing.max, value),
+            )
+        for listener in self._listeners:
+            listener(name, value)
+
+    def get_counter(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    def get_timing(self, name: str) -> Timing:
+        return self._timings.get(name, Timing())
+
+    def add_listener(self, listener: Listener) -> None:
+        """Call listener with the name and value of every metric that gets recorded from now on."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Listener) -> None:
+        self._listeners.remove(listener)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,355 @@
+"""Module for recording requests and responses, and replaying them without the services they were sent to.
+
+With a :py:class:`~bravado_asyncio.definitions.RecordingConfig` in RECORD mode, AsyncioClient appends every
+request it sends and the response it receives to a file: headers, bodies and timings. In REPLAY mode, the
+client answers requests from that file instead, without opening any connections. This makes it possible to
+benchmark unmarshalling and the code using the client in isolation, and to reproduce latency issues locally.
+
+Response bodies are read as a whole while recording. Bodies larger than the limit that
+:py:class:`~bravado_asyncio.definitions.ResponseSizeConfig` sets for them, or than its spill_threshold, are left to
+the client, and their exchanges aren't recorded.
+
+Every exchange is stored as one line of JSON, compressed as a gzip member of its own. The file is valid after
+every write, even if the process ends without closing the client, and recordings can be concatenated.
+Requests are matched by method and URL (including the query string) only. If a URL was recorded more than
+once, its responses are replayed in the order they were recorded, starting over after the last one.
+"""
+import asyncio
+import base64
+import concurrent.futures
+import gzip
+import json
+import logging
+import threading
+import time
+from typing import Any
+from typing import Awaitable
+from typing import BinaryIO
+from typing import cast
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from typing import TYPE_CHECKING
+
+from bravado_asyncio.response_adapter import decode_json
+from bravado_asyncio.response_adapter import read_body_up_to
+
+if TYPE_CHECKING:  # pragma: no cover
+    import aiohttp
+    from multidict import CIMultiDictProxy
+
+log = logging.getLogger(__name__)
+
+# these headers describe the body as it was transferred; recorded bodies are stored decoded
+_TRANSFER_HEADERS = frozenset(
+    ("content-encoding", "content-length", "transfer-encoding")
+)
+
+
+class RecordedExchange(NamedTuple):
+    method: str
+    url: str
+    request_headers: Dict[str, str]
+    # None if the request body wasn't available as bytes, e.g. for file uploads
+    request_body: Optional[bytes]
+    status: int
+    reason: str
+    headers: List[Tuple[str, str]]
+    body: bytes
+    # seconds until the response headers had arrived, and until the whole body had arrived
+    elapsed: float
+    duration: float
+
+
+class ReplayMissError(LookupError):
+    """The recording doesn't contain a response for the request."""
+
+    def __init__(self, method: str, url: str) -> None:
+        super().__init__("No response recorded for {} {}".format(method, url))
+        self.method = method
+        self.url = url
+
+
+def _encode_body(body: Optional[bytes]) -> Optional[str]:
+    return base64.b64encode(body).decode("ascii") if body is not None else None
+
+
+def _decode_body(body: Optional[str]) -> Optional[bytes]:
+    return base64.b64decode(body) if body is not None else None
+
+
+def encode_exchange(exchange: RecordedExchange) -> bytes:
+    """Return exchange as a line of JSON, without the trailing newline."""
+    return json.dumps(
+        {
+            **exchange._asdict(),
+            "request_body": _encode_body(exchange.request_body),
+            "body": _encode_body(exchange.body),
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def decode_exchange(line: bytes) -> RecordedExchange:
+    fields = json.loads(line)
+    return RecordedExchange(
+        **{
+            **fields,
+            "request_body": _decode_body(fields["request_body"]),
+            "headers": [(name, value) for name, value in fields["headers"]],
+            "body": _decode_body(fields["body"]),
+        }
+    )
+
+
+def read_recording(path: str) -> List[RecordedExchange]:
+    """Return the exchanges recorded in the file at path, in the order they were recorded."""
+    with open(path, "rb") as f:
+        # decompresses all members of the file
+        data = gzip.decompress(f.read())
+    return [decode_exchange(line) for line in data.splitlines() if line]
+
+
+def get_request_body(data: Any) -> Optional[bytes]:
+    """Return the request body passed to aiohttp as bytes, if it is available without reading a stream."""
+    # form bodies and compressed bodies are BytesPayloads
+    value = getattr(data, "_value", data)
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return None
+
+
+_write_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_write_executor_lock = threading.Lock()
+
+
+def _get_write_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Exchanges are compressed and written in a thread of their own, so that the event loop doesn't wait for
+    the disk. With a single thread, exchanges are written in the order they were recorded."""
+    global _write_executor
+    with _write_executor_lock:
+        if _write_executor is None:
+            _write_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="bravado-asyncio-recording"
+            )
+        return _write_executor
+
+
+class Recorder:
+    """Appends the requests of an AsyncioClient and their responses to the file at path. Can be used
+    from any thread."""
+
+    def __init__(self, path: str) -> None:
+        self._file: Optional[BinaryIO] = open(path, "ab")
+        self._lock = threading.Lock()
+
+    def write(self, exchange: RecordedExchange) -> None:
+        """Append exchange to the file, blocking until it has been written."""
+        member = gzip.compress(encode_exchange(exchange) + b"\n", mtime=0)
+        with self._lock:
+            if self._file is None:
+                # the client has been closed while the request was running
+                return
+            self._file.write(member)
+            self._file.flush()
+
+    async def record(
+        self,
+        request: Awaitable["aiohttp.ClientResponse"],
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        data: Any,
+        max_size: Optional[int] = None,
+    ) -> "aiohttp.ClientResponse":
+        """Await request, read the whole response body and record the exchange. aiohttp keeps the body,
+        so the response can be used as usual afterwards. Requests that fail aren't recorded. The exchange is
+        written in the background, see :py:func:`_get_write_executor`.
+
+        :param max_size: bodies larger than this aren't read as a whole, and their exchange isn't recorded
+        """
+        start = time.monotonic()
+        response = await request
+        elapsed = time.monotonic() - start
+        if max_size is None:
+            body = await response.read()
+        else:
+            limited_body = await read_body_up_to(response, max_size)
+            if limited_body is None:
+                log.debug(
+                    "Not recording %s %s, its body is larger than %d bytes",
+                    method,
+                    url,
+                    max_size,
+                )
+                return response
+            body = limited_body
+        self._write_in_background(
+            RecordedExchange(
+                method=method,
+                url=url,
+                request_headers=dict(headers),
+                request_body=get_request_body(data),
+                status=response.status,
+                reason=response.reason or "",
+                headers=[
+                    (name, value)
+                    for name, value in response.headers.items()
+                    if name.lower() not in _TRANSFER_HEADERS
+                ],
+                body=body,
+                elapsed=elapsed,
+                duration=time.monotonic() - start,
+            )
+        )
+        return response
+
+    def _write_in_background(self, exchange: RecordedExchange) -> None:
+        def write() -> None:
+            try:
+                self.write(exchange)
+            except Exception:
+                log.warning(
+                    "Error recording %s %s",
+                    exchange.method,
+                    exchange.url,
+                    exc_info=True,
+                )
+
+        _get_write_executor().submit(write)
+
+    def _close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def close(self) -> None:
+        """Close the file once the exchanges recorded so far have been written."""
+        _get_write_executor().submit(self._close).result()
+
+
+class _ReplayedContent:
+    """Stands in for the :py:class:`aiohttp.StreamReader` of a replayed response. The body is returned as
+    a single chunk, after delay seconds."""
+
+    def __init__(self, body: bytes, delay: float) -> None:
+        self._body = body
+        self._delay = delay
+
+    def at_eof(self) -> bool:
+        return not self._body
+
+    async def readany(self) -> bytes:
+        body = self._body
+        if body and self._delay > 0:
+            await asyncio.sleep(self._delay)
+        self._body = b""
+        return body
+
+
+class ReplayedResponse:
+    """Stands in for the :py:class:`aiohttp.ClientResponse` of a recorded exchange, providing the parts the
+    response adapters use. There is no connection to release.
+
+    :param body_delay: seconds to wait before the body is available
+    """
+
+    connection = None
+
+    def __init__(self, exchange: RecordedExchange, body_delay: float = 0.0) -> None:
+        import multidict
+
+        self.method = exchange.method
+        self.url = exchange.url
+        self.status = exchange.status
+        self.reason = exchange.reason
+        headers = multidict.CIMultiDict(exchange.headers)
+        headers["Content-Length"] = str(len(exchange.body))
+        self.headers: "CIMultiDictProxy[str]" = multidict.CIMultiDictProxy(headers)
+        self.content_length = len(exchange.body)
+        self.content = _ReplayedContent(exchange.body, body_delay)
+        self.closed = False
+        self._body = exchange.body
+
+    @property
+    def charset(self) -> Optional[str]:
+        content_type = self.headers.get("Content-Type")
+        if content_type is None:
+            return None
+        from aiohttp.helpers import parse_mimetype
+
+        return parse_mimetype(content_type).parameters.get("charset")
+
+    def get_encoding(self) -> str:
+        return self.charset or "utf-8"
+
+    async def read(self) -> bytes:
+        # waits for the body if it hasn't been read yet
+        await self.content.readany()
+        return self._body
+
+    async def text(self, encoding: Optional[str] = None, errors: str = "strict") -> str:
+        return (await self.read()).decode(encoding or self.get_encoding(), errors)
+
+    async def json(self, **_: Any) -> Any:
+        return decode_json(await self.read(), self.charset)
+
+    def release(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class Replayer:
+    """Answers requests with the responses of recorded exchanges. Can be used from any thread.
+
+    :param replay_latency: if set, every response takes as long as it did when it was recorded
+    """
+
+    def __init__(
+        self, exchanges: Iterable[RecordedExchange], replay_latency: bool = False
+    ) -> None:
+        self._exchanges: Dict[Tuple[str, str], List[RecordedExchange]] = {}
+        for exchange in exchanges:
+            self._exchanges.setdefault((exchange.method, exchange.url), []).append(
+                exchange
+            )
+        self._positions: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self.replay_latency = replay_latency
+
+    @classmethod
+    def from_file(cls, path: str, replay_latency: bool = False) -> "Replayer":
+        return cls(read_recording(path), replay_latency=replay_latency)
+
+    def next_exchange(self, method: str, url: str) -> RecordedExchange:
+        """Return the next recorded exchange for method and url.
+
+        :raises ReplayMissError: if there is none
+        """
+        key = (method, url)
+        exchanges = self._exchanges.get(key)
+        if not exchanges:
+            raise ReplayMissError(method, url)
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = (position + 1) % len(exchanges)
+        return exchanges[position]
+
+    async def replay(self, method: str, url: str) -> "aiohttp.ClientResponse":
+        """Return the next recorded response for method and url, like
+        :py:meth:`aiohttp.ClientSession.request` would."""
+        exchange = self.next_exchange(method, url)
+        body_delay = 0.0
+        if self.replay_latency:
+            await asyncio.sleep(exchange.elapsed)
+            body_delay = exchange.duration - exchange.elapsed
+        return cast("aiohttp.ClientResponse", ReplayedResponse(exchange, body_delay))
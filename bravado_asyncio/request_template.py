@@ -0,0 +1,104 @@
+"""Module for caching the parts of a request that are the same every time an operation is called.
+
+:py:meth:`bravado_asyncio.http_client.AsyncioClient.request` is called for every request, so work
+that only depends on the operation (or the HTTP method, for requests without an operation) is done
+once and kept in a :py:class:`RequestTemplate`. URLs are passed to aiohttp as strings: yarl already
+caches the result of parsing them.
+"""
+import threading
+from types import MappingProxyType
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+from typing import TYPE_CHECKING
+
+from bravado_core.operation import Operation
+from yelp_bytes import from_bytes
+
+if TYPE_CHECKING:  # pragma: no cover
+    import aiohttp
+
+_templates_lock = threading.Lock()
+
+# templates for requests without an operation, by HTTP method
+_method_templates: Dict[str, "RequestTemplate"] = {}
+
+# number of different timeout combinations to remember per template
+MAX_CACHED_TIMEOUTS = 16
+
+# the headers of all requests that don't set any; read-only, as headers may be modified later on
+EMPTY_HEADERS: Mapping[str, str] = MappingProxyType({})
+
+
+class RequestTemplate:
+    """The parts of a request that only depend on its operation and HTTP method."""
+
+    def __init__(self, method: str) -> None:
+        self.method = method
+        # aiohttp always adds a Content-Type header, and this breaks some servers that don't
+        # expect it for non-POST/PUT requests: https://github.com/aio-libs/aiohttp/issues/457
+        self.skip_auto_headers: Optional[List[str]] = (
+            ["Content-Type"] if method not in ["POST", "PUT"] else None
+        )
+        # Without form fields or files, the form body is empty. Building an empty FormData (which sets up a
+        # multipart writer) is expensive; for methods that don't send a Content-Type header an empty bytes
+        # body results in the same request.
+        self.empty_form_body: Optional[bytes] = (
+            b"" if self.skip_auto_headers is not None else None
+        )
+        self._timeouts: Dict[
+            Tuple[Optional[float], Optional[float]], "aiohttp.ClientTimeout"
+        ] = {}
+
+    def get_timeout(
+        self, request_timeout: Optional[float], connect_timeout: Optional[float]
+    ) -> Optional["aiohttp.ClientTimeout"]:
+        if not (connect_timeout or request_timeout):
+            return None
+
+        key = (request_timeout, connect_timeout)
+        timeout = self._timeouts.get(key)
+        if timeout is None:
+            import aiohttp
+
+            timeout = aiohttp.ClientTimeout(
+                total=request_timeout, connect=connect_timeout
+            )
+            if len(self._timeouts) < MAX_CACHED_TIMEOUTS:
+                self._timeouts[key] = timeout
+        return timeout
+
+    @staticmethod
+    def get_headers(headers: Mapping[str, object]) -> Mapping[str, str]:
+        if not headers:
+            return EMPTY_HEADERS
+        return {
+            # Convert not string headers to string
+            k: v
+            if type(v) is str
+            else from_bytes(v)
+            if isinstance(v, bytes)
+            else str(v)
+            for k, v in headers.items()
+        }
+
+
+def get_request_template(
+    operation: Optional[Operation], method: str
+) -> RequestTemplate:
+    """Return the template for requests of operation using the given HTTP method, creating it on first use.
+    Templates of operations are stored on the operation itself."""
+    if operation is None:
+        template = _method_templates.get(method)
+        if template is None:
+            with _templates_lock:
+                template = _method_templates.setdefault(method, RequestTemplate(method))
+        return template
+
+    template = getattr(operation, "_bravado_asyncio_request_template", None)
+    if template is None or template.method != method:
+        template = RequestTemplate(method)
+        operation._bravado_asyncio_request_template = template  # type: ignore
+    return template
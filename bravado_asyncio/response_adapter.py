@@ -1,43 +1,314 @@
 import asyncio
+import collections
+import concurrent.futures
+import json
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
 from typing import Any
+from typing import Awaitable
+from typing import BinaryIO
+from typing import Callable
 from typing import cast
+from typing import Coroutine
 from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import TYPE_CHECKING
 from typing import TypeVar
+from typing import Union
 
 from bravado_core.response import IncomingResponse
-from multidict import CIMultiDictProxy
 
 from bravado_asyncio.definitions import AsyncioResponse
+from bravado_asyncio.definitions import JsonDecodeConfig
+from bravado_asyncio.definitions import ResponseSizeConfig
+from bravado_asyncio.metrics import JSON_DECODE_LOOP_BLOCKING
+from bravado_asyncio.metrics import JSON_DECODE_OFFLOADED
+from bravado_asyncio.metrics import metrics
+from bravado_asyncio.metrics import REQUESTS_CANCELLED_ON_TIMEOUT
+from bravado_asyncio.metrics import RESPONSES_SPILLED
+from bravado_asyncio.metrics import RESPONSES_TOO_LARGE
+from bravado_asyncio.response_release import release_response
+
+if TYPE_CHECKING:  # pragma: no cover
+    import aiohttp
+    from multidict import CIMultiDictProxy
 
 
 T = TypeVar("T")
 
+# a path to create or truncate, an open file descriptor, or a binary file object
+DownloadTarget = Union[str, "os.PathLike[str]", int, BinaryIO]
+Buffer = Union[bytearray, memoryview]
+# a whole response body: bytes, or a read-only mapping of the temporary file it was spilled to
+Body = Union[bytes, mmap.mmap]
+
+
+class ResponseTooLargeError(ValueError):
+    """The response body is larger than the limit set by
+    :py:class:`~bravado_asyncio.definitions.ResponseSizeConfig`."""
+
+    def __init__(self, max_size: int) -> None:
+        super().__init__(
+            "Response body is larger than the limit of {} bytes".format(max_size)
+        )
+        self.max_size = max_size
+
+
+def _write_all(fd: int, data: memoryview) -> None:
+    while data:
+        written = os.write(fd, data)
+        data = data[written:]
+
+
+@contextmanager
+def open_download_target(
+    target: DownloadTarget,
+) -> Iterator[Callable[[memoryview], Any]]:
+    """Return a function that writes its argument to target. Paths are opened for the duration of
+    the context; file descriptors and file objects are left open."""
+    if isinstance(target, int):
+        yield lambda data: _write_all(target, data)
+    elif isinstance(target, (str, os.PathLike)):
+        with open(target, "wb") as f:
+            yield f.write
+    else:
+        yield target.write
+
+
+class _SpillBuffer:
+    """Collects the chunks of a body in memory, and moves them to a temporary file in directory once they
+    add up to more than threshold bytes."""
+
+    def __init__(self, threshold: int, directory: Optional[str]) -> None:
+        self._threshold = threshold
+        self._directory = directory
+        self._chunks: List[memoryview] = []
+        self._size = 0
+        self._file: Optional[BinaryIO] = None
+
+    def spills(self, size: int) -> bool:
+        """Whether writing size more bytes goes to disk."""
+        return self._file is not None or self._size + size > self._threshold
+
+    def write(self, chunk: memoryview) -> None:
+        self._size += len(chunk)
+        if self._file is None:
+            if self._size <= self._threshold:
+                self._chunks.append(chunk)
+                return
+            self._file = cast(BinaryIO, tempfile.TemporaryFile(dir=self._directory))
+            self._file.writelines(self._chunks)
+            self._chunks = []
+        self._file.write(chunk)
+
+    def getvalue(self) -> Body:
+        if self._file is None:
+            return b"".join(self._chunks)
+        self._file.flush()
+        metrics.increment(RESPONSES_SPILLED)
+        # the mapping stays valid after the file is closed; the file is deleted once both are gone
+        return mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+def decode_json(body: bytes, encoding: Optional[str] = None) -> Any:
+    """Decode a JSON response body. Like :py:meth:`aiohttp.ClientResponse.json`, returns None
+    for an empty body. This is a module-level function so that it can be sent to a process pool."""
+    if not body.strip():
+        return None
+    return json.loads(body.decode(encoding) if encoding else body)
+
+
+class _PrefixedContent:
+    """Stands in for the :py:class:`aiohttp.StreamReader` of a response whose body has been read in part
+    already. Returns the chunks that were read first, then the rest of content. Provides the parts that aiohttp
+    and the response adapters use."""
+
+    def __init__(self, chunks: List[bytes], content: "aiohttp.StreamReader") -> None:
+        self._chunks = collections.deque(chunk for chunk in chunks if chunk)
+        self._content = content
+
+    def at_eof(self) -> bool:
+        return not self._chunks and self._content.at_eof()
+
+    async def readany(self) -> bytes:
+        if self._chunks:
+            return self._chunks.popleft()
+        return await self._content.readany()
+
+    async def read(self, n: int = -1) -> bytes:
+        if not self._chunks:
+            return await self._content.read(n)
+        if n < 0:
+            chunks = list(self._chunks)
+            self._chunks.clear()
+            chunks.append(await self._content.read())
+            return b"".join(chunks)
+        chunk = self._chunks.popleft()
+        if len(chunk) > n:
+            self._chunks.appendleft(chunk[n:])
+        return chunk[:n]
+
+    # aiohttp hands connection errors to the reader
+
+    def exception(self) -> Optional[BaseException]:
+        return self._content.exception()
+
+    def set_exception(self, *args: Any) -> None:
+        self._content.set_exception(*args)
+
+
+async def read_body_up_to(
+    response: "aiohttp.ClientResponse", max_size: int
+) -> Optional[bytes]:
+    """Return the body of response, or None if it is larger than max_size bytes. Bodies without a Content-Length
+    are read in chunks until they turn out to be too large; the response hands what has been read on to whoever
+    reads it next, followed by the rest of the body."""
+    content_length = response.content_length
+    if content_length is not None:
+        if content_length > max_size:
+            return None
+        body = await response.read()
+        # the Content-Length of compressed bodies is smaller than the body
+        return body if len(body) <= max_size else None
+
+    chunks: List[bytes] = []
+    size = 0
+    while size <= max_size:
+        chunk = await response.content.readany()
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    if size > max_size:
+        response.content = cast(
+            "aiohttp.StreamReader", _PrefixedContent(chunks, response.content)
+        )
+        return None
+    whole_body = b"".join(chunks)
+    response.content = cast(
+        "aiohttp.StreamReader", _PrefixedContent([whole_body], response.content)
+    )
+    return whole_body
+
 
 class AioHTTPResponseAdapter(IncomingResponse):
     """Wraps a aiohttp Response object to provide a bravado-like interface
-    to the response innards."""
+    to the response innards.
+
+    :param response_size: if set, the body is read in chunks so that max_size can be enforced while it
+        arrives, and large bodies are spilled to disk, see
+        :py:class:`~bravado_asyncio.definitions.ResponseSizeConfig`. Otherwise aiohttp reads it as a whole.
+    :param max_size: the size limit for the body of this response, if any
+    """
 
-    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+    # the rest of a chunk that didn't fit into the buffer passed to readinto()
+    _pending_chunk: Optional[memoryview] = None
+    # whether the body is being consumed in chunks rather than read as a whole
+    _streaming = False
+    # number of body bytes received so far, and whether that exceeded max_size
+    _received = 0
+    _too_large = False
+    # the whole body, once read with response_size set or by preload_body()
+    _body: Optional[Body] = None
+    # the error preload_body() ran into, if any
+    _preload_error: Optional[Exception] = None
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        json_decode_config: Optional[JsonDecodeConfig] = None,
+        response_size: Optional[ResponseSizeConfig] = None,
+        max_size: Optional[int] = None,
+    ) -> None:
         self._loop = loop
+        self._json_decode_config = json_decode_config
+        self._response_size = response_size
+        self._max_size = max_size
 
     def __call__(self: T, response: AsyncioResponse) -> T:
         self._delegate = response.response
         self._remaining_timeout = response.remaining_timeout
         return self
 
+    def _on_loop_thread(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def _run_coroutine(self, coroutine: Coroutine) -> Any:
+        if self._on_loop_thread():
+            # e.g. in a completion callback: waiting for the loop would deadlock. Callbacks get the body that was
+            # read before they were called, see preload_body().
+            coroutine.close()
+            if self._preload_error is not None:
+                raise self._preload_error
+            raise RuntimeError(
+                "Response body must be read before accessing it from the event loop thread"
+            )
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result(self._remaining_timeout)
+        except concurrent.futures.TimeoutError:
+            # stop reading a body nobody is waiting for anymore, and don't put its connection back into the pool
+            future.cancel()
+            self._loop.call_soon_threadsafe(self._delegate.close)
+            metrics.increment(REQUESTS_CANCELLED_ON_TIMEOUT)
+            raise
+
+    def release(self) -> None:
+        """Give the connection of the response back to the pool; it's closed if the body hasn't been read
+        completely. Can be called from any thread."""
+        release_response(self._delegate, self._loop)
+
     @property
     def status_code(self) -> int:
         return self._delegate.status
 
+    def _read_body(self) -> Body:
+        if self._body is None:
+            self._body = self._run_coroutine(self._receive_body())
+        return self._body
+
+    def _reads_whole_body(self) -> bool:
+        """Whether aiohttp reads the body, rather than _read_body(). Either way, a body read by
+        :py:meth:`preload_body` is used as is."""
+        return self._response_size is None and self._body is None
+
     @property
     def text(self) -> str:
-        future = asyncio.run_coroutine_threadsafe(self._delegate.text(), self._loop)
-        return future.result(self._remaining_timeout)
+        if self._reads_whole_body():
+            return self._run_coroutine(self._delegate.text())
+        return self.raw_bytes.decode(self._delegate.get_encoding())
 
     @property
     def raw_bytes(self) -> bytes:
-        future = asyncio.run_coroutine_threadsafe(self._delegate.read(), self._loop)
-        return future.result(self._remaining_timeout)
+        if self._reads_whole_body():
+            return self._run_coroutine(self._delegate.read())
+        body = self._read_body()
+        # a body spilled to disk is copied onto the heap here; raw_buffer avoids that
+        return body if isinstance(body, bytes) else body[:]
+
+    @property
+    def raw_buffer(self) -> memoryview:
+        """The body as a read-only buffer. Unlike :py:attr:`raw_bytes`, a body that was spilled to disk
+        isn't copied: its pages are read from the temporary file as they are accessed."""
+        if self._reads_whole_body():
+            return memoryview(self.raw_bytes)
+        return memoryview(self._read_body())
+
+    # bravado-core reads referenced spec files from this attribute
+    content = raw_bytes
 
     @property
     def reason(self) -> str:
@@ -46,33 +317,259 @@ class AioHTTPResponseAdapter(IncomingResponse):
         )  # aiohttp 3.4.0 doesn't annotate this attribute correctly
 
     @property
-    def headers(self) -> CIMultiDictProxy:
+    def headers(self) -> "CIMultiDictProxy":
         return self._delegate.headers
 
     def json(self, **_: Any) -> Dict[str, Any]:
-        future = asyncio.run_coroutine_threadsafe(
-            self._delegate.json(content_type=None), self._loop
+        if self._json_decode_config is None:
+            if self._reads_whole_body():
+                return self._run_coroutine(self._delegate.json(content_type=None))
+            return decode_json(self.raw_bytes, self._delegate.charset)
+
+        # only fetch the body on the loop, and decode it outside of it
+        body = self.raw_bytes
+        if self._on_loop_thread():
+            # e.g. in a completion callback without an executor. Waiting for the executor would block the loop
+            # just as long.
+            start = time.perf_counter()
+            result = decode_json(body, self._delegate.charset)
+            metrics.observe(JSON_DECODE_LOOP_BLOCKING, time.perf_counter() - start)
+            return result
+
+        if len(body) >= self._json_decode_config.offload_threshold:
+            metrics.increment(JSON_DECODE_OFFLOADED)
+            executor = self._json_decode_config.executor
+            if executor is not None:
+                return executor.submit(
+                    decode_json, body, self._delegate.charset
+                ).result(self._remaining_timeout)
+        return decode_json(body, self._delegate.charset)
+
+    async def _read_chunk(self, size: int = -1) -> memoryview:
+        """Return the next part of the body, at most size bytes if size isn't -1. Chunks are returned as
+        aiohttp received them, without copying. An empty chunk signals the end of the body."""
+        if self._pending_chunk is not None:
+            chunk = self._pending_chunk
+        else:
+            if not self._streaming or self._too_large:
+                # don't read anything if the announced size is too large, or if the body turned out to be
+                self._check_size(self._delegate.content_length or 0)
+            if not self._streaming and self._delegate.content.at_eof():
+                # the body has been read as a whole already (e.g. when draining small bodies), or it is empty
+                chunk = memoryview(await self._delegate.read())
+            else:
+                chunk = memoryview(await self._delegate.content.readany())
+            self._received += len(chunk)
+            self._check_size(self._received)
+        self._streaming = True
+
+        if 0 <= size < len(chunk):
+            self._pending_chunk = chunk[size:]
+            return chunk[:size]
+        self._pending_chunk = None
+        return chunk
+
+    def _check_size(self, size: int) -> None:
+        """Raise ResponseTooLargeError if size exceeds max_size, closing the connection the first time."""
+        if self._max_size is None or (size <= self._max_size and not self._too_large):
+            return
+        if not self._too_large:
+            self._too_large = True
+            self._delegate.close()
+            metrics.increment(RESPONSES_TOO_LARGE)
+        raise ResponseTooLargeError(self._max_size)
+
+    async def _read_all(self) -> bytes:
+        chunks: List[memoryview] = []
+        while True:
+            chunk = await self._read_chunk()
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    async def _receive_body(self) -> Body:
+        """Read the rest of the body on the event loop, enforcing the size limit. If it may be larger than the
+        spill threshold, chunks are collected in a :py:class:`_SpillBuffer`, and written to disk in the loop's
+        default executor."""
+        response_size = cast(ResponseSizeConfig, self._response_size)
+        content_length = self._delegate.content_length
+        if response_size.spill_threshold is None or (
+            content_length is not None
+            and content_length <= response_size.spill_threshold
+        ):
+            return await self._read_all()
+
+        buffer = _SpillBuffer(
+            response_size.spill_threshold, response_size.spill_directory
         )
-        return future.result(self._remaining_timeout)
+        try:
+            while True:
+                chunk = await self._read_chunk()
+                if not chunk:
+                    return buffer.getvalue()
+                if buffer.spills(len(chunk)):
+                    await self._loop.run_in_executor(None, buffer.write, chunk)
+                else:
+                    buffer.write(chunk)
+        finally:
+            buffer.close()
+
+    async def preload_body(self, response: "aiohttp.ClientResponse") -> None:
+        """Read the body of response on the event loop, so that it is available on any thread right away
+        afterwards, including on the loop thread. Errors are raised again when the body is accessed."""
+        self._delegate = response
+        try:
+            if self._response_size is None:
+                self._body = await response.read()
+            else:
+                self._body = await self._receive_body()
+        except Exception as e:
+            # the body can't be read on the loop thread later on
+            self._preload_error = e
+            raise
+
+    async def _readinto(self, buffer: Buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        position = 0
+        while position < len(view):
+            chunk = await self._read_chunk(len(view) - position)
+            if not chunk:
+                break
+            end = position + len(chunk)
+            view[position:end] = chunk
+            position = end
+        return position
+
+    def _consume_timeout(self, start: float, timeout: Optional[float]) -> None:
+        if timeout is not None:
+            self._remaining_timeout = max(0.0, timeout - (time.monotonic() - start))
+
+    def readinto(self, buffer: Buffer) -> int:
+        """Read the next part of the body into buffer, until buffer is full or the body ends, like
+        :py:meth:`io.RawIOBase.readinto`. This copies the data only once, instead of building a new
+        bytes object first like :py:attr:`raw_bytes` does.
+
+        :param buffer: a writable, preallocated buffer like a bytearray or memoryview
+        :return: the number of bytes written to buffer; 0 once the whole body has been read
+        """
+        return self._run_coroutine(self._readinto(buffer))
+
+    def download_to(self, target: DownloadTarget) -> int:
+        """Write the body to target in chunks, as they arrive. Unlike writing :py:attr:`raw_bytes`,
+        the body is never held in memory as a whole, and it isn't copied along the way.
+
+        Chunks are received on the event loop and written on the calling thread. The remaining
+        timeout of the request applies to the download as a whole.
+
+        :param target: the path of the file to write, an open file descriptor, or a binary file object
+        :return: the number of bytes written
+        """
+        start = time.monotonic()
+        timeout = self._remaining_timeout
+        size = 0
+        with open_download_target(target) as write:
+            while True:
+                chunk = self._run_coroutine(self._read_chunk())
+                if not chunk:
+                    return size
+                write(chunk)
+                size += len(chunk)
+                self._consume_timeout(start, timeout)
 
 
 class AsyncioHTTPResponseAdapter(AioHTTPResponseAdapter):
     """Wraps a aiohttp Response object to provide a bravado-like interface to the response innards.
     Methods are coroutines if they call coroutines themselves and need to be awaited."""
 
+    async def _wait_for(self, awaitable: Awaitable[T]) -> T:
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self._remaining_timeout)
+        except asyncio.TimeoutError:
+            # wait_for has cancelled reading the body; don't put the connection back into the pool
+            self._delegate.close()
+            metrics.increment(REQUESTS_CANCELLED_ON_TIMEOUT)
+            raise
+
+    async def _read_body(self) -> Body:  # type: ignore
+        if self._body is None:
+            self._body = await self._wait_for(self._receive_body())
+        return self._body
+
     @property
     async def text(self) -> str:  # type: ignore
-        return await asyncio.wait_for(
-            self._delegate.text(), timeout=self._remaining_timeout
-        )
+        if self._reads_whole_body():
+            return await self._wait_for(self._delegate.text())
+        return (await self.raw_bytes).decode(self._delegate.get_encoding())
 
     @property
     async def raw_bytes(self) -> bytes:  # type: ignore
-        return await asyncio.wait_for(
-            self._delegate.read(), timeout=self._remaining_timeout
-        )
+        if self._reads_whole_body():
+            return await self._wait_for(self._delegate.read())
+        body = await self._read_body()
+        return body if isinstance(body, bytes) else body[:]
+
+    content = raw_bytes  # type: ignore
+
+    @property
+    async def raw_buffer(self) -> memoryview:  # type: ignore
+        if self._reads_whole_body():
+            return memoryview(await self.raw_bytes)
+        return memoryview(await self._read_body())
 
     async def json(self, **_: Any) -> Dict[str, Any]:  # type: ignore
-        return await asyncio.wait_for(
-            self._delegate.json(), timeout=self._remaining_timeout
-        )
+        if self._json_decode_config is None:
+            if self._reads_whole_body():
+                return await self._wait_for(self._delegate.json())
+            return decode_json(await self.raw_bytes, self._delegate.charset)
+
+        body = await self.raw_bytes
+        if len(body) >= self._json_decode_config.offload_threshold:
+            metrics.increment(JSON_DECODE_OFFLOADED)
+            return await asyncio.wait_for(
+                self._loop.run_in_executor(
+                    self._json_decode_config.executor,
+                    decode_json,
+                    body,
+                    self._delegate.charset,
+                ),
+                timeout=self._remaining_timeout,
+            )
+
+        start = time.perf_counter()
+        result = decode_json(body, self._delegate.charset)
+        metrics.observe(JSON_DECODE_LOOP_BLOCKING, time.perf_counter() - start)
+        return result
+
+    async def readinto(self, buffer: Buffer) -> int:  # type: ignore
+        return await self._wait_for(self._readinto(buffer))
+
+    async def download_to(self, target: DownloadTarget) -> int:  # type: ignore
+        """Write the body to target in chunks, as they arrive. Writing happens in the default
+        executor, so that it doesn't block the event loop."""
+        start = time.monotonic()
+        timeout = self._remaining_timeout
+        size = 0
+        with open_download_target(target) as write:
+            while True:
+                chunk = await self._wait_for(self._read_chunk())
+                if not chunk:
+                    return size
+                await self._loop.run_in_executor(None, write, chunk)
+                size += len(chunk)
+                self._consume_timeout(start, timeout)
+
+
+class CallingThreadResponseAdapter(AioHTTPResponseAdapter):
+    """Wraps a aiohttp Response object for RunMode.CALLING_THREAD. The event loop belongs to the calling
+    thread and isn't running, so coroutines are run on it directly instead of being handed to another thread."""
+
+    def _run_coroutine(self, coroutine: Coroutine) -> Any:
+        try:
+            return self._loop.run_until_complete(
+                asyncio.wait_for(coroutine, timeout=self._remaining_timeout)
+            )
+        except asyncio.TimeoutError:
+            # wait_for has cancelled reading the body; don't put the connection back into the pool
+            self._delegate.close()
+            metrics.increment(REQUESTS_CANCELLED_ON_TIMEOUT)
+            raise
@@ -0,0 +1,85 @@
+"""Module for making sure responses give their connection back to the pool.
+
+aiohttp only releases a connection once the response body has been read completely, or when the
+response is released or closed explicitly. Responses whose body is never looked at (e.g. for
+operations without a response schema) would otherwise hold on to their connection until they're
+garbage collected.
+"""
+import asyncio
+import logging
+import traceback
+import weakref
+from typing import Any
+from typing import Awaitable
+from typing import TYPE_CHECKING
+from typing import Union
+
+from bravado_asyncio.metrics import metrics
+from bravado_asyncio.metrics import RESPONSES_LEAKED
+
+if TYPE_CHECKING:  # pragma: no cover
+    import aiohttp
+
+log = logging.getLogger(__name__)
+
+
+async def drain_small_body(
+    request: Awaitable["aiohttp.ClientResponse"], drain_threshold: int
+) -> "aiohttp.ClientResponse":
+    """Await request, then read the response body if it's at most drain_threshold bytes long. This
+    releases the connection as soon as possible; the body is kept for whoever wants it later."""
+    response = await request
+    content_length = response.content_length
+    if content_length is not None and content_length <= drain_threshold:
+        await response.read()
+    return response
+
+
+def release_response(
+    response: "aiohttp.ClientResponse", loop: asyncio.AbstractEventLoop
+) -> None:
+    """Release response on loop, from any thread. If its body hasn't been read completely, its connection
+    is closed rather than put back into the pool."""
+    if response.connection is None or loop.is_closed():
+        return
+
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+    if running_loop is loop or not loop.is_running():
+        # either on the loop's thread, or the loop belongs to the calling thread (RunMode.CALLING_THREAD)
+        response.release()
+    else:
+        loop.call_soon_threadsafe(response.release)
+
+
+def _check_released(
+    future: "Union[asyncio.Future[Any], Any]",
+    loop: asyncio.AbstractEventLoop,
+    stack: str,
+) -> None:
+    if not future.done() or future.cancelled() or future.exception() is not None:
+        return
+
+    import aiohttp
+
+    response = future.result()
+    if isinstance(response, aiohttp.ClientResponse) and response.connection is not None:
+        metrics.increment(RESPONSES_LEAKED)
+        log.warning(
+            "Response %r was garbage collected without being released, request made at:\n%s",
+            response,
+            stack,
+        )
+        release_response(response, loop)
+
+
+def track_response(
+    http_future: Any, future: Any, loop: asyncio.AbstractEventLoop
+) -> None:
+    """Log a warning if the response of future hasn't been released by the time http_future is garbage
+    collected. future is the concurrent or asyncio future of the request; http_future must not be
+    referenced by it."""
+    stack = "".join(traceback.format_stack()[:-1])
+    weakref.finalize(http_future, _check_released, future, loop, stack)
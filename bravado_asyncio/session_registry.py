@@ -0,0 +1,206 @@
+"""Module for sharing :py:class:`aiohttp.ClientSession` objects between AsyncioClient instances.
+
+There is one :py:class:`SessionRegistry` per event loop. It hands out one session per
+:py:class:`~bravado_asyncio.definitions.SessionConfig`, so clients with identical settings share
+a connection pool while clients with different needs are isolated from each other.
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Set
+from typing import TYPE_CHECKING
+
+from bravado_asyncio.definitions import SessionConfig
+
+if TYPE_CHECKING:  # pragma: no cover
+    import aiohttp
+
+log = logging.getLogger(__name__)
+
+# protects the creation of registries, so that each loop ends up with exactly one
+_registry_lock = threading.Lock()
+
+# SessionConfig fields that are passed on to aiohttp.TCPConnector
+CONNECTOR_FIELDS = (
+    "limit",
+    "limit_per_host",
+    "keepalive_timeout",
+    "force_close",
+    "enable_cleanup_closed",
+    "ttl_dns_cache",
+)
+
+# SessionConfig fields that are passed on to aiohttp.UnixConnector and InProcessConnector
+UNIX_CONNECTOR_FIELDS = ("limit", "limit_per_host", "keepalive_timeout", "force_close")
+
+
+def create_client_session(
+    loop: asyncio.AbstractEventLoop, config: SessionConfig
+) -> "aiohttp.ClientSession":
+    """Create a new ClientSession for the given loop, configured according to config. This is where
+    aiohttp is imported, so that importing bravado_asyncio and creating clients stays cheap."""
+    import aiohttp
+
+    session_kwargs: Dict[str, Any] = {"loop": loop}
+    fields = (
+        UNIX_CONNECTOR_FIELDS
+        if config.unix_socket_path or config.in_process_app is not None
+        else CONNECTOR_FIELDS
+    )
+    connector_kwargs = {
+        name: getattr(config, name)
+        for name in fields
+        if getattr(config, name) is not None
+    }
+    if config.in_process_app is not None:
+        from bravado_asyncio.in_process import InProcessConnector
+
+        session_kwargs["connector"] = InProcessConnector(
+            config.in_process_app, loop=loop, **connector_kwargs
+        )
+    elif config.unix_socket_path:
+        session_kwargs["connector"] = aiohttp.UnixConnector(
+            path=config.unix_socket_path, loop=loop, **connector_kwargs
+        )
+    elif connector_kwargs:
+        session_kwargs["connector"] = aiohttp.TCPConnector(
+            loop=loop, **connector_kwargs
+        )
+    if config.timeout is not None:
+        session_kwargs["timeout"] = config.timeout
+    if config.trace_requests:
+        from bravado_asyncio.tracing import create_trace_config
+
+        session_kwargs["trace_configs"] = [create_trace_config()]
+
+    return aiohttp.ClientSession(**session_kwargs)
+
+
+class SessionRegistry:
+    """Holds the client sessions of one event loop, keyed by session configuration.
+
+    Sessions handed out by :py:meth:`acquire` are reference counted; the session is closed once
+    the last reference has been released. Sessions handed out by :py:meth:`get` are pinned and
+    stay open until :py:meth:`close_all` is called.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self._sessions: Dict[SessionConfig, "aiohttp.ClientSession"] = {}
+        self._refcounts: Dict[SessionConfig, int] = {}
+        self._pinned: Set[SessionConfig] = set()
+        self._close_callbacks: List[
+            "weakref.WeakMethod[Callable[[asyncio.AbstractEventLoop], None]]"
+        ] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, config: SessionConfig) -> "aiohttp.ClientSession":
+        try:
+            return self._sessions[config]
+        except KeyError:
+            session = create_client_session(self.loop, config)
+            self._sessions[config] = session
+            return session
+
+    def get(self, config: SessionConfig) -> "aiohttp.ClientSession":
+        """Return the session for config, creating it if necessary. The session is pinned,
+        i.e. it will not be closed when its reference count drops to zero."""
+        with self._lock:
+            self._pinned.add(config)
+            return self._get_or_create(config)
+
+    def acquire(self, config: SessionConfig) -> "aiohttp.ClientSession":
+        """Return the session for config, creating it if necessary, and increase its reference count.
+        Every call needs to be matched by a call to :py:meth:`release`."""
+        with self._lock:
+            self._refcounts[config] = self._refcounts.get(config, 0) + 1
+            return self._get_or_create(config)
+
+    def release(self, config: SessionConfig) -> None:
+        """Decrease the reference count of the session for config. If nobody references the
+        session anymore it is removed from the registry and closed."""
+        with self._lock:
+            refcount = self._refcounts.get(config, 0) - 1
+            if refcount > 0:
+                self._refcounts[config] = refcount
+                return
+
+            self._refcounts.pop(config, None)
+            if config in self._pinned or config not in self._sessions:
+                return
+            session = self._sessions.pop(config)
+
+        self._close_session(session)
+
+    def refcount(self, config: SessionConfig) -> int:
+        return self._refcounts.get(config, 0)
+
+    def add_close_callback(
+        self, callback: Callable[[asyncio.AbstractEventLoop], None]
+    ) -> None:
+        """Call callback with the loop of this registry once :py:meth:`close_all` has closed its sessions,
+        e.g. to forget about them. callback must be a bound method; it's referenced weakly, so that the
+        registry doesn't keep its object alive."""
+        with self._lock:
+            self._close_callbacks = [
+                ref for ref in self._close_callbacks if ref() is not None
+            ]
+            self._close_callbacks.append(weakref.WeakMethod(callback))
+
+    def close_all(self) -> None:
+        """Close all sessions of this registry, regardless of their reference count."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._refcounts.clear()
+            self._pinned.clear()
+            close_callbacks = self._close_callbacks
+            self._close_callbacks = []
+
+        for session in sessions:
+            self._close_session(session)
+        for ref in close_callbacks:
+            callback = ref()
+            if callback is None:
+                continue
+            try:
+                callback(self.loop)
+            except Exception:
+                log.exception("Error in close callback %r", callback)
+
+    def _close_session(self, session: "aiohttp.ClientSession") -> None:
+        if self.loop.is_closed():
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self.loop:
+            self.loop.create_task(session.close())
+        elif self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(session.close(), self.loop)
+        else:
+            self.loop.run_until_complete(session.close())
+
+
+def get_session_registry(loop: asyncio.AbstractEventLoop) -> SessionRegistry:
+    """Get the session registry of the given loop, creating one if it doesn't exist yet.
+
+    :param loop: an active (i.e. not closed) asyncio event loop
+    """
+    try:
+        return loop._bravado_asyncio_session_registry  # type: ignore
+    except AttributeError:
+        with _registry_lock:
+            registry = getattr(loop, "_bravado_asyncio_session_registry", None)
+            if registry is None:
+                registry = SessionRegistry(loop)
+                loop._bravado_asyncio_session_registry = registry  # type: ignore
+            return registry
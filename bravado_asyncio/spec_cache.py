@@ -0,0 +1,354 @@
+"""Module for keeping fetched Swagger specs on disk.
+
+:py:meth:`bravado.client.SwaggerClient.from_url` downloads and parses the spec every time a process starts.
+With a :py:class:`~bravado_asyncio.definitions.SpecCacheConfig`, AsyncioClient stores the bodies of spec
+responses on disk, keyed by URL. Spec responses are responses to GET requests without an operation, that
+look like JSON or YAML. Later requests for the same URL are answered from disk right away, without
+waiting for the network. The cached copy is then revalidated with the server in the background, using
+the ETag and Last-Modified headers of the response. A changed spec is picked up by the next request for it.
+
+JSON specs are also stored in parsed form, in :py:mod:`marshal` format. This loads faster than JSON and,
+unlike pickle, can't run code while loading.
+"""
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import logging
+import marshal
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Any
+from typing import Awaitable
+from typing import Dict
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import TYPE_CHECKING
+
+from bravado.config import RequestConfig
+from bravado.http_future import HttpFuture
+from bravado_core.response import IncomingResponse
+
+from bravado_asyncio.definitions import SpecCacheConfig
+from bravado_asyncio.future_adapter import FutureAdapter
+from bravado_asyncio.metrics import metrics
+from bravado_asyncio.metrics import SPEC_CACHE_HITS
+from bravado_asyncio.metrics import SPEC_CACHE_MISSES
+from bravado_asyncio.metrics import SPEC_CACHE_REVALIDATIONS
+from bravado_asyncio.metrics import SPEC_CACHE_UPDATES
+from bravado_asyncio.response_adapter import decode_json
+from bravado_asyncio.response_adapter import read_body_up_to
+
+if TYPE_CHECKING:  # pragma: no cover
+    import aiohttp
+
+log = logging.getLogger(__name__)
+
+# response headers kept with a cached spec
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+SPEC_EXTENSIONS = (".json", ".yaml", ".yml")
+
+_write_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_write_executor_lock = threading.Lock()
+
+
+def _get_write_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Cache entries are written in a thread of their own, so that neither the event loop nor the caller
+    waits for the disk. Unlike daemon threads, the executor finishes pending writes when the process exits."""
+    global _write_executor
+    with _write_executor_lock:
+        if _write_executor is None:
+            _write_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="bravado-asyncio-spec-cache"
+            )
+        return _write_executor
+
+
+class CachedSpec(NamedTuple):
+    url: str
+    headers: Dict[str, str]
+    body: bytes
+    # when the server last confirmed the body, as returned by time.time()
+    validated_at: float
+
+
+class CachedSpecResponse(IncomingResponse):
+    """IncomingResponse for a spec served from memory or from the cache.
+
+    :param cache: the spec cache spec comes from, if any; it may have the body in parsed form
+    """
+
+    status_code = 200
+    reason = "OK"
+
+    def __init__(self, spec: CachedSpec, cache: Optional["SpecCache"] = None) -> None:
+        self._spec = spec
+        self._cache = cache
+        import multidict
+
+        self.headers = multidict.CIMultiDictProxy(multidict.CIMultiDict(spec.headers))
+
+    @property
+    def raw_bytes(self) -> bytes:
+        return self._spec.body
+
+    # bravado-core reads referenced spec files from this attribute
+    content = raw_bytes
+
+    @property
+    def text(self) -> str:
+        return self._spec.body.decode(self._charset or "utf-8")
+
+    @property
+    def _charset(self) -> Optional[str]:
+        content_type = self.headers.get("Content-Type")
+        if content_type is None:
+            return None
+        from aiohttp.helpers import parse_mimetype
+
+        return parse_mimetype(content_type).parameters.get("charset")
+
+    def json(self, **_: Any) -> Any:
+        if self._cache is None:
+            return decode_json(self._spec.body, self._charset)
+        return self._cache.load_json(self._spec, self._charset)
+
+    def release(self) -> None:
+        pass
+
+
+def spec_future(
+    spec: CachedSpec,
+    cache: Optional["SpecCache"] = None,
+    request_config: Optional[RequestConfig] = None,
+) -> HttpFuture:
+    """Return a completed HttpFuture whose response is spec."""
+    future: concurrent.futures.Future = concurrent.futures.Future()
+    future.set_result(CachedSpecResponse(spec, cache))
+    return HttpFuture(
+        FutureAdapter(future),
+        lambda response: response.response,
+        request_config=request_config,
+    )
+
+
+def _is_spec(url: str, headers: Mapping[str, str]) -> bool:
+    content_type = headers.get("Content-Type", "").lower()
+    return (
+        "json" in content_type
+        or "yaml" in content_type
+        or url.split("?", 1)[0].lower().endswith(SPEC_EXTENSIONS)
+    )
+
+
+class SpecCache:
+    """Stores fetched Swagger specs in the directory of config, one file per URL. Files are replaced
+    atomically, so several processes can share a directory.
+
+    :param config: where to store specs, and when to revalidate them
+    """
+
+    def __init__(self, config: SpecCacheConfig) -> None:
+        self.config = config
+        # URLs currently being revalidated by this process
+        self._revalidating: Set[str] = set()
+        self._revalidating_lock = threading.Lock()
+
+    def _path(self, url: str, suffix: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.config.directory, key + suffix)
+
+    def _write_file(self, path: str, *parts: bytes) -> None:
+        os.makedirs(self.config.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.config.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for part in parts:
+                    f.write(part)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def get(self, url: str) -> Optional[CachedSpec]:
+        """Return the cached spec for url, or None if there is none."""
+        try:
+            with open(self._path(url, ".spec"), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            log.warning("Error reading the cached spec for %s", url, exc_info=True)
+            return None
+
+        try:
+            header, body = data.split(b"\n", 1)
+            metadata = json.loads(header)
+            spec = CachedSpec(
+                url=metadata["url"],
+                headers=metadata["headers"],
+                body=body,
+                validated_at=metadata["validated_at"],
+            )
+        except (ValueError, KeyError, TypeError):
+            log.warning("Ignoring corrupt spec cache entry for %s", url)
+            return None
+        return spec if spec.url == url else None
+
+    def put(self, url: str, headers: Mapping[str, str], body: bytes) -> None:
+        """Store body as the spec for url, validated just now."""
+        metadata = {
+            "url": url,
+            "headers": {
+                name: headers[name] for name in CACHED_HEADERS if name in headers
+            },
+            "validated_at": time.time(),
+        }
+        self._write_file(
+            self._path(url, ".spec"), json.dumps(metadata).encode("utf-8"), b"\n", body
+        )
+
+    def remove(self, url: str) -> None:
+        """Remove the cached spec for url, if there is one."""
+        try:
+            os.unlink(self._path(url, ".spec"))
+        except FileNotFoundError:
+            pass
+
+    def _put_in_background(
+        self, url: str, headers: Mapping[str, str], body: Optional[bytes]
+    ) -> None:
+        """Store body as the spec for url, or remove the cached spec if body is None."""
+
+        def put() -> None:
+            try:
+                if body is None:
+                    self.remove(url)
+                else:
+                    self.put(url, headers, body)
+            except Exception:
+                log.warning("Error caching the spec for %s", url, exc_info=True)
+
+        _get_write_executor().submit(put)
+
+    def is_cacheable(self, url: str, headers: Mapping[str, str], size: int) -> bool:
+        return size <= self.config.max_size and _is_spec(url, headers)
+
+    def needs_revalidation(self, spec: CachedSpec) -> bool:
+        return (
+            self.config.revalidate_after is not None
+            and time.time() - spec.validated_at >= self.config.revalidate_after
+        )
+
+    def load_json(self, spec: CachedSpec, encoding: Optional[str] = None) -> Any:
+        """Return the decoded JSON body of spec, using the stored parsed form if it is up to date."""
+        digest = hashlib.sha256(spec.body).digest()
+        # the marshal format depends on the Python version
+        path = self._path(spec.url, ".{}.marshal".format(sys.implementation.cache_tag))
+        try:
+            with open(path, "rb") as f:
+                stored_digest, result = marshal.load(f)
+            if stored_digest == digest:
+                return result
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        result = decode_json(spec.body, encoding)
+        try:
+            self._write_file(path, marshal.dumps((digest, result)))
+        except (OSError, ValueError):
+            log.debug("Error storing the parsed spec for %s", spec.url, exc_info=True)
+        return result
+
+    def cached_future(
+        self, spec: CachedSpec, request_config: Optional[RequestConfig] = None
+    ) -> HttpFuture:
+        """Return a completed HttpFuture whose response is spec."""
+        metrics.increment(SPEC_CACHE_HITS)
+        return spec_future(spec, self, request_config)
+
+    async def fetch(
+        self, coroutine: Awaitable["aiohttp.ClientResponse"], url: str
+    ) -> "aiohttp.ClientResponse":
+        """Wrap the request coroutine for a spec that isn't cached yet, storing the response if it is a spec."""
+        metrics.increment(SPEC_CACHE_MISSES)
+        response = await coroutine
+        if response.status == 200 and self.is_cacheable(
+            url, response.headers, response.content_length or 0
+        ):
+            body = await read_body_up_to(response, self.config.max_size)
+            if body is not None:
+                self._put_in_background(url, response.headers, body)
+        return response
+
+    def revalidate_in_background(
+        self,
+        spec: CachedSpec,
+        client_session: "aiohttp.ClientSession",
+        loop: asyncio.AbstractEventLoop,
+        headers: Mapping[str, str],
+    ) -> "Optional[concurrent.futures.Future[None]]":
+        """Ask the server whether spec is still up to date, on loop, unless that is happening already.
+
+        :param headers: the headers of the request for the spec, e.g. for authentication
+        :return: the future of the revalidation, or None if spec is being revalidated already
+        """
+        with self._revalidating_lock:
+            if spec.url in self._revalidating:
+                return None
+            self._revalidating.add(spec.url)
+        return asyncio.run_coroutine_threadsafe(
+            self._revalidate(spec, client_session, headers), loop
+        )
+
+    async def _revalidate(
+        self,
+        spec: CachedSpec,
+        client_session: "aiohttp.ClientSession",
+        headers: Mapping[str, str],
+    ) -> None:
+        conditional_headers = dict(headers)
+        if "ETag" in spec.headers:
+            conditional_headers["If-None-Match"] = spec.headers["ETag"]
+        if "Last-Modified" in spec.headers:
+            conditional_headers["If-Modified-Since"] = spec.headers["Last-Modified"]
+
+        try:
+            async with client_session.get(
+                spec.url, headers=conditional_headers
+            ) as response:
+                metrics.increment(SPEC_CACHE_REVALIDATIONS)
+                if response.status == 304:
+                    # the server may send new validators along
+                    new_headers = dict(spec.headers)
+                    new_headers.update(
+                        (name, response.headers[name])
+                        for name in CACHED_HEADERS
+                        if name in response.headers
+                    )
+                    self._put_in_background(spec.url, new_headers, spec.body)
+                elif response.status == 200:
+                    body = await response.read()
+                    metrics.increment(SPEC_CACHE_UPDATES)
+                    cacheable = self.is_cacheable(spec.url, response.headers, len(body))
+                    self._put_in_background(
+                        spec.url, response.headers, body if cacheable else None
+                    )
+                else:
+                    log.warning(
+                        "Unexpected status %d while revalidating the cached spec for %s",
+                        response.status,
+                        spec.url,
+                    )
+        except Exception:
+            log.warning(
+                "Error revalidating the cached spec for %s", spec.url, exc_info=True
+            )
+        finally:
+            with self._revalidating_lock:
+                self._revalidating.discard(spec.url)
@@ -0,0 +1,104 @@
+"""Module for fetching Swagger specs and the documents they reference concurrently.
+
+bravado and bravado-core load a spec and then every remote ``$ref`` document one after the other, so a spec
+split into many files takes one round trip per file. :py:func:`prefetch_specs` instead fetches all documents
+of one nesting level at the same time. It finds the references of a document with a regular expression
+rather than by parsing it: bravado parses every document again anyway. Missing a reference only means that
+bravado fetches it on its own later on, and fetching a document that turns out not to be needed does no harm.
+"""
+import re
+import time
+from typing import cast
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Set
+from urllib.parse import urldefrag
+from urllib.parse import urljoin
+
+from bravado.http_client import HttpClient
+from bravado.http_future import HttpFuture
+from bravado_core.response import IncomingResponse
+
+from bravado_asyncio.spec_cache import CachedSpec
+
+# the value of $ref keys, in JSON as well as YAML documents (quoted or not)
+_ref_pattern = re.compile(
+    rb"""["']?\$ref["']?\s*:\s*(?:"([^"]*)"|'([^']*)'|([^\s,}\]#][^\s,}\]]*))"""
+)
+
+# stop following references after this many documents, in case of a runaway spec
+MAX_DOCUMENTS = 1000
+
+
+def find_references(url: str, body: bytes) -> Set[str]:
+    """Return the URLs of the remote documents referenced by the document at url. Fragments are
+    removed, and only http and https URLs are returned."""
+    references = set()
+    for match in _ref_pattern.finditer(body):
+        value = next(group for group in match.groups() if group is not None)
+        reference = value.decode("utf-8", "replace")
+        if not reference or reference.startswith("#"):
+            continue
+        reference_url = urldefrag(urljoin(url, reference))[0]
+        if reference_url.startswith(("http://", "https://")):
+            references.add(reference_url)
+    return references
+
+
+def prefetch_specs(
+    client: HttpClient,
+    urls: Iterable[str],
+    headers: Optional[Mapping[str, str]] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, CachedSpec]:
+    """Fetch the documents at urls, and all documents they reference, through client. All documents
+    of one nesting level are requested at the same time.
+
+    :param headers: headers to send with every request, e.g. for authentication
+    :param timeout: number of seconds after which to stop waiting for documents
+    :return: the documents that could be fetched, by URL. Documents that failed are left out;
+        bravado will report the error when it requests them itself.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    documents: Dict[str, CachedSpec] = {}
+    requested: Set[str] = set()
+    pending = {urldefrag(url)[0] for url in urls}
+
+    while pending and len(requested) < MAX_DOCUMENTS:
+        limit = MAX_DOCUMENTS - len(requested)
+        level = sorted(pending)[:limit]
+        requested.update(level)
+        futures: List[HttpFuture] = [
+            client.request(
+                {"method": "GET", "url": url, "headers": dict(headers or {})}
+            )
+            for url in level
+        ]
+
+        pending = set()
+        for url, future in zip(level, futures):
+            remaining_timeout = (
+                max(0.0, deadline - time.monotonic()) if deadline is not None else None
+            )
+            try:
+                # requests without an operation return the response, or raise for errors
+                response = cast(
+                    IncomingResponse, future.result(timeout=remaining_timeout)
+                )
+                body = response.raw_bytes
+            except Exception:
+                future.cancel()
+                continue
+
+            documents[url] = CachedSpec(
+                url=url,
+                headers=dict(response.headers),
+                body=body,
+                validated_at=time.time(),
+            )
+            pending.update(find_references(url, body) - requested)
+
+    return documents
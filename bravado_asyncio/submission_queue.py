@@ -0,0 +1,115 @@
+"""Module for handing coroutines from other threads to an event loop in batches.
+
+:py:func:`asyncio.run_coroutine_threadsafe` wakes up the event loop once per coroutine. A
+:py:class:`SubmissionQueue` collects coroutines submitted while a wake-up is already pending and
+starts all of them with a single wake-up, which makes bursts of requests considerably cheaper.
+"""
+import asyncio
+import concurrent.futures
+import functools
+import threading
+from typing import Coroutine
+from typing import Iterable
+from typing import List
+from typing import Tuple
+
+
+_queue_lock = threading.Lock()
+
+Submission = Tuple[Coroutine, concurrent.futures.Future]
+
+
+def _copy_task_state(task: asyncio.Future, future: concurrent.futures.Future) -> None:
+    """Copy the outcome of task to future, like asyncio.run_coroutine_threadsafe does."""
+    if task.cancelled():
+        future.cancel()
+    if not future.set_running_or_notify_cancel():
+        return
+    exception = task.exception()
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(task.result())
+
+
+class SubmissionQueue:
+    """Starts coroutines submitted from other threads on loop, waking the loop up at most once
+    for all the coroutines that are submitted until it gets around to starting them."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self._lock = threading.Lock()
+        self._pending: List[Submission] = []
+        self._wakeup_scheduled = False
+
+    def submit(self, coroutine: Coroutine) -> concurrent.futures.Future:
+        """Schedule coroutine to run on the loop. Drop-in replacement for
+        :py:func:`asyncio.run_coroutine_threadsafe`."""
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        self.enqueue([(coroutine, future)])
+        return future
+
+    def submit_many(
+        self, coroutines: Iterable[Coroutine]
+    ) -> List[concurrent.futures.Future]:
+        """Schedule all coroutines to run on the loop, with a single wake-up."""
+        submissions: List[Submission] = [
+            (coroutine, concurrent.futures.Future()) for coroutine in coroutines
+        ]
+        self.enqueue(submissions)
+        return [future for _, future in submissions]
+
+    def enqueue(self, submissions: List[Submission]) -> None:
+        """Schedule coroutines to run on the loop; each one's outcome will be set on the
+        future it is paired with."""
+        if not submissions:
+            return
+
+        with self._lock:
+            self._pending.extend(submissions)
+            wakeup = not self._wakeup_scheduled
+            self._wakeup_scheduled = True
+
+        if wakeup:
+            self.loop.call_soon_threadsafe(self._start_pending)
+
+    def _start_pending(self) -> None:
+        with self._lock:
+            submissions = self._pending
+            self._pending = []
+            self._wakeup_scheduled = False
+
+        for coroutine, future in submissions:
+            if future.cancelled():
+                coroutine.close()
+                continue
+
+            task = self.loop.create_task(coroutine)
+            task.add_done_callback(functools.partial(_copy_task_state, future=future))
+            future.add_done_callback(functools.partial(self._cancel_task, task=task))
+
+    def _cancel_task(
+        self, future: concurrent.futures.Future, task: asyncio.Future
+    ) -> None:
+        if future.cancelled() and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(task.cancel)
+
+
+def get_submission_queue(loop: asyncio.AbstractEventLoop) -> SubmissionQueue:
+    """Get the submission queue of the given loop, creating one if it doesn't exist yet."""
+    try:
+        return loop._bravado_asyncio_submission_queue  # type: ignore
+    except AttributeError:
+        with _queue_lock:
+            queue = getattr(loop, "_bravado_asyncio_submission_queue", None)
+            if queue is None:
+                queue = SubmissionQueue(loop)
+                loop._bravado_asyncio_submission_queue = queue  # type: ignore
+            return queue
+
+
+def submit_coroutine(
+    coroutine: Coroutine, loop: asyncio.AbstractEventLoop
+) -> concurrent.futures.Future:
+    """Batching replacement for :py:func:`asyncio.run_coroutine_threadsafe`."""
+    return get_submission_queue(loop).submit(coroutine)
@@ -1,12 +1,19 @@
-"""Module for creating a separate thread with an asyncio event loop running inside it."""
+"""Module for creating a separate thread with an asyncio event loop running inside it, or an
+event loop per calling thread."""
 import asyncio
+import logging
 import threading
+import weakref
 from typing import Optional
 
+log = logging.getLogger(__name__)
 
 # module variable holding a reference to the event loop
 event_loop: Optional[asyncio.AbstractEventLoop] = None
 
+# holds the event loop of each thread that uses RunMode.CALLING_THREAD
+_calling_thread_state = threading.local()
+
 
 def run_event_loop(loop: asyncio.AbstractEventLoop) -> None:
     asyncio.set_event_loop(loop)
@@ -22,3 +29,35 @@ def get_thread_loop() -> asyncio.AbstractEventLoop:
         )
         thread.start()
     return event_loop
+
+
+class _LoopHolder:
+    """Thread-local reference to a loop; when the thread exits, the holder is garbage collected."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+
+
+def close_calling_thread_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Close the client sessions of loop, then loop itself."""
+    if loop.is_closed() or loop.is_running():
+        return
+    from bravado_asyncio.session_registry import get_session_registry
+
+    try:
+        get_session_registry(loop).close_all()
+        loop.close()
+    except Exception:
+        log.exception("Error closing event loop %r", loop)
+
+
+def get_calling_thread_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop of the calling thread, creating one on first use. The loop isn't running
+    in the background; it runs while the thread waits for a result. It is closed, together with its
+    client sessions, when the thread exits."""
+    holder: Optional[_LoopHolder] = getattr(_calling_thread_state, "holder", None)
+    if holder is None or holder.loop.is_closed():
+        holder = _LoopHolder(asyncio.new_event_loop())
+        weakref.finalize(holder, close_calling_thread_loop, holder.loop)
+        _calling_thread_state.holder = holder
+    return holder.loop
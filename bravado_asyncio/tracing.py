@@ -0,0 +1,335 @@
+"""Module for reporting a span per request, and propagating trace context to the services requests are sent to.
+
+With a :py:class:`~bravado_asyncio.definitions.TracingConfig`, AsyncioClient creates a :py:class:`Span` for every
+request it sends and hands it to a :py:class:`SpanSink` when the request has completed. Spans carry the operation
+id, the URL template of the operation, the status code or error, how many times the request was retried or
+redirected, and how long its phases took. Sinks adapt spans to whatever tracing library is in use; this module
+doesn't depend on any.
+
+The span of a request is a child of the span context that is current in the thread making the request, see
+:py:func:`use_span_context`. The parent is looked up when the request is made, not when it is sent: in THREAD mode,
+requests are sent on the event loop thread, which doesn't share context variables with the calling thread. While
+the request runs on the loop, its own span context is current. Unless disabled, requests carry their span context
+in a W3C ``traceparent`` header (https://www.w3.org/TR/trace-context/), replacing any given by the caller.
+"""
+import logging
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+from typing import Coroutine
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import TYPE_CHECKING
+
+from bravado_core.operation import Operation
+
+from bravado_asyncio.definitions import TracingConfig
+
+if TYPE_CHECKING:  # pragma: no cover
+    import aiohttp
+
+log = logging.getLogger(__name__)
+
+_TRACEPARENT_RE = re.compile(
+    r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?$"
+)
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+
+class SpanContext(NamedTuple):
+    """Identifies a span across process boundaries: the ids are lower-case hex strings of 32 and 16 characters."""
+
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+    # vendor-specific trace state, passed on unchanged
+    tracestate: Optional[str] = None
+
+    def to_traceparent(self) -> str:
+        return "00-{}-{}-{}".format(
+            self.trace_id, self.span_id, "01" if self.sampled else "00"
+        )
+
+
+def parse_traceparent(
+    traceparent: str, tracestate: Optional[str] = None
+) -> Optional[SpanContext]:
+    """Return the span context of a ``traceparent`` header, or None if the header isn't valid.
+
+    :param traceparent: value of the ``traceparent`` header, e.g. of a request received by a service
+    :param tracestate: value of the ``tracestate`` header, if any
+    """
+    match = _TRACEPARENT_RE.match(traceparent.strip())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags, rest = match.groups()
+    # later versions may append fields, version 00 doesn't have any
+    if version == "ff" or (version == "00" and rest is not None):
+        return None
+    if trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1), tracestate)
+
+
+current_span_context: ContextVar[Optional[SpanContext]] = ContextVar(
+    "bravado_asyncio_span_context", default=None
+)
+
+
+@contextmanager
+def use_span_context(span_context: Optional[SpanContext]) -> Iterator[None]:
+    """Make span_context the parent of the requests made in this block (on this thread, or in this task)."""
+    token = current_span_context.set(span_context)
+    try:
+        yield
+    finally:
+        current_span_context.reset(token)
+
+
+class Span:
+    """One request sent by an AsyncioClient.
+
+    Timestamps are from :py:func:`time.perf_counter`, and None for phases the request didn't reach, or if the
+    session didn't report them (see ``TracingConfig.request_phases``). start_time is the wall-clock time the
+    request was made at, for sinks that need an absolute time.
+    """
+
+    def __init__(
+        self,
+        context: SpanContext,
+        parent: Optional[SpanContext],
+        method: str,
+        url: str,
+        operation: Optional[Operation],
+    ) -> None:
+        self.context = context
+        self.parent = parent
+        self.method = method
+        self.url = url
+        self.operation_id: Optional[str] = None
+        # path of the operation with its placeholders, e.g. /pet/{petId}
+        self.url_template: Optional[str] = None
+        if operation is not None:
+            self.operation_id = operation.operation_id
+            self.url_template = operation.path_name
+        self.status_code: Optional[int] = None
+        self.error: Optional[BaseException] = None
+        self.retries = 0
+        self.redirects = 0
+
+        self.start_time = time.time()
+        # when the request was made on the calling thread, and when it started running on the event loop
+        self.created = time.perf_counter()
+        self.started: Optional[float] = None
+        # when the request headers were last sent, and when the final response's headers had arrived
+        self.headers_sent: Optional[float] = None
+        self.headers_received: Optional[float] = None
+        self.ended: Optional[float] = None
+        # seconds spent waiting for a connection from the pool, and connecting, over all attempts
+        self.pool_wait = 0.0
+        self.connect = 0.0
+        self._headers_sent_count = 0
+        self._pool_wait_start = 0.0
+        self._connect_start = 0.0
+
+    @property
+    def name(self) -> str:
+        return self.operation_id or "HTTP {}".format(self.method)
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.ended is None:
+            return None
+        return self.ended - self.created
+
+    def phases(self) -> Dict[str, float]:
+        """Return the seconds spent in the phases of the request that were recorded:
+
+        - ``queued``: from making the request until it ran on the event loop
+        - ``pool_wait``: waiting for a free connection, if the pool was exhausted
+        - ``connect``: opening connections
+        - ``wait``: from sending the request headers until the response headers had arrived
+        - ``body``: reading the response body, if it was read before the request completed (see
+          ``ResponseReleaseConfig.drain_threshold``)
+        """
+        phases: Dict[str, float] = {}
+        if self.started is not None:
+            phases["queued"] = self.started - self.created
+        if self.pool_wait:
+            phases["pool_wait"] = self.pool_wait
+        if self.connect:
+            phases["connect"] = self.connect
+        if self.headers_sent is not None and self.headers_received is not None:
+            phases["wait"] = self.headers_received - self.headers_sent
+        if self.headers_received is not None and self.ended is not None:
+            phases["body"] = self.ended - self.headers_received
+        return phases
+
+    def __repr__(self) -> str:
+        return "<Span {} {} {}>".format(
+            self.name, self.context.span_id, self.status_code or self.error
+        )
+
+
+class SpanSink:
+    """Receives the spans of requests. Subclass it to hand spans to a tracing library.
+
+    on_start is called on the thread making the request, on_end on the event loop thread once the request
+    has completed. Neither should block; errors they raise are logged and otherwise ignored.
+    """
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        pass
+
+
+class InMemorySpanSink(SpanSink):
+    """Keeps completed spans in a list, e.g. for tests."""
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+
+    def on_end(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+def _new_id(bits: int) -> str:
+    # all zeros is not a valid id
+    return "{:0{}x}".format(random.getrandbits(bits) or 1, bits // 4)
+
+
+class Tracer:
+    """Creates the spans of an AsyncioClient's requests and reports them to the sink of config."""
+
+    def __init__(self, config: TracingConfig) -> None:
+        self.sink = config.sink
+        self.propagate = config.propagate
+
+    def start_span(self, method: str, url: str, operation: Optional[Operation]) -> Span:
+        parent = current_span_context.get()
+        if parent is None:
+            context = SpanContext(_new_id(128), _new_id(64))
+        else:
+            context = parent._replace(span_id=_new_id(64))
+        span = Span(context, parent, method, url, operation)
+        try:
+            self.sink.on_start(span)
+        except Exception:
+            log.exception("Error in span sink %r", self.sink)
+        return span
+
+    def inject(self, span: Span, headers: Mapping[str, str]) -> Mapping[str, str]:
+        """Return headers with the trace context headers of span."""
+        if not self.propagate:
+            return headers
+        # get_headers() returns shared, read-only headers for requests without any
+        headers = dict(headers)
+        headers["traceparent"] = span.context.to_traceparent()
+        if span.context.tracestate:
+            headers["tracestate"] = span.context.tracestate
+        return headers
+
+    async def trace(
+        self, request: Coroutine[Any, Any, "aiohttp.ClientResponse"], span: Span
+    ) -> "aiohttp.ClientResponse":
+        span.started = time.perf_counter()
+        token = current_span_context.set(span.context)
+        try:
+            response = await request
+        except BaseException as e:
+            span.error = e
+            raise
+        else:
+            span.status_code = response.status
+            return response
+        finally:
+            span.ended = time.perf_counter()
+            current_span_context.reset(token)
+            try:
+                self.sink.on_end(span)
+            except Exception:
+                log.exception("Error in span sink %r", self.sink)
+
+
+# callbacks of the aiohttp.TraceConfig; the span is the trace_request_ctx of the request
+
+
+async def _on_connection_queued_start(
+    session: "aiohttp.ClientSession", context: Any, params: Any
+) -> None:
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx._pool_wait_start = time.perf_counter()
+
+
+async def _on_connection_queued_end(
+    session: "aiohttp.ClientSession", context: Any, params: Any
+) -> None:
+    span = context.trace_request_ctx
+    if span is not None:
+        span.pool_wait += time.perf_counter() - span._pool_wait_start
+
+
+async def _on_connection_create_start(
+    session: "aiohttp.ClientSession", context: Any, params: Any
+) -> None:
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx._connect_start = time.perf_counter()
+
+
+async def _on_connection_create_end(
+    session: "aiohttp.ClientSession", context: Any, params: Any
+) -> None:
+    span = context.trace_request_ctx
+    if span is not None:
+        span.connect += time.perf_counter() - span._connect_start
+
+
+async def _on_request_headers_sent(
+    session: "aiohttp.ClientSession", context: Any, params: Any
+) -> None:
+    span = context.trace_request_ctx
+    if span is not None:
+        span.headers_sent = time.perf_counter()
+        span._headers_sent_count += 1
+        # every attempt sends headers; redirects are counted separately
+        span.retries = max(0, span._headers_sent_count - 1 - span.redirects)
+
+
+async def _on_request_redirect(
+    session: "aiohttp.ClientSession", context: Any, params: Any
+) -> None:
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx.redirects += 1
+
+
+async def _on_request_end(
+    session: "aiohttp.ClientSession", context: Any, params: Any
+) -> None:
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx.headers_received = time.perf_counter()
+
+
+def create_trace_config() -> "aiohttp.TraceConfig":
+    """Return a TraceConfig recording the phases of requests in their spans, for sessions with
+    ``SessionConfig.trace_requests`` set."""
+    import aiohttp
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_queued_start.append(_on_connection_queued_start)
+    trace_config.on_connection_queued_end.append(_on_connection_queued_end)
+    trace_config.on_connection_create_start.append(_on_connection_create_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_request_headers_sent.append(_on_request_headers_sent)
+    trace_config.on_request_redirect.append(_on_request_redirect)
+    trace_config.on_request_end.append(_on_request_end)
+    return trace_config
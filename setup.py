@@ -36,5 +36,7 @@ setup(
         # as recommended by aiohttp, see http://aiohttp.readthedocs.io/en/stable/#library-installation
         "aiohttp_extras": ["aiodns", "cchardet"],
         "aiobravado": ["aiobravado"],
+        # brotli and zstd for request body compression and response decoding
+        "compression": ["Brotli", "backports.zstd; python_version<'3.14'"],
     },
 )
@@ -0,0 +1,52 @@
+"""Helpers for timing code in the benchmarks found in the benchmarks directory."""
+import statistics
+import time
+from typing import Callable
+from typing import List
+from typing import NamedTuple
+
+
+class BenchmarkResult(NamedTuple):
+    name: str
+    timings: List[float]  # seconds per iteration
+
+    @property
+    def mean(self) -> float:
+        return statistics.mean(self.timings)
+
+    def percentile(self, percent: float) -> float:
+        ordered = sorted(self.timings)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+    def __str__(self) -> str:
+        return "{name:<45} mean {mean:9.1f}us  p50 {p50:9.1f}us  p99 {p99:9.1f}us  ({runs} runs)".format(
+            name=self.name,
+            mean=self.mean * 1e6,
+            p50=self.percentile(50) * 1e6,
+            p99=self.percentile(99) * 1e6,
+            runs=len(self.timings),
+        )
+
+
+def run_benchmark(
+    name: str, func: Callable[[], object], iterations: int = 1000, warmup: int = 100
+) -> BenchmarkResult:
+    """Call func warmup + iterations times and record how long each of the last iterations calls took."""
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return BenchmarkResult(name=name, timings=timings)
+
+
+def report(title: str, *results: BenchmarkResult) -> None:
+    print()
+    print(title)
+    for result in results:
+        print("  {}".format(result))
@@ -0,0 +1,150 @@
+"""Configurable latency and faults for the routes of the integration server, to benchmark how clients deal with
+slow and misbehaving services.
+
+The behavior of a route is described by a :py:class:`RouteBehavior`, looked up by the path of the request (e.g.
+``/stub/slow``) or by the path pattern of its route (e.g. ``/pet/{petId}``). Latencies and body sizes are drawn
+from distributions; all of them are NamedTuples, so that they can be handed to server processes.
+"""
+import asyncio
+import math
+import random
+import socket
+import struct
+from typing import Awaitable
+from typing import Callable
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Union
+
+from aiohttp import web
+
+
+class Fixed(NamedTuple):
+    value: float
+
+    def sample(self, rng: random.Random) -> float:
+        return self.value
+
+
+class LogNormal(NamedTuple):
+    """Values whose logarithm is normally distributed, the usual shape of service latencies. Half of the
+    values are below median; sigma controls how long the tail is (p99 is about median * e ** (2.33 * sigma))."""
+
+    median: float
+    sigma: float
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.lognormvariate(math.log(self.median), self.sigma)
+
+
+class Bimodal(NamedTuple):
+    """Values from slow for a slow_fraction of the samples and from fast for the rest, e.g. requests that
+    usually hit a cache but sometimes have to wait for a garbage collection pause."""
+
+    fast: "Distribution"
+    slow: "Distribution"
+    slow_fraction: float
+
+    def sample(self, rng: random.Random) -> float:
+        if rng.random() < self.slow_fraction:
+            return self.slow.sample(rng)
+        return self.fast.sample(rng)
+
+
+Distribution = Union[Fixed, LogNormal, Bimodal]
+
+
+class Drip(NamedTuple):
+    """Send the response body in chunks of chunk_size bytes, waiting interval seconds before each one."""
+
+    chunk_size: int
+    interval: float
+
+
+class RouteBehavior(NamedTuple):
+    # seconds to wait before handling the request
+    latency: Optional[Distribution] = None
+    # if given, the handler of the route isn't called; the response is a body of this many bytes instead
+    body_size: Optional[Distribution] = None
+    drip: Optional[Drip] = None
+    # fraction of requests whose connection is reset (after waiting for latency) instead of being answered
+    reset_rate: float = 0.0
+
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+
+def reset_connection(request: web.Request) -> None:
+    """Abort the connection of request. Over TCP, the peer receives a RST rather than a FIN, i.e. it sees
+    ECONNRESET like it would if the server crashed."""
+    transport = request.transport
+    if transport is None:  # pragma: no cover
+        return
+    sock = transport.get_extra_info("socket")
+    if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+    transport.abort()
+
+
+async def drip_response(
+    request: web.Request, response: web.Response, drip: Drip
+) -> web.StreamResponse:
+    body = response.body
+    if not isinstance(body, bytes):  # pragma: no cover
+        return response
+
+    streamed = web.StreamResponse(
+        status=response.status, reason=response.reason, headers=response.headers
+    )
+    streamed.content_length = len(body)
+    await streamed.prepare(request)
+    for start in range(0, len(body), drip.chunk_size):
+        await asyncio.sleep(drip.interval)
+        end = start + drip.chunk_size
+        await streamed.write(body[start:end])
+    await streamed.write_eof()
+    return streamed
+
+
+def fault_injection_middleware(
+    behaviors: Mapping[str, RouteBehavior], seed: Optional[int] = None
+) -> Callable[[web.Request, Handler], Awaitable[web.StreamResponse]]:
+    """Return a middleware applying behaviors to the requests of an application.
+
+    :param behaviors: behavior by request path or route path pattern; the request path takes precedence
+    :param seed: seed of the random numbers, to make runs repeatable
+    """
+    rng = random.Random(seed)
+
+    @web.middleware
+    async def middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+        behavior = behaviors.get(request.path)
+        if behavior is None:
+            resource = request.match_info.route.resource
+            if resource is not None:
+                behavior = behaviors.get(resource.canonical)
+        if behavior is None:
+            return await handler(request)
+
+        reset = behavior.reset_rate and rng.random() < behavior.reset_rate
+        if behavior.latency is not None:
+            await asyncio.sleep(behavior.latency.sample(rng))
+        if reset:
+            reset_connection(request)
+            # nothing is sent over the aborted connection anymore
+            return web.Response()
+
+        if behavior.body_size is not None:
+            response: web.StreamResponse = web.Response(
+                body=b"x" * max(0, int(behavior.body_size.sample(rng))),
+                content_type="application/octet-stream",
+            )
+        else:
+            response = await handler(request)
+
+        if behavior.drip is not None and isinstance(response, web.Response):
+            return await drip_response(request, response, behavior.drip)
+        return response
+
+    return middleware
@@ -2,16 +2,24 @@ import argparse
 import asyncio
 import multiprocessing
 import os.path
+import socket
 import sys
+import time
 
 import umsgpack
 from aiohttp import web
 
+from testing.fault_injection import fault_injection_middleware
+from testing.fault_injection import Fixed
+from testing.fault_injection import RouteBehavior
 
 INTEGRATION_SERVER_HOST = "127.0.0.1"
 
 shm_request_received = None
 
+# behaviors that the tests rely on; see testing.fault_injection
+DEFAULT_BEHAVIORS = {"/store/inventory": RouteBehavior(latency=Fixed(1.0))}
+
 
 async def swagger_spec(request):
     with open(os.path.join(os.path.dirname(__file__), "swagger.yaml")) as f:
@@ -20,7 +28,6 @@ async def swagger_spec(request):
 
 
 async def store_inventory(request):
-    await asyncio.sleep(1)
     return web.json_response({})
 
 
@@ -136,11 +143,90 @@ async def get_pets(request):
     return web.json_response(pets)
 
 
+async def blob(request):
+    """Return as many bytes as the size query parameter asks for, to test downloads. If the chunked
+    query parameter is set, the body is sent in 64 KiB chunks without a Content-Length header."""
+    size = int(request.query.get("size", 1024 * 1024))
+    if "chunked" not in request.query:
+        return web.Response(body=b"x" * size, content_type="application/octet-stream")
+
+    response = web.StreamResponse(headers={"Content-Type": "application/octet-stream"})
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    for start in range(0, size, 64 * 1024):
+        await response.write(b"x" * min(64 * 1024, size - start))
+    await response.write_eof()
+    return response
+
+
+async def _split_spec_delay(request):
+    delay_ms = int(request.match_info["delay_ms"])
+    if delay_ms:
+        await asyncio.sleep(delay_ms / 1000)
+
+
+async def split_spec(request):
+    """Return a spec whose definitions live in count separate files, every odd one in YAML format,
+    to test loading multi-file specs. Every file takes delay_ms to arrive."""
+    await _split_spec_delay(request)
+    count = int(request.match_info["count"])
+    definitions = {
+        "Model{}".format(i): {
+            "$ref": "definitions/{}.{}#/Model".format(i, "yaml" if i % 2 else "json")
+        }
+        for i in range(count)
+    }
+    return web.json_response(
+        {
+            "swagger": "2.0",
+            "info": {"title": "Split spec", "version": "1.0"},
+            "basePath": "/",
+            "produces": ["application/json"],
+            "paths": {
+                "/ping": {
+                    "get": {
+                        "operationId": "ping",
+                        "tags": ["split"],
+                        "responses": {"200": {"description": "pong"}},
+                    }
+                }
+            },
+            "definitions": definitions,
+        }
+    )
+
+
+async def split_spec_definition(request):
+    await _split_spec_delay(request)
+    if request.match_info["extension"] == "yaml":
+        text = "Model:\n  type: object\n  properties:\n    id:\n      $ref: '../common.json#/Id'\n"
+        return web.Response(text=text, content_type="text/vnd.yaml")
+    return web.json_response(
+        {
+            "Model": {
+                "type": "object",
+                "properties": {"id": {"$ref": "../common.json#/Id"}},
+            }
+        }
+    )
+
+
+async def split_spec_common(request):
+    await _split_spec_delay(request)
+    return web.json_response({"Id": {"type": "integer"}})
+
+
 async def ping(request):
     shm_request_received.value = 1
     return web.json_response({})
 
 
+async def stub(request):
+    """Answer with an empty JSON object. Benchmarks give the stub routes they need their own behaviors,
+    e.g. /stub/fast and /stub/slow."""
+    return web.json_response({})
+
+
 def check_content_type(headers, expected_content_type):
     content_type = headers.get("Content-Type")
     if content_type != expected_content_type:
@@ -152,6 +238,18 @@ def check_content_type(headers, expected_content_type):
             raise web.HTTPBadRequest()
 
 
+def wait_for_unix_socket(path, timeout=10):
+    """Wait until a server accepts connections on the Unix domain socket at path."""
+    start = time.time()
+    while time.time() < start + timeout:
+        with socket.socket(socket.AF_UNIX) as sock:
+            try:
+                sock.connect(path)
+                return
+            except OSError:  # pragma: no cover
+                time.sleep(0.1)
+
+
 def setup_routes(app):
     app.router.add_get("/swagger.yaml", swagger_spec)
     app.router.add_get("/store/inventory", store_inventory)
@@ -164,14 +262,51 @@ def setup_routes(app):
     app.router.add_delete("/pet", delete_pet)
     app.router.add_get("/pets", get_pets)
     app.router.add_get("/ping", ping)
-
-
-def start_integration_server(port, shm_request_received_var):
+    app.router.add_get("/blob", blob)
+    app.router.add_route("*", "/stub/{name}", stub)
+    app.router.add_get("/split/{count}/{delay_ms}/swagger.json", split_spec)
+    app.router.add_get(
+        "/split/{count}/{delay_ms}/definitions/{index}.{extension}",
+        split_spec_definition,
+    )
+    app.router.add_get("/split/{count}/{delay_ms}/common.json", split_spec_common)
+
+
+def create_app(behaviors=None, seed=None):
+    """Return the integration server's application, e.g. to serve it in-process.
+
+    :param behaviors: latency and faults of routes, in addition to DEFAULT_BEHAVIORS; see
+        :py:func:`testing.fault_injection.fault_injection_middleware`
+    :param seed: seed of the random numbers drawn for behaviors
+    """
+    app = web.Application(
+        middlewares=[
+            fault_injection_middleware(
+                dict(DEFAULT_BEHAVIORS, **(behaviors or {})), seed=seed
+            )
+        ]
+    )
+    setup_routes(app)
+    return app
+
+
+def start_integration_server(
+    port,
+    shm_request_received_var,
+    unix_socket_path=None,
+    behaviors=None,
+    seed=None,
+    reuse_port=False,
+):
+    """Run the integration server until the process is terminated. Several processes started with
+    reuse_port share the port, and the kernel spreads connections between them."""
     global shm_request_received, INTEGRATION_SERVER_HOST
     shm_request_received = shm_request_received_var
-    app = web.Application()
-    setup_routes(app)
-    web.run_app(app, host=INTEGRATION_SERVER_HOST, port=port)
+    app = create_app(behaviors, seed)
+    if unix_socket_path:
+        web.run_app(app, path=unix_socket_path, print=None)
+    else:
+        web.run_app(app, host=INTEGRATION_SERVER_HOST, port=port, reuse_port=reuse_port)
 
 
 if __name__ == "__main__":
@@ -184,6 +319,28 @@ if __name__ == "__main__":
         default=8080,
         help="The port the webserver should listen on (default: %(default)s)",
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of server processes sharing the port (default: %(default)s)",
+    )
     args = parser.parse_args()
 
-    start_integration_server(args.port, multiprocessing.Value("i", 0))
+    shm = multiprocessing.Value("i", 0)
+    if args.workers == 1:
+        start_integration_server(args.port, shm)
+    else:
+        workers = [
+            multiprocessing.Process(
+                target=start_integration_server,
+                args=(args.port, shm),
+                kwargs={"reuse_port": True},
+            )
+            for _ in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,256 @@
+import asyncio
+import concurrent.futures
+from unittest import mock
+
+import aiohttp
+import pytest
+from bravado.client import SwaggerClient
+from bravado.exception import BravadoTimeoutError
+from bravado.exception import HTTPNotFound
+from bravado.http_future import HttpFuture
+
+from bravado_asyncio.bulk import BulkRequest
+from bravado_asyncio.definitions import ResponseSizeConfig
+from bravado_asyncio.definitions import SessionConfig
+from bravado_asyncio.future_adapter import AsyncioFutureAdapter
+from bravado_asyncio.future_adapter import FutureAdapter
+from bravado_asyncio.http_client import AsyncioClient
+from bravado_asyncio.http_client import RunMode
+from bravado_asyncio.response_adapter import AioHTTPResponseAdapter
+from bravado_asyncio.response_adapter import ResponseTooLargeError
+from testing.integration_server import create_app
+
+
+class RequestError(Exception):
+    pass
+
+
+@pytest.fixture
+def loop_runner(loop_runner):
+    yield loop_runner
+    # let the loop process the cancellation of outstanding requests before it is stopped
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0.01), loop_runner.loop).result()
+
+
+@pytest.fixture
+def make_future(loop_runner):
+    def _make_future(delay, result=None, error=None, response_adapter=None):
+        async def request():
+            await asyncio.sleep(delay)
+            response = mock.Mock(name="response", spec=aiohttp.ClientResponse)
+            return response
+
+        http_future = mock.Mock(name="http future", spec=HttpFuture)
+        http_future.future = FutureAdapter(
+            asyncio.run_coroutine_threadsafe(request(), loop_runner.loop)
+        )
+        http_future.response_adapter = response_adapter or AioHTTPResponseAdapter(
+            loop_runner.loop
+        )
+        if error:
+            http_future.response.side_effect = error
+        else:
+            http_future.response.return_value = result
+        return http_future
+
+    return _make_future
+
+
+def test_only_thread_mode_futures(loop_runner):
+    http_future = mock.Mock(name="http future", spec=HttpFuture)
+    http_future.future = AsyncioFutureAdapter(mock.Mock(name="asyncio future"))
+
+    with pytest.raises(ValueError):
+        BulkRequest([http_future], loop_runner.loop)
+
+
+def test_gather(loop_runner, make_future):
+    futures = [make_future(0.05, result="slow"), make_future(0, result="fast")]
+
+    assert BulkRequest(futures, loop_runner.loop, timeout=1).gather() == [
+        "slow",
+        "fast",
+    ]
+    futures[0].response.assert_called_once_with(timeout=mock.ANY)
+
+
+def test_gather_error(loop_runner, make_future):
+    slow_future = make_future(1)
+    futures = [slow_future, make_future(0, error=RequestError())]
+
+    with pytest.raises(RequestError):
+        BulkRequest(futures, loop_runner.loop).gather()
+
+    with pytest.raises(concurrent.futures.CancelledError):
+        slow_future.future.future.result(timeout=1)
+
+
+def test_gather_timeout(loop_runner, make_future):
+    slow_future = make_future(1)
+
+    with pytest.raises(BravadoTimeoutError):
+        BulkRequest(
+            [make_future(0, result="fast"), slow_future], loop_runner.loop, timeout=0.05
+        ).gather()
+
+    with pytest.raises(concurrent.futures.CancelledError):
+        slow_future.future.future.result(timeout=1)
+
+
+def test_gather_return_exceptions(loop_runner, make_future):
+    error = RequestError()
+    futures = [make_future(0, error=error), make_future(0, result="ok"), make_future(1)]
+
+    results = BulkRequest(futures, loop_runner.loop, timeout=0.05).gather(
+        return_exceptions=True
+    )
+
+    assert results[0] is error
+    assert results[1] == "ok"
+    assert isinstance(results[2], BravadoTimeoutError)
+
+
+def test_body_read_by_response_adapter(loop_runner, make_future):
+    response_adapter = AioHTTPResponseAdapter(
+        loop_runner.loop, response_size=ResponseSizeConfig(max_size=1)
+    )
+    future = make_future(0, result="ok", response_adapter=response_adapter)
+
+    with mock.patch.object(
+        response_adapter,
+        "_receive_body",
+        autospec=True,
+        side_effect=ResponseTooLargeError(1),
+    ) as mock_receive_body:
+        # the error is raised when the response is unmarshalled
+        assert BulkRequest([future], loop_runner.loop, timeout=1).gather() == ["ok"]
+
+    mock_receive_body.assert_called_once_with()
+
+
+def test_body_cut_off_by_deadline(loop_runner, make_future):
+    response_adapter = mock.Mock(name="response adapter", spec=AioHTTPResponseAdapter)
+    responses = []
+
+    async def preload_body(response):
+        responses.append(response)
+        await asyncio.sleep(1)
+
+    response_adapter.preload_body.side_effect = preload_body
+    future = make_future(0, response_adapter=response_adapter)
+
+    with pytest.raises(BravadoTimeoutError):
+        BulkRequest([future], loop_runner.loop, timeout=0.05).gather()
+
+    # let the loop process the cancellation
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0.01), loop_runner.loop).result()
+    (response,) = responses
+    response.close.assert_called_once_with()
+
+
+def test_gather_unmarshal_in_background():
+    http_client = AsyncioClient(
+        session_config=SessionConfig(in_process_app=create_app()),
+        unmarshal_executor=concurrent.futures.ThreadPoolExecutor(max_workers=4),
+    )
+    try:
+        client = SwaggerClient.from_url(
+            "http://in-process/swagger.yaml",
+            http_client=http_client,
+            config={"validate_swagger_spec": False},
+        )
+        # bravado-core fills its caches the first time it unmarshals a model, which isn't thread-safe
+        client.pet.getPetById(petId=42).result(timeout=5)
+        with mock.patch.object(
+            AioHTTPResponseAdapter,
+            "preload_body",
+            autospec=True,
+            side_effect=AioHTTPResponseAdapter.preload_body,
+        ) as mock_preload_body:
+            # the server doesn't know the pet with id 5
+            futures = [
+                client.pet.getPetById(petId=pet_id)
+                for pet_id in [5] + list(range(10, 30))
+            ]
+            responses = http_client.gather(futures, timeout=5, return_exceptions=True)
+
+        assert isinstance(responses[0], HTTPNotFound)
+        assert [response.result.id for response in responses[1:]] == list(range(10, 30))
+        # by the background unmarshalling only
+        assert mock_preload_body.call_count == 21
+    finally:
+        http_client.close()
+        http_client.unmarshal_executor.shutdown()
+
+
+def test_as_completed(loop_runner, make_future):
+    futures = [make_future(0.1), make_future(0), make_future(0.05)]
+
+    completed = list(BulkRequest(futures, loop_runner.loop, timeout=1).as_completed())
+
+    assert completed == [futures[1], futures[2], futures[0]]
+
+
+def test_as_completed_stop_early(loop_runner, make_future):
+    futures = [make_future(0), make_future(1)]
+
+    for future in BulkRequest(futures, loop_runner.loop).as_completed():
+        assert future is futures[0]
+        break
+
+    with pytest.raises(concurrent.futures.CancelledError):
+        futures[1].future.future.result(timeout=1)
+
+
+def test_first_successful(loop_runner, make_future):
+    futures = [
+        make_future(0, error=RequestError()),
+        make_future(0.05, result="second"),
+        make_future(0.01, result="first"),
+        make_future(1, result="too late"),
+    ]
+
+    results = BulkRequest(futures, loop_runner.loop, timeout=1).first_successful(
+        count=2
+    )
+
+    assert results == ["first", "second"]
+    with pytest.raises(concurrent.futures.CancelledError):
+        futures[3].future.future.result(timeout=1)
+
+
+def test_first_successful_all_failed(loop_runner, make_future):
+    error = RequestError()
+    futures = [make_future(0, error=ValueError()), make_future(0.01, error=error)]
+
+    with pytest.raises(RequestError):
+        BulkRequest(futures, loop_runner.loop).first_successful()
+
+
+@pytest.mark.parametrize("count", (0, 3))
+def test_first_successful_invalid_count(loop_runner, make_future, count):
+    bulk_request = BulkRequest([make_future(0), make_future(0)], loop_runner.loop)
+
+    with pytest.raises(ValueError):
+        bulk_request.first_successful(count=count)
+
+
+def test_client_bulk_methods(loop_runner, make_future):
+    client = AsyncioClient(loop=loop_runner.loop)
+
+    futures = [make_future(0.01, result="second"), make_future(0, result="first")]
+    assert client.gather(futures, timeout=1) == ["second", "first"]
+
+    futures = [make_future(0.01), make_future(0)]
+    assert list(client.as_completed(futures, timeout=1)) == futures[::-1]
+
+    futures = [make_future(0.01, result="second"), make_future(0, result="first")]
+    assert client.first_successful(futures, timeout=1) == ["first"]
+
+
+def test_client_bulk_methods_full_asyncio(mock_loop):
+    client = AsyncioClient(loop=mock_loop)
+    client.run_mode = RunMode.FULL_ASYNCIO
+
+    with pytest.raises(ValueError):
+        client.gather([])
@@ -0,0 +1,104 @@
+import gzip
+import json
+
+import pytest
+
+from bravado_asyncio import compression
+from bravado_asyncio.compression import compress_request
+from bravado_asyncio.compression import get_compressor
+from bravado_asyncio.definitions import CompressionConfig
+
+
+@pytest.fixture
+def json_body():
+    return json.dumps({"pets": [{"id": i, "name": "Lili"} for i in range(100)]})
+
+
+@pytest.fixture
+def json_headers():
+    return {"Content-Type": "application/json"}
+
+
+def test_get_compressor_unknown_encoding():
+    with pytest.raises(ValueError):
+        get_compressor("lzma")
+
+
+def test_compress_gzip(json_body, json_headers):
+    data = compress_request(json_body, json_headers, CompressionConfig(level=9))
+
+    assert json_headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(data) == json_body.encode("utf-8")
+
+
+def test_compress_brotli(json_body, json_headers):
+    brotli = pytest.importorskip("brotli")
+
+    data = compress_request(json_body, json_headers, CompressionConfig(encoding="br"))
+
+    assert json_headers["Content-Encoding"] == "br"
+    assert brotli.decompress(data) == json_body.encode("utf-8")
+
+
+def test_compress_zstd(json_body, json_headers):
+    if compression.zstd is None:  # pragma: no cover
+        pytest.skip("zstd is not installed")
+
+    data = compress_request(
+        json_body.encode("utf-8"), json_headers, CompressionConfig(encoding="zstd")
+    )
+
+    assert json_headers["Content-Encoding"] == "zstd"
+    assert compression.zstd.decompress(data) == json_body.encode("utf-8")
+
+
+@pytest.mark.parametrize(
+    "headers",
+    (
+        {},
+        {"content-type": "text/plain"},
+        {"Content-Type": "application/json", "Content-Encoding": "identity"},
+    ),
+)
+def test_no_compression_of_non_json_bodies(json_body, headers):
+    assert compress_request(json_body, headers, CompressionConfig()) is json_body
+
+
+def test_no_compression_of_small_bodies(json_headers):
+    data = compress_request("{}", json_headers, CompressionConfig())
+
+    assert data == "{}"
+    assert "Content-Encoding" not in json_headers
+
+
+def test_no_compression_of_formdata(json_headers):
+    data = {"name": "Lili"}
+    assert compress_request(data, json_headers, CompressionConfig(min_size=0)) is data
+
+
+@pytest.mark.parametrize(
+    "content_type", ("application/json; charset=utf-8", "application/problem+json")
+)
+def test_compress_json_variants(json_body, content_type):
+    headers = {"content-type": content_type}
+    compress_request(json_body, headers, CompressionConfig())
+
+    assert headers["Content-Encoding"] == "gzip"
+
+
+def test_accept_encoding(json_headers):
+    compress_request("{}", json_headers, CompressionConfig())
+    assert json_headers["Accept-Encoding"] == compression.ACCEPT_ENCODING
+    assert json_headers["Accept-Encoding"].startswith("gzip, deflate")
+
+
+def test_accept_encoding_not_overwritten():
+    headers = {"accept-encoding": "identity"}
+    compress_request("{}", headers, CompressionConfig())
+    assert headers == {"accept-encoding": "identity"}
+
+
+def test_accept_encoding_disabled():
+    headers = {}
+    compress_request("{}", headers, CompressionConfig(advertise_encodings=False))
+    assert headers == {}
@@ -4,6 +4,9 @@ from unittest import mock
 
 import pytest
 
+from bravado_asyncio.metrics import metrics
+from testing.loop_runner import LoopRunner
+
 
 @pytest.fixture
 def event_loop():
@@ -13,6 +16,22 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture
+def loop_runner():
+    loop_runner = LoopRunner(asyncio.new_event_loop())
+    loop_runner.start()
+    yield loop_runner
+    loop_runner.stop()
+    loop_runner.join()
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
 @pytest.fixture
 def mock_loop():
     return mock.Mock(name="loop")
@@ -0,0 +1,86 @@
+import random
+import time
+
+import aiohttp
+import pytest
+
+from bravado_asyncio.definitions import SessionConfig
+from bravado_asyncio.http_client import AsyncioClient
+from bravado_asyncio.http_client import RunMode
+from testing.fault_injection import Bimodal
+from testing.fault_injection import Drip
+from testing.fault_injection import Fixed
+from testing.fault_injection import LogNormal
+from testing.fault_injection import RouteBehavior
+from testing.integration_server import create_app
+
+
+@pytest.fixture
+def get():
+    clients = []
+
+    def get(behaviors, path):
+        client = AsyncioClient(
+            run_mode=RunMode.CALLING_THREAD,
+            session_config=SessionConfig(in_process_app=create_app(behaviors, seed=0)),
+        )
+        clients.append(client)
+        start = time.perf_counter()
+        response = client.request(
+            {"method": "GET", "url": "http://in-process" + path}
+        ).result(timeout=5)
+        return response, time.perf_counter() - start
+
+    yield get
+
+    for client in clients:
+        client.close()
+
+
+def test_distributions():
+    rng = random.Random(0)
+    assert Fixed(0.5).sample(rng) == 0.5
+
+    samples = sorted(LogNormal(median=0.01, sigma=1.0).sample(rng) for _ in range(1000))
+    assert samples[500] == pytest.approx(0.01, rel=0.2)
+
+    bimodal = Bimodal(fast=Fixed(1), slow=Fixed(100), slow_fraction=0.1)
+    slow = sum(bimodal.sample(rng) == 100 for _ in range(1000))
+    assert 70 < slow < 130
+
+
+def test_latency(get):
+    behaviors = {"/stub/slow": RouteBehavior(latency=Fixed(0.1))}
+
+    response, elapsed = get(behaviors, "/stub/slow")
+    assert response.json() == {}
+    assert elapsed >= 0.1
+
+    _, elapsed = get(behaviors, "/stub/fast")
+    assert elapsed < 0.1
+
+
+def test_route_pattern_and_body_size(get):
+    behaviors = {"/pet/{petId}": RouteBehavior(body_size=Fixed(1000))}
+
+    response, _ = get(behaviors, "/pet/42")
+
+    assert response.headers["Content-Type"] == "application/octet-stream"
+    assert response.raw_bytes == b"x" * 1000
+
+
+def test_drip(get):
+    behaviors = {"/stub/drip": RouteBehavior(drip=Drip(chunk_size=1, interval=0.02))}
+
+    response, elapsed = get(behaviors, "/stub/drip")
+
+    assert response.json() == {}
+    # two bytes, each one sent after interval
+    assert elapsed >= 0.04
+
+
+def test_reset(get):
+    behaviors = {"/stub/reset": RouteBehavior(reset_rate=1.0)}
+
+    with pytest.raises(aiohttp.ClientError):
+        get(behaviors, "/stub/reset")
@@ -0,0 +1,71 @@
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode as urllib_urlencode
+
+import pytest
+from yarl import URL
+
+from bravado_asyncio.form_encoding import add_query
+from bravado_asyncio.form_encoding import encode_form
+from bravado_asyncio.form_encoding import urlencode
+
+
+@pytest.mark.parametrize(
+    "fields, expected",
+    (
+        ({}, ""),
+        ({"foo": "bar"}, "foo=bar"),
+        (
+            {"answer": 42, "flag": False, "nothing": None},
+            "answer=42&flag=False&nothing=None",
+        ),
+        ({"ids": [1, 2, 3]}, "ids=1&ids=2&ids=3"),
+        ({"ids": ()}, ""),
+        ({"name": "Lili the cat"}, "name=Lili+the+cat"),
+        ({"tags": ["a&b", "c=d", "ü"]}, "tags=a%26b&tags=c%3Dd&tags=%C3%BC"),
+        ({"a b": "1+1"}, "a+b=1%2B1"),
+    ),
+)
+def test_urlencode(fields, expected):
+    assert urlencode(fields) == expected
+
+
+def test_urlencode_matches_urllib():
+    fields = {"ids": list(range(5)), "name": "Lili/Lulu?", "status": "sold out"}
+    expected_pairs = [(k, str(v)) for k, v in fields.items() if k != "ids"]
+    expected_pairs[:0] = [("ids", str(i)) for i in fields["ids"]]
+
+    assert urlencode(fields) == urllib_urlencode(expected_pairs)
+
+
+def test_encode_form():
+    payload = encode_form({"name": "Lili", "photoUrls": ["a", "b"]})
+
+    assert payload.content_type == "application/x-www-form-urlencoded"
+    assert payload._value == b"name=Lili&photoUrls=a&photoUrls=b"
+
+
+@pytest.mark.parametrize(
+    "url, params, expected_url",
+    (
+        ("http://localhost/pets", None, "http://localhost/pets"),
+        ("http://localhost/pets", {}, "http://localhost/pets"),
+        ("http://localhost/pets", {"ids": []}, "http://localhost/pets"),
+        ("http://localhost/pets", {"ids": [1, 2]}, "http://localhost/pets?ids=1&ids=2"),
+        ("http://localhost/pets?a=b", {"ids": [1]}, "http://localhost/pets?a=b&ids=1"),
+    ),
+)
+def test_add_query(url, params, expected_url):
+    assert add_query(url, params) == expected_url
+
+
+def test_add_query_survives_url_parsing():
+    params = {"q": "a b+c&d/é", "ids": [1, 2]}
+
+    url = URL(add_query("http://localhost/pets", params))
+
+    assert list(url.query.items()) == [
+        ("q", "a b+c&d/é"),
+        ("ids", "1"),
+        ("ids", "2"),
+    ]
+    assert parse_qsl(url.raw_query_string) == list(url.query.items())
@@ -3,11 +3,17 @@ import concurrent.futures
 import time
 from unittest import mock
 
+import aiohttp
 import pytest
 
 from bravado_asyncio.definitions import AsyncioResponse
+from bravado_asyncio.future_adapter import _close_response
 from bravado_asyncio.future_adapter import AsyncioFutureAdapter
+from bravado_asyncio.future_adapter import CallingThreadFutureAdapter
 from bravado_asyncio.future_adapter import FutureAdapter
+from bravado_asyncio.metrics import metrics
+from bravado_asyncio.metrics import REQUESTS_CANCELLED_ON_TIMEOUT
+from bravado_asyncio.metrics import REQUESTS_ORPHANED
 
 
 @pytest.fixture
@@ -63,3 +69,126 @@ async def test_asyncio_future_adapter(mock_response):
 def test_asyncio_future_adapter_timeout_error_class():
     """Let's make sure refactors never break timeout errors"""
     assert asyncio.TimeoutError in AsyncioFutureAdapter.timeout_errors
+
+
+def test_future_adapter_done_callback():
+    future = concurrent.futures.Future()
+    future_adapter = FutureAdapter(future)
+    callback = mock.Mock(name="callback")
+
+    future_adapter.add_done_callback(callback)
+    assert not future_adapter.done()
+    callback.assert_not_called()
+
+    future.set_result(mock.sentinel.response)
+    assert future_adapter.done()
+    callback.assert_called_once_with(future_adapter)
+
+
+def test_future_adapter_timeout_cancels():
+    future = concurrent.futures.Future()
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        FutureAdapter(future).result(timeout=0.01)
+
+    assert future.cancelled()
+    assert metrics.get_counter(REQUESTS_CANCELLED_ON_TIMEOUT) == 1
+
+
+def test_future_adapter_timeout_without_cancel():
+    future = concurrent.futures.Future()
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        FutureAdapter(future, cancel_on_timeout=False).result(timeout=0.01)
+
+    assert not future.cancelled()
+    assert metrics.get_counter(REQUESTS_ORPHANED) == 1
+
+
+def test_future_adapter_timeout_closes_late_response(mock_future, mock_response):
+    mock_loop = mock.Mock(name="loop", spec=asyncio.AbstractEventLoop)
+    mock_loop.is_closed.return_value = False
+    late_future = concurrent.futures.Future()
+    late_future.set_result(mock_response)
+    # the request completes between the timeout and the attempt to cancel it
+    mock_future.result.side_effect = concurrent.futures.TimeoutError
+    mock_future.cancel.return_value = False
+    mock_future.add_done_callback.side_effect = lambda callback: callback(late_future)
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        FutureAdapter(mock_future, loop=mock_loop).result(timeout=0.01)
+
+    mock_loop.call_soon_threadsafe.assert_called_once_with(mock_response.close)
+
+
+@pytest.mark.parametrize("outcome", ("cancelled", "exception", "loop_closed"))
+def test_close_response_nothing_to_close(outcome):
+    mock_loop = mock.Mock(name="loop", spec=asyncio.AbstractEventLoop)
+    mock_loop.is_closed.return_value = outcome == "loop_closed"
+    future = concurrent.futures.Future()
+    if outcome == "cancelled":
+        future.cancel()
+    elif outcome == "exception":
+        future.set_exception(aiohttp.ClientError())
+    else:
+        future.set_result(mock.Mock(name="response"))
+
+    _close_response(future, mock_loop)
+
+    mock_loop.call_soon_threadsafe.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cancel_on_timeout", (True, False))
+async def test_asyncio_future_adapter_timeout(cancel_on_timeout):
+    future = asyncio.get_event_loop().create_future()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await AsyncioFutureAdapter(future, cancel_on_timeout=cancel_on_timeout).result(
+            timeout=0.01
+        )
+
+    assert future.cancelled() is cancel_on_timeout
+    assert metrics.get_counter(REQUESTS_CANCELLED_ON_TIMEOUT) == int(cancel_on_timeout)
+    assert metrics.get_counter(REQUESTS_ORPHANED) == int(not cancel_on_timeout)
+    future.cancel()
+
+
+@pytest.fixture
+def calling_thread_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_calling_thread_future_adapter(calling_thread_loop, mock_response):
+    async def request():
+        await asyncio.sleep(0.01)
+        return mock_response
+
+    future_adapter = CallingThreadFutureAdapter(
+        calling_thread_loop.create_task(request())
+    )
+    result = future_adapter.result(timeout=5)
+
+    assert result.response is mock_response
+    assert 0 < result.remaining_timeout < 5
+    # a completed request doesn't need the loop anymore
+    assert future_adapter.result().response is mock_response
+
+
+@pytest.mark.parametrize("cancel_on_timeout", (True, False))
+def test_calling_thread_future_adapter_timeout(calling_thread_loop, cancel_on_timeout):
+    task = calling_thread_loop.create_task(asyncio.sleep(1))
+    future_adapter = CallingThreadFutureAdapter(
+        task, cancel_on_timeout=cancel_on_timeout
+    )
+
+    with pytest.raises(asyncio.TimeoutError):
+        future_adapter.result(timeout=0.01)
+
+    assert task.cancelled() is cancel_on_timeout
+    assert metrics.get_counter(REQUESTS_CANCELLED_ON_TIMEOUT) == int(cancel_on_timeout)
+    assert metrics.get_counter(REQUESTS_ORPHANED) == int(not cancel_on_timeout)
+    future_adapter.cancel()
+    calling_thread_loop.run_until_complete(asyncio.wait([task]))
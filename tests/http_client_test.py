@@ -1,15 +1,39 @@
 import asyncio
+import concurrent.futures
+import gc
+import gzip
+import json
+import subprocess
+import sys
+import textwrap
+import threading
+import weakref
 from unittest import mock
 
 import aiohttp
 import pytest
 from bravado.http_future import HttpFuture
 
+from bravado_asyncio.definitions import CompressionConfig
+from bravado_asyncio.definitions import JsonDecodeConfig
+from bravado_asyncio.definitions import RecordingConfig
+from bravado_asyncio.definitions import RecordingMode
+from bravado_asyncio.definitions import ResponseReleaseConfig
+from bravado_asyncio.definitions import ResponseSizeConfig
+from bravado_asyncio.definitions import SessionConfig
+from bravado_asyncio.definitions import TracingConfig
+from bravado_asyncio.future_adapter import CallingThreadFutureAdapter
 from bravado_asyncio.future_adapter import FutureAdapter
 from bravado_asyncio.http_client import AsyncioClient
 from bravado_asyncio.http_client import get_client_session
 from bravado_asyncio.http_client import RunMode
+from bravado_asyncio.http_future import ThreadHttpFuture
+from bravado_asyncio.request_template import EMPTY_HEADERS
 from bravado_asyncio.response_adapter import AioHTTPResponseAdapter
+from bravado_asyncio.submission_queue import submit_coroutine
+from bravado_asyncio.thread_loop import get_calling_thread_loop
+from bravado_asyncio.tracing import InMemorySpanSink
+from bravado_asyncio.tracing import Tracer
 
 
 @pytest.fixture
@@ -51,6 +75,92 @@ def mock_create_default_context():
         yield _mock
 
 
+def test_import_and_init_are_lazy():
+    # in a new interpreter, as other tests have imported aiohttp and started the event loop thread already
+    code = textwrap.dedent(
+        """
+        import sys
+        import threading
+
+        from bravado_asyncio import thread_loop
+        from bravado_asyncio.http_client import AsyncioClient
+
+        client = AsyncioClient()
+        client.close()
+        assert "aiohttp" not in sys.modules
+        assert thread_loop.event_loop is None
+        assert threading.active_count() == 1
+        """
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.mark.parametrize(
+    "operation_id, expected", (("getPetById", 10), ("deletePet", None), ("other", 100))
+)
+def test_get_max_response_size(operation_id, expected):
+    client = AsyncioClient(
+        response_size=ResponseSizeConfig(
+            max_size=100, operation_max_sizes={"getPetById": 10, "deletePet": None}
+        )
+    )
+    operation = mock.Mock(name="operation", operation_id=operation_id)
+
+    assert client.get_max_response_size(operation) == expected
+    assert client.get_max_response_size(None) == 100
+    assert AsyncioClient().get_max_response_size(operation) is None
+
+
+@pytest.mark.parametrize(
+    "response_size, expected",
+    (
+        (None, None),
+        (ResponseSizeConfig(max_size=100), 100),
+        (ResponseSizeConfig(spill_threshold=10), 10),
+        (ResponseSizeConfig(max_size=100, spill_threshold=10), 10),
+        (ResponseSizeConfig(max_size=10, spill_threshold=100), 10),
+    ),
+)
+def test_get_max_recorded_size(response_size, expected):
+    client = AsyncioClient(response_size=response_size)
+
+    assert client._get_max_recorded_size(None) == expected
+
+
+def test_calling_thread_run_mode():
+    client = AsyncioClient(run_mode=RunMode.CALLING_THREAD)
+
+    assert client.loop is get_calling_thread_loop()
+    assert client.future_adapter is CallingThreadFutureAdapter
+
+
+def test_calling_thread_sessions_freed_on_thread_exit():
+    client = AsyncioClient(run_mode=RunMode.CALLING_THREAD)
+    loops = weakref.WeakSet()
+
+    def use_session():
+        loops.add(client.loop)
+        client.client_session
+
+    for _ in range(5):
+        thread = threading.Thread(target=use_session)
+        thread.start()
+        thread.join()
+    gc.collect()
+
+    assert len(client._client_sessions) == 0
+    assert len(loops) == 0
+    client.close()
+
+
+def test_calling_thread_run_mode_with_loop():
+    with pytest.raises(ValueError):
+        AsyncioClient(
+            run_mode=RunMode.CALLING_THREAD,
+            loop=mock.Mock(spec=asyncio.AbstractEventLoop),
+        )
+
+
 def test_fail_on_unknown_run_mode():
     with pytest.raises(ValueError):
         AsyncioClient(run_mode="unknown/invalid")
@@ -70,14 +180,49 @@ def test_get_client_session(mock_client_session):
     mock_client_session.assert_has_calls([mock.call(loop=loop1), mock.call(loop=loop2)])
     assert mock_client_session.call_count == 2
 
-    assert loop1._bravado_asyncio_client_session == mock.sentinel.session1
-    assert loop2._bravado_asyncio_client_session == mock.sentinel.session2
-
     assert s1 == mock.sentinel.session1
     assert s2 == mock.sentinel.session2
     assert s3 == s1
 
 
+def test_client_session_shared_by_config(mock_client_session):
+    """Clients with equal session settings share a session, others get their own."""
+    loop = mock.Mock(name="loop", spec=asyncio.AbstractEventLoop)
+    mock_client_session.side_effect = [mock.sentinel.session1, mock.sentinel.session2]
+
+    client1 = AsyncioClient(loop=loop)
+    client2 = AsyncioClient(loop=loop, session_config=SessionConfig())
+    client3 = AsyncioClient(
+        loop=loop,
+        session_config=SessionConfig(timeout=aiohttp.ClientTimeout(total=1)),
+    )
+
+    assert client1.client_session is mock.sentinel.session1
+    assert client2.client_session is mock.sentinel.session1
+    assert client3.client_session is mock.sentinel.session2
+    assert mock_client_session.call_args[1]["timeout"] == client3.session_config.timeout
+
+
+def test_client_close_releases_session(mock_client_session):
+    loop = mock.Mock(name="loop", spec=asyncio.AbstractEventLoop)
+    loop.is_closed.return_value = False
+    loop.is_running.return_value = False
+    client1 = AsyncioClient(loop=loop)
+    client2 = AsyncioClient(loop=loop)
+    session = client1.client_session
+    assert client2.client_session is session
+
+    client1.close()
+    assert loop.run_until_complete.call_count == 0
+
+    client2.close()
+    loop.run_until_complete.assert_called_once_with(session.close.return_value)
+
+    # the next request creates a fresh session
+    client1.client_session
+    assert mock_client_session.call_count == 2
+
+
 @pytest.mark.usefixtures("mock_aiohttp_version")
 def test_request(asyncio_client, mock_client_session, request_params):
     """Make sure request calls the right functions and instantiates the HttpFuture correctly."""
@@ -88,6 +233,7 @@ def test_request(asyncio_client, mock_client_session, request_params):
         name="future_class", spec=HttpFuture
     )
     asyncio_client.future_adapter = mock.Mock(name="future_adapter", spec=FutureAdapter)
+    asyncio_client.response_release = ResponseReleaseConfig(drain_threshold=0)
 
     asyncio_client.request(request_params)
 
@@ -95,22 +241,29 @@ def test_request(asyncio_client, mock_client_session, request_params):
     mock_client_session.return_value.request.assert_called_once_with(
         method=request_params["method"],
         url=request_params["url"],
-        params=None,
         data=mock.ANY,
         headers={},
         allow_redirects=False,
         skip_auto_headers=["Content-Type"],
         ssl=None,
+        trace_request_ctx=None,
         timeout=None,
     )
-    assert mock_client_session.return_value.request.call_args[1]["data"]._fields == []
+    assert mock_client_session.return_value.request.call_args[1]["data"] == b""
     asyncio_client.run_coroutine_func.assert_called_once_with(
         mock_client_session.return_value.request.return_value, loop=asyncio_client.loop
     )
     asyncio_client.future_adapter.assert_called_once_with(
-        asyncio_client.run_coroutine_func.return_value
+        asyncio_client.run_coroutine_func.return_value,
+        loop=asyncio_client.loop,
+        cancel_on_timeout=True,
+    )
+    asyncio_client.response_adapter.assert_called_once_with(
+        loop=asyncio_client.loop,
+        json_decode_config=None,
+        response_size=None,
+        max_size=None,
     )
-    asyncio_client.response_adapter.assert_called_once_with(loop=asyncio_client.loop)
     asyncio_client.bravado_future_class.assert_called_once_with(
         asyncio_client.future_adapter.return_value,
         asyncio_client.response_adapter.return_value,
@@ -127,25 +280,26 @@ def test_simple_get(asyncio_client, mock_client_session, request_params):
 
     mock_client_session.return_value.request.assert_called_once_with(
         method=request_params["method"],
-        url=request_params["url"],
-        params=request_params["params"],
+        url=request_params["url"] + "?foo=bar",
         data=mock.ANY,
         headers={},
         allow_redirects=False,
         skip_auto_headers=["Content-Type"],
         ssl=None,
+        trace_request_ctx=None,
         timeout=None,
     )
-    assert mock_client_session.return_value.request.call_args[1]["data"]._fields == []
+    assert mock_client_session.return_value.request.call_args[1]["data"] == b""
 
 
 def test_int_param(asyncio_client, mock_client_session, request_params):
     request_params["params"] = {"foo": 5}
 
     asyncio_client.request(request_params)
-    assert mock_client_session.return_value.request.call_args[1]["params"] == {
-        "foo": "5"
-    }
+    assert (
+        mock_client_session.return_value.request.call_args[1]["url"]
+        == request_params["url"] + "?foo=5"
+    )
 
 
 @pytest.mark.usefixtures("mock_aiohttp_version")
@@ -173,20 +327,32 @@ def test_formdata(
     mock_client_session.return_value.request.assert_called_once_with(
         method=request_params["method"],
         url=request_params["url"],
-        params=None,
         data=mock.ANY,
         headers={},
         allow_redirects=False,
         skip_auto_headers=["Content-Type"],
         ssl=None,
+        trace_request_ctx=None,
         timeout=None,
     )
 
-    field_data = mock_client_session.return_value.request.call_args[1]["data"]._fields[
-        0
+    data = mock_client_session.return_value.request.call_args[1]["data"]
+    assert data.content_type == "application/x-www-form-urlencoded"
+    assert data._value == "{}={}".format(param_name, expected_param_value).encode()
+
+
+def test_list_formdata_with_file(asyncio_client, mock_client_session, request_params):
+    request_params["method"] = "POST"
+    request_params["data"] = {"tags": ["a", 1]}
+    request_params["files"] = [("picture", ("filename", mock.sentinel.stream))]
+
+    asyncio_client.request(request_params)
+
+    fields = mock_client_session.return_value.request.call_args[1]["data"]._fields
+    assert [(field[0]["name"], field[2]) for field in fields] == [
+        ("tags", ["a", "1"]),
+        ("picture", mock.sentinel.stream),
     ]
-    assert field_data[0]["name"] == param_name
-    assert field_data[2] == expected_param_value
 
 
 def test_file_data(asyncio_client, mock_client_session, request_params):
@@ -291,3 +457,262 @@ def test_use_custom_ssl_ca_and_cert(mock_client_session, mock_create_default_con
     assert mock_create_default_context.return_value.load_cert_chain.call_args[0] == (
         "my_cert",
     )
+
+
+def test_unix_socket_for_all_hosts():
+    client = AsyncioClient(unix_socket_path="/run/sidecar.sock")
+
+    assert client.session_config.unix_socket_path == "/run/sidecar.sock"
+    assert (
+        client.get_session_config("http://petstore.swagger.io/v2/pet")
+        is client.session_config
+    )
+
+
+@pytest.mark.parametrize(
+    "url, expected_unix_socket_path",
+    (
+        ("http://petstore.swagger.io/v2/pet", "/run/sidecar.sock"),
+        ("http://users:8080/v1/user", "/run/sidecar.sock"),
+        ("http://users:8081/v1/user", None),
+        ("http://example.com/", None),
+    ),
+)
+def test_unix_socket_for_selected_hosts(url, expected_unix_socket_path):
+    client = AsyncioClient(
+        unix_socket_path="/run/sidecar.sock",
+        unix_socket_hosts=["petstore.swagger.io", "users:8080"],
+    )
+
+    assert client.session_config.unix_socket_path is None
+    assert client.get_session_config(url).unix_socket_path == expected_unix_socket_path
+
+
+def test_request_uses_session_for_url(mock_client_session, request_params):
+    client = get_asyncio_client()
+    client.unix_socket_hosts = frozenset(["swagger.py"])
+    client.unix_socket_session_config = SessionConfig(unix_socket_path="/tmp/sock")
+
+    with mock.patch(
+        "bravado_asyncio.session_registry.create_client_session", autospec=True
+    ) as mock_create_client_session:
+        client.request(request_params)
+
+    mock_create_client_session.assert_called_once_with(
+        client.loop, client.unix_socket_session_config
+    )
+    assert mock_create_client_session.return_value.request.call_args[1]["url"] == (
+        request_params["url"]
+    )
+
+
+def test_compression_unavailable_encoding():
+    with pytest.raises(ValueError):
+        AsyncioClient(compression=CompressionConfig(encoding="lzma"))
+
+
+def test_compressed_request(asyncio_client, mock_client_session, request_params):
+    asyncio_client.compression = CompressionConfig(min_size=10)
+    request_params["method"] = "PUT"
+    request_params["headers"] = {"Content-Type": "application/json"}
+    request_params["data"] = json.dumps({"name": "Lili", "photoUrls": []})
+
+    asyncio_client.request(request_params)
+
+    call_kwargs = mock_client_session.return_value.request.call_args[1]
+    assert call_kwargs["headers"]["Content-Encoding"] == "gzip"
+    assert "gzip" in call_kwargs["headers"]["Accept-Encoding"]
+    assert json.loads(gzip.decompress(call_kwargs["data"])) == {
+        "name": "Lili",
+        "photoUrls": [],
+    }
+
+
+def test_compression_without_headers(
+    asyncio_client, mock_client_session, request_params
+):
+    asyncio_client.compression = CompressionConfig()
+
+    asyncio_client.request(request_params)
+
+    call_kwargs = mock_client_session.return_value.request.call_args[1]
+    assert "gzip" in call_kwargs["headers"]["Accept-Encoding"]
+    # the headers shared by requests without any are left alone
+    assert EMPTY_HEADERS == {}
+
+
+def test_headers_of_consecutive_requests_are_independent(
+    asyncio_client, mock_client_session, request_params
+):
+    tracer = Tracer(TracingConfig(InMemorySpanSink()))
+
+    def sent_headers(compression, tracer):
+        asyncio_client.compression = compression
+        asyncio_client._tracer = tracer
+        asyncio_client.request(dict(request_params))
+        return mock_client_session.return_value.request.call_args[1]["headers"]
+
+    first = sent_headers(CompressionConfig(), tracer)
+    first_copy = dict(first)
+    second = sent_headers(None, None)
+    third = sent_headers(None, tracer)
+
+    assert "traceparent" in first and "gzip" in first["Accept-Encoding"]
+    assert second is EMPTY_HEADERS
+    assert third is not first
+    assert third["traceparent"] != first["traceparent"]
+    assert "Accept-Encoding" not in third
+    # requests don't change the headers of earlier ones, nor the headers shared by requests without any
+    assert first == first_copy
+    assert EMPTY_HEADERS == {}
+
+
+def test_request_record(asyncio_client, mock_client_session, request_params):
+    asyncio_client._recorder = mock.Mock(name="recorder")
+    asyncio_client.response_release = ResponseReleaseConfig(drain_threshold=0)
+
+    asyncio_client.request(request_params)
+
+    asyncio_client._recorder.record.assert_called_once_with(
+        mock_client_session.return_value.request.return_value,
+        "GET",
+        request_params["url"],
+        {},
+        b"",
+        None,
+    )
+    asyncio_client.run_coroutine_func.assert_called_once_with(
+        asyncio_client._recorder.record.return_value, loop=asyncio_client.loop
+    )
+    asyncio_client.close()
+    asyncio_client._recorder.close.assert_called_once_with()
+
+
+def test_request_replay(asyncio_client, mock_client_session, request_params):
+    asyncio_client._replayer = mock.Mock(name="replayer")
+    asyncio_client.response_release = ResponseReleaseConfig(drain_threshold=0)
+
+    asyncio_client.request(request_params)
+
+    assert mock_client_session.call_count == 0
+    asyncio_client._replayer.replay.assert_called_once_with(
+        "GET", request_params["url"]
+    )
+    asyncio_client.run_coroutine_func.assert_called_once_with(
+        asyncio_client._replayer.replay.return_value, loop=asyncio_client.loop
+    )
+
+
+def test_recording_modes(tmp_path):
+    path = str(tmp_path / "traffic.rec")
+    client = AsyncioClient(recording=RecordingConfig(path, mode=RecordingMode.RECORD))
+    assert client._recorder is not None and client._replayer is None
+    client.close()
+
+    client = AsyncioClient(recording=RecordingConfig(path, replay_latency=True))
+    assert client._recorder is None and client._replayer.replay_latency is True
+
+
+def test_batch_submissions():
+    client = AsyncioClient(batch_submissions=True)
+
+    assert client.run_coroutine_func is submit_coroutine
+
+
+def test_batch(asyncio_client, request_params):
+    with mock.patch(
+        "bravado_asyncio.http_client.get_submission_queue", autospec=True
+    ) as mock_get_submission_queue:
+        with asyncio_client.batch():
+            with asyncio_client.batch():
+                future1 = asyncio_client.request(request_params).future.future
+            future2 = asyncio_client.request(request_params).future.future
+            assert mock_get_submission_queue.call_count == 0
+
+        future3 = asyncio_client.request(request_params).future.future
+
+    assert asyncio_client.run_coroutine_func.call_count == 1
+    assert future3 is asyncio_client.run_coroutine_func.return_value
+    mock_get_submission_queue.assert_called_once_with(asyncio_client.loop)
+    submissions = mock_get_submission_queue.return_value.enqueue.call_args[0][0]
+    assert [future for _, future in submissions] == [future1, future2]
+
+
+def test_batch_full_asyncio(asyncio_client, request_params):
+    asyncio_client.run_mode = RunMode.FULL_ASYNCIO
+
+    with asyncio_client.batch():
+        asyncio_client.request(request_params)
+
+    assert asyncio_client.run_coroutine_func.call_count == 1
+
+
+@pytest.mark.usefixtures("mock_aiohttp_version")
+def test_request_drains_small_bodies(
+    asyncio_client, mock_client_session, request_params
+):
+    with mock.patch(
+        "bravado_asyncio.http_client.drain_small_body", new_callable=mock.Mock
+    ) as mock_drain:
+        asyncio_client.request(request_params)
+
+    mock_drain.assert_called_once_with(
+        mock_client_session.return_value.request.return_value, 64 * 1024
+    )
+    asyncio_client.run_coroutine_func.assert_called_once_with(
+        mock_drain.return_value, loop=asyncio_client.loop
+    )
+
+
+@pytest.mark.usefixtures("mock_aiohttp_version")
+def test_request_track_leaks(asyncio_client, mock_client_session, request_params):
+    asyncio_client.response_release = ResponseReleaseConfig(track_leaks=True)
+
+    with mock.patch(
+        "bravado_asyncio.http_client.track_response", autospec=True
+    ) as mock_track_response:
+        http_future = asyncio_client.request(request_params)
+
+    mock_track_response.assert_called_once_with(
+        http_future, asyncio_client.run_coroutine_func.return_value, asyncio_client.loop
+    )
+
+
+def test_unmarshal_executor_other_run_mode():
+    with pytest.raises(ValueError):
+        AsyncioClient(
+            run_mode=RunMode.CALLING_THREAD,
+            unmarshal_executor=mock.Mock(spec=concurrent.futures.Executor),
+        )
+
+
+def test_unmarshal_executor_json_decode_config():
+    executor = mock.Mock(spec=concurrent.futures.Executor)
+    json_decode_config = JsonDecodeConfig(offload_threshold=1)
+
+    assert (
+        AsyncioClient(unmarshal_executor=executor).json_decode_config
+        == JsonDecodeConfig()
+    )
+    assert (
+        AsyncioClient(
+            unmarshal_executor=executor, json_decode_config=json_decode_config
+        ).json_decode_config
+        is json_decode_config
+    )
+
+
+@pytest.mark.usefixtures("mock_aiohttp_version")
+def test_request_unmarshal_in_background(
+    asyncio_client, mock_client_session, request_params
+):
+    asyncio_client.unmarshal_executor = mock.Mock(spec=concurrent.futures.Executor)
+    asyncio_client.bravado_future_class = mock.Mock(
+        name="future_class", spec=ThreadHttpFuture
+    )
+
+    http_future = asyncio_client.request(request_params)
+
+    http_future.unmarshal_in_background.assert_called_once_with(
+        asyncio_client.unmarshal_executor
+    )
@@ -0,0 +1,438 @@
+import asyncio
+import concurrent.futures
+import io
+import itertools
+import threading
+from unittest import mock
+
+import aiohttp
+import pytest
+from aiohttp import web
+from bravado.client import SwaggerClient
+from bravado.config import bravado_config_from_config_dict
+from bravado.config import CONFIG_DEFAULTS
+from bravado.config import RequestConfig
+from bravado.exception import BravadoTimeoutError
+from bravado.exception import HTTPNotFound
+
+from bravado_asyncio.definitions import SessionConfig
+from bravado_asyncio.future_adapter import FutureAdapter
+from bravado_asyncio.http_client import AsyncioClient
+from bravado_asyncio.http_client import RunMode
+from bravado_asyncio.http_future import ThreadHttpFuture
+from bravado_asyncio.response_adapter import AioHTTPResponseAdapter
+from testing.integration_server import create_app
+
+
+@pytest.fixture
+def mock_response():
+    return mock.Mock(name="response", spec=aiohttp.ClientResponse)
+
+
+def make_http_future(loop, request_future):
+    http_future = ThreadHttpFuture(
+        FutureAdapter(request_future), AioHTTPResponseAdapter(loop)
+    )
+    # unmarshalling is covered by bravado's own tests
+    http_future.response = mock.Mock(
+        name="response method", return_value=mock.sentinel.bravado_response
+    )
+    return http_future
+
+
+def test_response_future_on_loop_thread(loop_runner, mock_response):
+    request_future = concurrent.futures.Future()
+    http_future = make_http_future(loop_runner.loop, request_future)
+    threads = []
+    http_future.response.side_effect = lambda **_: threads.append(
+        threading.current_thread()
+    )
+
+    response_future = http_future.response_future(fallback_result=None)
+    assert not response_future.done()
+
+    loop_runner.loop.call_soon_threadsafe(request_future.set_result, mock_response)
+    response_future.result(timeout=1)
+
+    mock_response.read.assert_awaited_once_with()
+    http_future.response.assert_called_once_with(fallback_result=None)
+    # LoopRunner is the thread running the event loop
+    assert threads == [loop_runner]
+
+
+def test_add_done_callback_in_executor(loop_runner, mock_response):
+    request_future = concurrent.futures.Future()
+    request_future.set_result(mock_response)
+    http_future = make_http_future(loop_runner.loop, request_future)
+    callback_called = threading.Event()
+    results = []
+
+    def callback(response_future):
+        results.append(response_future.result())
+        callback_called.set()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        http_future.add_done_callback(callback, executor=executor)
+        assert callback_called.wait(timeout=1)
+
+    assert results == [mock.sentinel.bravado_response]
+
+
+def test_response_future_executor_shut_down(loop_runner, mock_response):
+    request_future = concurrent.futures.Future()
+    request_future.set_result(mock_response)
+    http_future = make_http_future(loop_runner.loop, request_future)
+    executor = concurrent.futures.ThreadPoolExecutor()
+    executor.shutdown()
+    callback_results = []
+
+    response_future = http_future.response_future(executor=executor)
+    http_future.add_done_callback(callback_results.append, executor=executor)
+
+    assert isinstance(response_future.exception(timeout=1), RuntimeError)
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0.01), loop_runner.loop).result()
+    assert len(callback_results) == 1
+    assert isinstance(callback_results[0].exception(), RuntimeError)
+    http_future.response.assert_not_called()
+
+
+def test_response_future_error(loop_runner):
+    request_future = concurrent.futures.Future()
+    request_future.set_exception(aiohttp.ClientConnectionError())
+    http_future = make_http_future(loop_runner.loop, request_future)
+    error = RuntimeError()
+    http_future.response.side_effect = error
+
+    response_future = http_future.response_future()
+
+    assert response_future.exception(timeout=1) is error
+
+
+def test_response_future_cancelled(loop_runner, mock_response):
+    request_future = concurrent.futures.Future()
+    http_future = make_http_future(loop_runner.loop, request_future)
+
+    response_future = http_future.response_future()
+    response_future.cancel()
+    request_future.set_result(mock_response)
+
+    # give the loop a chance to read the body and try to unmarshal the response
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0.01), loop_runner.loop).result()
+    http_future.response.assert_not_called()
+
+
+def test_response_future_loop_closed(mock_response):
+    loop = asyncio.new_event_loop()
+    loop.close()
+    request_future = concurrent.futures.Future()
+    request_future.set_result(mock_response)
+    http_future = make_http_future(loop, request_future)
+
+    assert http_future.response_future().result() is mock.sentinel.bravado_response
+
+
+def test_add_done_callback_error(loop_runner, mock_response, caplog):
+    request_future = concurrent.futures.Future()
+    request_future.set_result(mock_response)
+    http_future = make_http_future(loop_runner.loop, request_future)
+    callback_called = threading.Event()
+
+    def callback(response_future):
+        callback_called.set()
+        raise ValueError()
+
+    http_future.add_done_callback(callback)
+    assert callback_called.wait(timeout=1)
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0.01), loop_runner.loop).result()
+
+    assert "Error in response callback" in caplog.text
+
+
+@pytest.mark.parametrize("has_operation", (True, False))
+def test_response_released_after_unmarshalling(has_operation):
+    response_adapter = mock.Mock(name="response adapter", spec=AioHTTPResponseAdapter)
+    response_adapter.swagger_result = None
+    http_future = ThreadHttpFuture(
+        FutureAdapter(concurrent.futures.Future()),
+        response_adapter,
+        mock.Mock(name="operation") if has_operation else None,
+    )
+
+    with mock.patch("bravado.http_future.unmarshal_response", autospec=True):
+        http_future._get_swagger_result(response_adapter)
+
+    assert response_adapter.release.called is has_operation
+
+
+@pytest.mark.parametrize(
+    "error, also_return_response",
+    ((None, True), (HTTPNotFound(mock.Mock(status_code=404)), False)),
+)
+def test_response_kept_for_caller(error, also_return_response):
+    response_adapter = mock.Mock(name="response adapter", spec=AioHTTPResponseAdapter)
+    response_adapter.swagger_result = None
+    http_future = ThreadHttpFuture(
+        FutureAdapter(concurrent.futures.Future()),
+        response_adapter,
+        mock.Mock(name="operation"),
+        RequestConfig(
+            {"also_return_response": also_return_response},
+            also_return_response_default=False,
+        ),
+    )
+
+    with mock.patch(
+        "bravado.http_future.unmarshal_response", autospec=True, side_effect=error
+    ):
+        try:
+            http_future._get_swagger_result(response_adapter)
+        except HTTPNotFound:
+            pass
+
+    # the caller may still read the body, through the response or the error
+    response_adapter.release.assert_not_called()
+
+
+@pytest.mark.parametrize("run_mode", (RunMode.THREAD, RunMode.CALLING_THREAD))
+def test_large_error_body_can_be_read(run_mode):
+    body = b"not found" * 30000
+
+    @web.middleware
+    async def large_not_found(request, handler):
+        if request.path != "/pet/5":
+            return await handler(request)
+        # chunked, and too large to be read before unmarshalling
+        response = web.StreamResponse(
+            status=404, headers={"Content-Type": "text/plain"}
+        )
+        await response.prepare(request)
+        for start in range(0, len(body), 65536):
+            # the rest of the body is still on its way when the response has been unmarshalled
+            await asyncio.sleep(0.01)
+            end = start + 65536
+            await response.write(body[start:end])
+        await response.write_eof()
+        return response
+
+    app = create_app()
+    app.middlewares.append(large_not_found)
+    http_client = AsyncioClient(
+        run_mode=run_mode, session_config=SessionConfig(in_process_app=app)
+    )
+    try:
+        client = SwaggerClient.from_url(
+            "http://in-process/swagger.yaml",
+            http_client=http_client,
+            config={"validate_swagger_spec": False},
+        )
+        with pytest.raises(HTTPNotFound) as excinfo:
+            client.pet.getPetById(petId=5).response(timeout=5)
+        assert excinfo.value.response.text == body.decode()
+    finally:
+        http_client.close()
+
+
+@pytest.fixture
+def mock_unmarshal_response():
+    with mock.patch(
+        "bravado.http_future.unmarshal_response", autospec=True
+    ) as mock_unmarshal_response:
+        yield mock_unmarshal_response
+
+
+def make_background_future(loop, request_future, executor):
+    operation = mock.Mock(name="operation")
+    operation.swagger_spec.config = {
+        "bravado": bravado_config_from_config_dict(CONFIG_DEFAULTS)
+    }
+    http_future = ThreadHttpFuture(
+        FutureAdapter(request_future), AioHTTPResponseAdapter(loop), operation
+    )
+    http_future.unmarshal_in_background(executor)
+    return http_future
+
+
+def test_unmarshal_in_background(loop_runner, mock_response, mock_unmarshal_response):
+    threads = []
+
+    def unmarshal_response(incoming_response, *_):
+        threads.append(threading.current_thread())
+        incoming_response.swagger_result = mock.sentinel.swagger_result
+
+    mock_unmarshal_response.side_effect = unmarshal_response
+    request_future = concurrent.futures.Future()
+
+    with concurrent.futures.ThreadPoolExecutor(thread_name_prefix="unmarshal") as pool:
+        http_future = make_background_future(loop_runner.loop, request_future, pool)
+        request_future.set_result(mock_response)
+        assert http_future.response(timeout=1).result is mock.sentinel.swagger_result
+
+    mock_response.read.assert_awaited_once_with()
+    assert len(threads) == 1 and threads[0].name.startswith("unmarshal")
+
+
+def test_unmarshal_in_background_error(
+    loop_runner, mock_response, mock_unmarshal_response
+):
+    mock_unmarshal_response.side_effect = ValueError
+    request_future = concurrent.futures.Future()
+    request_future.set_result(mock_response)
+
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        http_future = make_background_future(loop_runner.loop, request_future, pool)
+        with pytest.raises(ValueError):
+            http_future.response(timeout=1)
+        assert (
+            http_future.response(
+                timeout=1, fallback_result=42, exceptions_to_catch=(ValueError,)
+            ).result
+            == 42
+        )
+
+    assert mock_unmarshal_response.call_count == 1
+
+
+def test_unmarshal_in_background_timeout(loop_runner):
+    request_future = concurrent.futures.Future()
+
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        http_future = make_background_future(loop_runner.loop, request_future, pool)
+        with pytest.raises(BravadoTimeoutError):
+            http_future.response(timeout=0.01)
+
+    assert request_future.cancelled()
+
+
+def test_unmarshal_in_background_slower_than_timeout(
+    loop_runner, mock_response, mock_unmarshal_response
+):
+    unmarshalling = threading.Event()
+    done_unmarshalling = threading.Event()
+
+    def unmarshal_response(incoming_response, *_):
+        unmarshalling.set()
+        done_unmarshalling.wait(timeout=1)
+        incoming_response.swagger_result = mock.sentinel.swagger_result
+
+    mock_unmarshal_response.side_effect = unmarshal_response
+    request_future = concurrent.futures.Future()
+    request_future.set_result(mock_response)
+
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        http_future = make_background_future(loop_runner.loop, request_future, pool)
+        assert unmarshalling.wait(timeout=1)
+        with pytest.raises(BravadoTimeoutError):
+            http_future.response(timeout=0.01)
+        done_unmarshalling.set()
+        assert http_future.response(timeout=1).result is mock.sentinel.swagger_result
+
+    # the response isn't unmarshalled a second time while the background one is still busy
+    assert mock_unmarshal_response.call_count == 1
+
+
+def test_unmarshal_in_background_with_callbacks():
+    http_client = AsyncioClient(
+        session_config=SessionConfig(in_process_app=create_app()),
+        unmarshal_executor=concurrent.futures.ThreadPoolExecutor(max_workers=4),
+    )
+    try:
+        client = SwaggerClient.from_url(
+            "http://in-process/swagger.yaml",
+            http_client=http_client,
+            config={"validate_swagger_spec": False},
+        )
+        results = []
+        for pet_id in range(10, 30):
+            response_future = concurrent.futures.Future()
+            client.pet.getPetById(petId=pet_id).add_done_callback(
+                # on the loop thread, which the background unmarshalling needs as well
+                lambda result, response_future=response_future: response_future.set_result(
+                    result.result().result
+                )
+            )
+            results.append(response_future)
+
+        assert [future.result(timeout=5).id for future in results] == list(
+            range(10, 30)
+        )
+    finally:
+        http_client.close()
+        http_client.unmarshal_executor.shutdown()
+
+
+def test_unmarshal_in_background_without_operation(loop_runner):
+    http_future = ThreadHttpFuture(
+        FutureAdapter(concurrent.futures.Future()),
+        AioHTTPResponseAdapter(loop_runner.loop),
+    )
+    executor = mock.Mock(name="executor", spec=concurrent.futures.Executor)
+
+    http_future.unmarshal_in_background(executor)
+
+    assert http_future._background_result is None
+
+
+@pytest.fixture
+def download_response(mock_response):
+    mock_response.status = 200
+    mock_response.content = mock.Mock(name="content", spec=aiohttp.StreamReader)
+    mock_response.content.at_eof.return_value = False
+    mock_response.content.readany = mock.AsyncMock(
+        side_effect=itertools.chain([b"abc", b"defg"], itertools.repeat(b""))
+    )
+    return mock_response
+
+
+def run_pending_callbacks(loop):
+    # responses are released with call_soon_threadsafe
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(timeout=1)
+
+
+def make_download_future(loop, response):
+    request_future = concurrent.futures.Future()
+    request_future.set_result(response)
+    return ThreadHttpFuture(FutureAdapter(request_future), AioHTTPResponseAdapter(loop))
+
+
+def test_download_to_file(loop_runner, download_response):
+    http_future = make_download_future(loop_runner.loop, download_response)
+    target = io.BytesIO()
+
+    assert http_future.download(target, timeout=1) == 7
+
+    assert target.getvalue() == b"abcdefg"
+    run_pending_callbacks(loop_runner.loop)
+    download_response.release.assert_called_once_with()
+
+
+def test_download_to_buffer(loop_runner, download_response):
+    http_future = make_download_future(loop_runner.loop, download_response)
+    buffer = bytearray(10)
+
+    assert http_future.download(buffer, timeout=1) == 7
+
+    assert buffer[:7] == b"abcdefg"
+
+
+def test_download_to_buffer_too_small(loop_runner, download_response):
+    http_future = make_download_future(loop_runner.loop, download_response)
+
+    with pytest.raises(ValueError):
+        http_future.download(bytearray(6), timeout=1)
+
+    run_pending_callbacks(loop_runner.loop)
+    download_response.release.assert_called_once_with()
+
+
+def test_download_error_status(loop_runner, download_response):
+    download_response.status = 404
+    download_response.text.return_value = "not found"
+    http_future = make_download_future(loop_runner.loop, download_response)
+    target = io.BytesIO()
+
+    with pytest.raises(HTTPNotFound):
+        http_future.download(target, timeout=1)
+
+    assert target.getvalue() == b""
+    run_pending_callbacks(loop_runner.loop)
+    download_response.release.assert_called_once_with()
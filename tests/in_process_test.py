@@ -0,0 +1,143 @@
+import asyncio
+from unittest import mock
+
+import pytest
+from aiohttp import web
+from bravado.client import SwaggerClient
+
+from bravado_asyncio.definitions import ResponseSizeConfig
+from bravado_asyncio.definitions import SessionConfig
+from bravado_asyncio.http_client import AsyncioClient
+from bravado_asyncio.http_client import RunMode
+from bravado_asyncio.in_process import create_transport_pair
+from bravado_asyncio.in_process import HIGH_WATER_MARK
+from testing.integration_server import create_app
+
+
+def run_loop_once(loop):
+    loop.run_until_complete(asyncio.sleep(0))
+
+
+@pytest.fixture
+def transports(event_loop):
+    client_protocol = mock.Mock(name="client protocol", spec=asyncio.Protocol)
+    server_protocol = mock.Mock(name="server protocol", spec=asyncio.Protocol)
+    client_protocol.eof_received.return_value = None
+    client_transport, server_transport = create_transport_pair(
+        event_loop, client_protocol, server_protocol
+    )
+    return client_transport, server_transport, client_protocol, server_protocol
+
+
+def test_write_delivers_in_order(event_loop, transports):
+    client_transport, server_transport, _, server_protocol = transports
+
+    client_transport.write(b"GET / ")
+    client_transport.writelines([b"HTTP/1.1", memoryview(b"\r\n")])
+    assert server_protocol.data_received.call_count == 0
+
+    run_loop_once(event_loop)
+    assert server_protocol.data_received.call_args_list == [
+        mock.call(b"GET / "),
+        mock.call(b"HTTP/1.1\r\n"),
+    ]
+    assert server_transport.get_extra_info("peername") == ("127.0.0.1", 0)
+
+
+def test_pause_reading_applies_backpressure(event_loop, transports):
+    client_transport, server_transport, client_protocol, server_protocol = transports
+    server_transport.pause_reading()
+
+    client_transport.write(b"x" * HIGH_WATER_MARK)
+    client_transport.write(b"x")
+    run_loop_once(event_loop)
+    assert server_protocol.data_received.call_count == 0
+    client_protocol.pause_writing.assert_called_once_with()
+
+    server_transport.resume_reading()
+    run_loop_once(event_loop)
+    assert server_protocol.data_received.call_count == 2
+    client_protocol.resume_writing.assert_called_once_with()
+
+
+def test_close_delivers_written_data_first(event_loop, transports):
+    client_transport, server_transport, client_protocol, server_protocol = transports
+
+    server_transport.write(b"HTTP/1.1 200 OK\r\n")
+    server_transport.close()
+    assert server_transport.is_closing()
+    run_loop_once(event_loop)
+
+    server_protocol.connection_lost.assert_called_once_with(None)
+    client_protocol.data_received.assert_called_once_with(b"HTTP/1.1 200 OK\r\n")
+    client_protocol.eof_received.assert_called_once_with()
+    assert client_transport.is_closing()
+    run_loop_once(event_loop)
+    client_protocol.connection_lost.assert_called_once_with(None)
+
+
+def test_close_discards_unread_data(event_loop, transports):
+    client_transport, server_transport, _, server_protocol = transports
+    server_transport.pause_reading()
+    client_transport.write(b"data")
+
+    server_transport.close()
+    client_transport.write(b"more data")
+    run_loop_once(event_loop)
+
+    assert server_protocol.data_received.call_count == 0
+    server_protocol.connection_lost.assert_called_once_with(None)
+
+
+@pytest.mark.parametrize("force_close", (None, True))
+def test_swagger_client(force_close):
+    client = AsyncioClient(
+        run_mode=RunMode.CALLING_THREAD,
+        session_config=SessionConfig(
+            in_process_app=create_app(), force_close=force_close
+        ),
+        response_size=ResponseSizeConfig(spill_threshold=64 * 1024),
+    )
+    swagger_client = SwaggerClient.from_url(
+        "http://in-process/swagger.yaml", http_client=client
+    )
+
+    for _ in range(3):
+        pet = swagger_client.pet.getPetById(petId=42).result(timeout=1)
+        assert pet.name == "Lili"
+    response = client.request(
+        {"method": "GET", "url": "http://in-process/blob?chunked=1&size=1000000"}
+    ).result(timeout=5)
+    assert len(response.raw_buffer) == 1000000
+    client.close()
+
+
+def test_low_level_handler_and_signals():
+    events = []
+
+    async def handler(request):
+        return web.Response(text="{} {}".format(request.method, request.path_qs))
+
+    async def on_startup(app):
+        events.append("startup")
+
+    async def on_cleanup(app):
+        events.append("cleanup")
+
+    app = web.Application()
+    app.router.add_get("/ping", handler)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+
+    for in_process_app in (handler, app):
+        client = AsyncioClient(
+            run_mode=RunMode.CALLING_THREAD,
+            session_config=SessionConfig(in_process_app=in_process_app),
+        )
+        response = client.request(
+            {"method": "GET", "url": "http://in-process/ping", "params": {"a": 1}}
+        ).result(timeout=1)
+        assert response.text == "GET /ping?a=1"
+        client.close()
+
+    assert events == ["startup", "cleanup"]
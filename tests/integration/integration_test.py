@@ -1,11 +1,17 @@
 import asyncio
+import concurrent.futures
 import io
+import json
 import multiprocessing
 import os.path
+import shutil
+import socket
+import tempfile
+import threading
 import time
 import urllib
-from asyncio import run_coroutine_threadsafe
 from concurrent.futures import CancelledError
+from unittest import mock
 
 import ephemeral_port_reserve
 import monotonic
@@ -20,9 +26,29 @@ from bravado.requests_client import RequestsClient
 from bravado_core.model import Model
 
 from bravado_asyncio import http_client
+from bravado_asyncio import loadgen
+from bravado_asyncio import session_registry
 from bravado_asyncio import thread_loop
+from bravado_asyncio.definitions import CompressionConfig
+from bravado_asyncio.definitions import RecordingConfig
+from bravado_asyncio.definitions import RecordingMode
+from bravado_asyncio.definitions import ResponseReleaseConfig
+from bravado_asyncio.definitions import ResponseSizeConfig
+from bravado_asyncio.definitions import SessionConfig
+from bravado_asyncio.definitions import SpecCacheConfig
+from bravado_asyncio.metrics import metrics
+from bravado_asyncio.metrics import RESPONSES_SPILLED
+from bravado_asyncio.metrics import SPEC_CACHE_HITS
+from bravado_asyncio.metrics import SPEC_CACHE_MISSES
+from bravado_asyncio.metrics import SPEC_CACHE_REVALIDATIONS
+from bravado_asyncio.recording import read_recording
+from bravado_asyncio.recording import ReplayMissError
+from bravado_asyncio.response_adapter import ResponseTooLargeError
+from bravado_asyncio.spec_cache import _get_write_executor
+from testing.integration_server import create_app
 from testing.integration_server import INTEGRATION_SERVER_HOST
 from testing.integration_server import start_integration_server
+from testing.integration_server import wait_for_unix_socket
 
 
 shm_request_received = None
@@ -61,12 +87,46 @@ def integration_server():
     server_process.join(timeout=1)
 
 
+@pytest.fixture(scope="module")
+def unix_socket_server():
+    if not hasattr(socket, "AF_UNIX"):  # pragma: no cover
+        pytest.skip("Unix domain sockets are not supported on this platform")
+
+    socket_dir = tempfile.mkdtemp()
+    socket_path = os.path.join(socket_dir, "server.sock")
+    server_process = multiprocessing.Process(
+        target=start_integration_server,
+        args=(None, multiprocessing.Value("i", 0, lock=False), socket_path),
+    )
+    server_process.daemon = True
+    server_process.start()
+    wait_for_unix_socket(socket_path)
+
+    yield socket_path
+
+    server_process.terminate()
+    server_process.join(timeout=1)
+    shutil.rmtree(socket_dir, ignore_errors=True)
+
+
+def in_process_client():
+    return http_client.AsyncioClient(
+        session_config=SessionConfig(in_process_app=create_app())
+    )
+
+
 @pytest.fixture(
-    scope="module", params=[http_client.AsyncioClient, requests_client.RequestsClient]
+    scope="module",
+    params=[
+        http_client.AsyncioClient,
+        in_process_client,
+        requests_client.RequestsClient,
+    ],
 )
 def swagger_client(integration_server, request):
-    # Run all integration tests twice, once with our AsyncioClient and once again with the RequestsClient
-    # to make sure they both behave the same.
+    # Run all integration tests with our AsyncioClient, with an AsyncioClient that sends requests to the
+    # integration server's application in-process, and once again with the RequestsClient to make sure
+    # they all behave the same.
     # Once this integration suite has become stable (i.e. we're happy with the approach and the test coverage)
     # it could move to bravado and test all major HTTP clients (requests, fido, asyncio).
     return get_swagger_client(integration_server, request.param())
@@ -163,6 +223,29 @@ def test_put_json_body(swagger_client):
     assert result is None
 
 
+def test_put_compressed_json_body(integration_server):
+    client = http_client.AsyncioClient(compression=CompressionConfig(min_size=0))
+    swagger_client = get_swagger_client(integration_server, client)
+
+    # the test server decompresses the body and would raise a 400 if the data didn't match
+    result = (
+        swagger_client.pet.updatePet(
+            body={
+                "id": 42,
+                "category": {"name": "extracute"},
+                "name": "Lili",
+                "photoUrls": [],
+                "status": "sold",
+            }
+        )
+        .response(timeout=1)
+        .result
+    )
+
+    assert result is None
+    client.close()
+
+
 def test_delete_query_args(swagger_client):
     result = swagger_client.pet.deletePet(petId=5).response(timeout=1).result
     assert result is None
@@ -213,6 +296,70 @@ def test_multiple_requests(swagger_client):
     assert fut2.response().result is None
 
 
+def test_batch(integration_server):
+    client = http_client.AsyncioClient(batch_submissions=True)
+    swagger_client = get_swagger_client(integration_server, client)
+
+    with client.batch():
+        futures = [swagger_client.pet.getPetById(petId=pet_id) for pet_id in (1, 2)]
+    future = swagger_client.pet.getPetById(petId=3)
+
+    assert [f.response(timeout=1).result.id for f in futures + [future]] == [1, 2, 3]
+    client.close()
+
+
+def _wait_for_callback(future, **kwargs):
+    done = threading.Event()
+    results = []
+
+    def callback(response_future):
+        results.append((threading.current_thread(), response_future))
+        done.set()
+
+    future.add_done_callback(callback, **kwargs)
+    assert done.wait(timeout=1)
+    return results[0]
+
+
+def test_done_callback_on_loop_thread(integration_server):
+    client = http_client.AsyncioClient()
+    swagger_client = get_swagger_client(integration_server, client)
+
+    thread, response_future = _wait_for_callback(swagger_client.pet.getPetById(petId=1))
+
+    assert response_future.result().result.id == 1
+    assert thread is not threading.current_thread()
+
+
+def test_done_callback_in_executor(integration_server):
+    client = http_client.AsyncioClient()
+    swagger_client = get_swagger_client(integration_server, client)
+
+    with concurrent.futures.ThreadPoolExecutor(thread_name_prefix="callbacks") as pool:
+        thread, response_future = _wait_for_callback(
+            swagger_client.pet.getPetById(petId=5), executor=pool
+        )
+
+    with pytest.raises(HTTPNotFound):
+        response_future.result()
+    assert thread.name.startswith("callbacks")
+
+
+def test_unmarshal_in_background(integration_server):
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        client = http_client.AsyncioClient(unmarshal_executor=pool)
+        swagger_client = get_swagger_client(integration_server, client)
+
+        futures = [swagger_client.pet.getPetById(petId=pet_id) for pet_id in (1, 2)]
+        not_found_future = swagger_client.pet.getPetById(petId=5)
+
+        assert [f.response(timeout=1).result.id for f in futures] == [1, 2]
+        assert all(f._background_result.done() for f in futures)
+        with pytest.raises(HTTPNotFound):
+            not_found_future.response(timeout=1)
+        client.close()
+
+
 def test_get_msgpack(swagger_client):
     response = swagger_client.pet.getPetsByName(petName="lili").response(timeout=1)
 
@@ -245,6 +392,31 @@ def test_server_500(swagger_client):
         swagger_client.pet.deletePet(petId=42).response(timeout=1)
 
 
+def test_unix_socket_transport(unix_socket_server):
+    """The logical host from the URL doesn't exist, all traffic goes through the Unix domain socket."""
+    client = http_client.AsyncioClient(unix_socket_path=unix_socket_server)
+    swagger_client = get_swagger_client("http://petstore.invalid", client)
+
+    result = swagger_client.pet.getPetById(petId=42).response(timeout=1).result
+
+    assert result.name == "Lili"
+    client.close()
+
+
+def test_unix_socket_transport_selected_hosts(integration_server, unix_socket_server):
+    client = http_client.AsyncioClient(
+        unix_socket_path=unix_socket_server, unix_socket_hosts=["petstore.invalid"]
+    )
+    # the spec is fetched over TCP, the pet through the Unix domain socket
+    swagger_client = get_swagger_client(integration_server, client)
+    swagger_client.swagger_spec.api_url = "http://petstore.invalid/"
+
+    result = swagger_client.pet.getPetById(petId=42).response(timeout=1).result
+
+    assert result.name == "Lili"
+    client.close()
+
+
 def test_cancellation(integration_server):
     swagger_client = get_swagger_client(integration_server, http_client.AsyncioClient())
     bravado_future = (
@@ -283,6 +455,287 @@ def test_timeout_on_future(swagger_client):
     assert isinstance(other_future.response(timeout=1).result, Model)
 
 
+def test_timeout_on_future_cancels_request(integration_server):
+    client = http_client.AsyncioClient(
+        session_config=SessionConfig(limit=1), cancel_on_timeout=True
+    )
+    swagger_client = get_swagger_client(integration_server, client)
+
+    bravado_future = swagger_client.store.getInventory()
+    with pytest.raises(BravadoTimeoutError):
+        bravado_future.response(timeout=0.1)
+
+    with pytest.raises(CancelledError):
+        bravado_future.future.future.result(timeout=1)
+    # the only connection of the pool is available again right away
+    assert swagger_client.pet.getPetById(petId=42).response(timeout=0.5).result.id == 42
+    client.close()
+
+
+def test_timeout_on_future_without_cancel(integration_server):
+    client = http_client.AsyncioClient(cancel_on_timeout=False)
+    swagger_client = get_swagger_client(integration_server, client)
+
+    bravado_future = swagger_client.store.getInventory()
+    with pytest.raises(BravadoTimeoutError):
+        bravado_future.response(timeout=0.1)
+
+    assert bravado_future.response(timeout=2).result == {}
+    client.close()
+
+
+def test_unread_response_releases_connection(integration_server):
+    client = http_client.AsyncioClient(
+        session_config=SessionConfig(limit=1),
+        response_release=ResponseReleaseConfig(track_leaks=True),
+    )
+    swagger_client = get_swagger_client(integration_server, client)
+
+    # deletePet has no response schema, so the body is never read
+    response = swagger_client.pet.deletePet(petId=5).response(timeout=1)
+
+    # the only connection of the pool is available, while the first response is still referenced
+    assert swagger_client.pet.getPetById(petId=42).response(timeout=0.5).result.id == 42
+    assert response.metadata.incoming_response._delegate.connection is None
+    client.close()
+
+
+@pytest.mark.parametrize(
+    "run_mode", (http_client.RunMode.THREAD, http_client.RunMode.CALLING_THREAD)
+)
+@pytest.mark.parametrize("drain_threshold", (0, 64 * 1024))
+def test_download(integration_server, run_mode, drain_threshold, tmp_path):
+    client = http_client.AsyncioClient(
+        run_mode=run_mode,
+        response_release=ResponseReleaseConfig(drain_threshold=drain_threshold),
+    )
+    spec_path = os.path.join(
+        os.path.dirname(__file__), "..", "..", "testing", "swagger.yaml"
+    )
+    with open(spec_path, "rb") as f:
+        spec = f.read()
+
+    future = client.request(
+        {"method": "GET", "url": integration_server + "/swagger.yaml"}
+    )
+    assert future.download(tmp_path / "swagger.yaml", timeout=5) == len(spec)
+    assert (tmp_path / "swagger.yaml").read_bytes() == spec
+
+    buffer = bytearray(len(spec))
+    future = client.request(
+        {"method": "GET", "url": integration_server + "/swagger.yaml"}
+    )
+    assert future.download(buffer, timeout=5) == len(spec)
+    assert buffer == spec
+    client.close()
+
+
+@pytest.mark.parametrize(
+    "run_mode", (http_client.RunMode.THREAD, http_client.RunMode.CALLING_THREAD)
+)
+@pytest.mark.parametrize("chunked", (False, True))
+def test_response_size_limit(integration_server, run_mode, chunked):
+    client = http_client.AsyncioClient(
+        run_mode=run_mode,
+        response_size=ResponseSizeConfig(
+            max_size=256 * 1024, operation_max_sizes={"getPetById": 10}
+        ),
+    )
+    url = "{}/blob?{}size=".format(integration_server, "chunked=1&" if chunked else "")
+
+    response = client.request({"method": "GET", "url": url + "1000"}).result(timeout=5)
+    assert len(response.raw_bytes) == 1000
+    response = client.request({"method": "GET", "url": url + "300000"}).result(
+        timeout=5
+    )
+    with pytest.raises(ResponseTooLargeError):
+        response.raw_bytes
+
+    swagger_client = get_swagger_client(integration_server, client)
+    with pytest.raises(ResponseTooLargeError):
+        swagger_client.pet.getPetById(petId=42).result(timeout=1)
+    client.close()
+
+
+def test_response_size_limit_unmarshal_in_background(integration_server):
+    client = http_client.AsyncioClient(
+        response_size=ResponseSizeConfig(operation_max_sizes={"getPetById": 10}),
+        unmarshal_executor=concurrent.futures.ThreadPoolExecutor(1),
+    )
+    swagger_client = get_swagger_client(integration_server, client)
+
+    with pytest.raises(ResponseTooLargeError):
+        swagger_client.pet.getPetById(petId=42).result(timeout=1)
+    client.close()
+
+
+@pytest.mark.parametrize(
+    "run_mode", (http_client.RunMode.THREAD, http_client.RunMode.CALLING_THREAD)
+)
+def test_spill_to_disk(integration_server, run_mode, tmp_path):
+    metrics.reset()
+    client = http_client.AsyncioClient(
+        run_mode=run_mode,
+        response_size=ResponseSizeConfig(
+            spill_threshold=64 * 1024, spill_directory=str(tmp_path)
+        ),
+    )
+
+    response = client.request(
+        {"method": "GET", "url": integration_server + "/blob?chunked=1&size=1000000"}
+    ).result(timeout=5)
+    buffer = response.raw_buffer
+    assert len(buffer) == 1000000
+    assert buffer[-1:] == b"x"
+    assert metrics.get_counter(RESPONSES_SPILLED) == 1
+    client.close()
+
+
+@pytest.mark.parametrize(
+    "run_mode", (http_client.RunMode.THREAD, http_client.RunMode.CALLING_THREAD)
+)
+def test_spec_cache(integration_server, run_mode, tmp_path):
+    metrics.reset()
+    client = http_client.AsyncioClient(
+        run_mode=run_mode,
+        spec_cache=SpecCacheConfig(str(tmp_path), revalidate_after=0),
+    )
+
+    get_swagger_client(integration_server, client)
+    assert metrics.get_counter(SPEC_CACHE_MISSES) == 1
+    _get_write_executor().submit(lambda: None).result(timeout=1)
+
+    revalidate_in_background = client.spec_cache.revalidate_in_background
+    revalidations = []
+
+    def revalidate(*args):
+        revalidations.append(revalidate_in_background(*args))
+
+    with mock.patch.object(
+        client.spec_cache, "revalidate_in_background", side_effect=revalidate
+    ):
+        swagger_client = get_swagger_client(integration_server, client)
+    assert metrics.get_counter(SPEC_CACHE_HITS) == 1
+    assert swagger_client.pet.getPetById(petId=42).result(timeout=1)[0].id == 42
+
+    (revalidation,) = revalidations
+    revalidation.result(timeout=5)
+    assert metrics.get_counter(SPEC_CACHE_REVALIDATIONS) == 1
+    client.close()
+
+
+@pytest.mark.parametrize(
+    "run_mode", (http_client.RunMode.THREAD, http_client.RunMode.CALLING_THREAD)
+)
+def test_prefetch_specs(integration_server, run_mode):
+    client = http_client.AsyncioClient(run_mode=run_mode)
+    spec_url = "{}/split/4/0/swagger.json".format(integration_server)
+
+    with client.prefetch_specs([spec_url]):
+        assert len(client._prefetched_specs) == 6
+        with mock.patch.object(
+            client, "_run_coroutine", wraps=client._run_coroutine
+        ) as mock_run_coroutine:
+            swagger_client = SwaggerClient.from_url(spec_url, http_client=client)
+        assert mock_run_coroutine.call_count == 0
+
+    assert client._prefetched_specs == {}
+    assert sorted(swagger_client.swagger_spec.definitions) == [
+        "Model0",
+        "Model1",
+        "Model2",
+        "Model3",
+    ]
+    client.close()
+
+
+@pytest.mark.parametrize(
+    "run_mode", (http_client.RunMode.THREAD, http_client.RunMode.CALLING_THREAD)
+)
+def test_record_and_replay(integration_server, run_mode, tmp_path):
+    path = str(tmp_path / "traffic.rec")
+    client = http_client.AsyncioClient(
+        run_mode=run_mode,
+        recording=RecordingConfig(path, mode=RecordingMode.RECORD),
+    )
+    swagger_client = get_swagger_client(integration_server, client)
+    pet = swagger_client.pet.getPetById(petId=42).result(timeout=1)[0]
+    pets = swagger_client.pet.getPetsByIds(petIds=[23, 42]).result(timeout=1)[0]
+    client.close()
+    assert [exchange.url for exchange in read_recording(path)][1:] == [
+        integration_server + "/pet/42",
+        integration_server + "/pets?petIds=23&petIds=42",
+    ]
+
+    client = http_client.AsyncioClient(
+        run_mode=run_mode, recording=RecordingConfig(path, replay_latency=True)
+    )
+    with mock.patch.object(
+        client, "get_client_session", side_effect=AssertionError
+    ), mock.patch.object(session_registry, "get_session_registry") as mock_registry:
+        swagger_client = get_swagger_client(integration_server, client)
+        assert swagger_client.pet.getPetById(petId=42).result(timeout=1)[0] == pet
+        assert (
+            swagger_client.pet.getPetsByIds(petIds=[23, 42]).result(timeout=1)[0]
+            == pets
+        )
+        with pytest.raises(ReplayMissError):
+            swagger_client.pet.getPetById(petId=1).result(timeout=1)
+    assert mock_registry.call_count == 0
+    client.close()
+
+
+def test_loadgen(integration_server, capsys):
+    argv = [
+        integration_server + "/swagger.yaml",
+        "getPetById",
+        "--requests",
+        "20",
+        "--concurrency",
+        "4",
+    ]
+
+    assert loadgen.main(argv + ["--params", '{"petId": 42}']) == 0
+    report = capsys.readouterr().out
+    assert "requests        20\n" in report
+    assert "errors          0\n" in report
+
+    assert loadgen.main(argv + ["--params", '{"petId": 5}', "--json"]) == 1
+    result = json.loads(capsys.readouterr().out)
+    assert result["requests"] == 20
+    assert result["errors"] == {"HTTP 404": 20}
+
+
+def test_calling_thread_run_mode(integration_server):
+    client = http_client.AsyncioClient(run_mode=http_client.RunMode.CALLING_THREAD)
+    swagger_client = get_swagger_client(integration_server, client)
+
+    start_time = monotonic.monotonic()
+    # each of these requests takes roughly 1 second; they run concurrently while waiting for the first one
+    futures = [swagger_client.store.getInventory() for _ in range(3)]
+    assert [future.response(timeout=2).result for future in futures] == [{}] * 3
+    assert monotonic.monotonic() - start_time < 2
+
+    with pytest.raises(HTTPNotFound):
+        swagger_client.pet.getPetById(petId=5).response(timeout=1)
+
+
+def test_calling_thread_run_mode_threads(integration_server):
+    client = http_client.AsyncioClient(run_mode=http_client.RunMode.CALLING_THREAD)
+    swagger_client = get_swagger_client(integration_server, client)
+
+    def get_pet(pet_id):
+        return client.loop, swagger_client.pet.getPetById(petId=pet_id).response(
+            timeout=1
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(get_pet, (1, 2)))
+
+    assert [response.result.id for _, response in results] == [1, 2]
+    assert results[0][0] is not results[1][0]
+
+
 def test_time_until_request_done(integration_server):
     swagger_client = get_swagger_client(integration_server, http_client.AsyncioClient())
     start_time = monotonic.monotonic()
@@ -311,10 +764,7 @@ def test_client_from_asyncio(integration_server):
     # recreate the separate event loop and client session for the HTTP client so we start with a clean slate
     # this is important since we measure the time this test takes, and the test_timeout() tasks might
     # interfere with it
-    loop = thread_loop.get_thread_loop()
-    if hasattr(loop, "_bravado_asyncio_client_session"):
-        run_coroutine_threadsafe(loop._bravado_asyncio_client_session.close(), loop)
-        del loop._bravado_asyncio_client_session
+    session_registry.get_session_registry(thread_loop.get_thread_loop()).close_all()
     # not going to properly shut down the running loop, this will be cleaned up on exit
     thread_loop.event_loop = None
 
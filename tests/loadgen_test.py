@@ -0,0 +1,235 @@
+import concurrent.futures
+import os.path
+import random
+import threading
+from unittest import mock
+
+import pytest
+from bravado.exception import HTTPNotFound
+from bravado.exception import HTTPServiceUnavailable
+
+from bravado_asyncio import loadgen
+from bravado_asyncio.loadgen import classify_error
+from bravado_asyncio.loadgen import format_report
+from bravado_asyncio.loadgen import import_params_generator
+from bravado_asyncio.loadgen import LatencyHistogram
+from bravado_asyncio.loadgen import LoadResult
+from bravado_asyncio.loadgen import parse_args
+from bravado_asyncio.loadgen import result_as_dict
+from bravado_asyncio.loadgen import run_load
+
+
+def params_generator(index):
+    return {"petId": index}
+
+
+class FakeOperation:
+    """Completes every request immediately, or from another thread if delay is given."""
+
+    def __init__(self, delay=None, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = []
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, **params):
+        self.calls.append(params)
+        future = mock.Mock(name="http future")
+        future.response_future.side_effect = self._response_future
+        return future
+
+    def _complete(self, response_future):
+        with self._lock:
+            self._in_flight -= 1
+        if self.error is not None:
+            response_future.set_exception(self.error)
+        else:
+            response_future.set_result(mock.sentinel.response)
+
+    def _response_future(self, executor):
+        response_future = concurrent.futures.Future()
+        with self._lock:
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        if self.delay is None:
+            self._complete(response_future)
+        else:
+            threading.Timer(self.delay, self._complete, (response_future,)).start()
+        return response_future
+
+
+def test_histogram_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for microseconds in range(1, 101):
+        histogram.record(microseconds / 1e6)
+
+    assert histogram.count == 100
+    assert histogram.percentile(50) == pytest.approx(50e-6)
+    assert histogram.percentile(99) == pytest.approx(99e-6)
+    assert histogram.percentile(100) == pytest.approx(100e-6)
+    assert histogram.mean == pytest.approx(50.5e-6)
+
+
+def test_histogram_relative_error():
+    random.seed(0)
+    values = sorted(random.lognormvariate(-6, 2) for _ in range(10000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    assert len(histogram._counts) < 2000
+    for percent in (50, 90, 99, 99.9):
+        exact = values[int(len(values) * percent / 100) - 1]
+        assert histogram.percentile(percent) == pytest.approx(
+            exact, rel=1 / 2**LatencyHistogram.SUB_BUCKET_BITS, abs=1e-6
+        )
+    assert histogram.percentile(100) == values[-1]
+
+
+def test_histogram_empty():
+    histogram = LatencyHistogram()
+    assert histogram.mean == 0.0
+    assert histogram.percentile(99) == 0.0
+
+
+def test_classify_error():
+    assert classify_error(HTTPServiceUnavailable(mock.Mock(status_code=503))) == (
+        "HTTP 503"
+    )
+    assert classify_error(TimeoutError()) == "TimeoutError"
+
+
+def test_run_load_closed_loop():
+    operation = FakeOperation(delay=0.01)
+
+    result = run_load(operation, params_generator, concurrency=3, requests=12)
+
+    assert result.requests == 12
+    assert result.latencies.count == 12
+    assert result.errors == {}
+    assert operation.calls == [{"petId": index} for index in range(12)]
+    assert operation.max_in_flight == 3
+    assert result.latencies.percentile(50) >= 0.009
+    # four rounds of three requests
+    assert result.elapsed >= 0.04
+
+
+def test_run_load_open_loop():
+    operation = FakeOperation()
+
+    result = run_load(operation, params_generator, rate=200, duration=0.1)
+
+    assert 15 <= result.requests <= 21
+    assert result.latencies.count == result.requests
+    assert result.throughput == pytest.approx(200, rel=0.25)
+
+
+def test_run_load_open_loop_counts_time_behind_schedule():
+    operation = FakeOperation()
+
+    with mock.patch.object(
+        loadgen.time, "sleep", autospec=True
+    ) as mock_sleep, mock.patch.object(
+        loadgen.time, "perf_counter", autospec=True, side_effect=[0.0, 1.0, 1.0, 1.0]
+    ):
+        result = run_load(operation, params_generator, rate=1, requests=1)
+
+    # the request was due at 0.0, but could only be sent at 1.0
+    assert mock_sleep.call_count == 0
+    assert result.latencies.max == 1.0
+
+
+def test_run_load_errors():
+    operation = FakeOperation(error=HTTPNotFound(mock.Mock(status_code=404)))
+
+    def failing_params(index):
+        if index == 0:
+            raise KeyError(index)
+        return {}
+
+    result = run_load(operation, failing_params, concurrency=2, requests=5)
+
+    assert result.requests == 5
+    assert result.errors == {"HTTP 404": 4, "KeyError": 1}
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    ({"requests": 1}, {"concurrency": 1, "rate": 1, "requests": 1}, {"rate": 1}),
+)
+def test_run_load_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        run_load(FakeOperation(), params_generator, **kwargs)
+
+
+def test_format_report():
+    histogram = LatencyHistogram()
+    histogram.record(0.002)
+    histogram.record(0.004)
+    result = LoadResult(
+        requests=2, elapsed=0.5, latencies=histogram, errors={"HTTP 404": 1}
+    )
+
+    report = format_report(result).splitlines()
+
+    assert report[0] == "requests        2"
+    assert "throughput      4.0 requests/s" in report
+    assert "latency mean    3.000ms" in report
+    assert "latency p99.99  4.000ms" in report
+    assert report[-1] == "error HTTP 404  1"
+    assert result_as_dict(result)["latency"]["p50"] == pytest.approx(0.002, rel=0.01)
+
+
+def test_import_params_generator():
+    assert import_params_generator("os.path:join") is os.path.join
+    with pytest.raises(ValueError):
+        import_params_generator("os.path")
+
+
+def test_parse_args_defaults():
+    args = parse_args(["swagger.yaml", "getPetById"])
+
+    assert args.concurrency == 1
+    assert args.rate is None
+    assert args.duration == 10.0
+    assert args.requests is None
+    assert args.params == {}
+    assert args.unmarshal_threads == 1
+
+
+def test_parse_args():
+    args = parse_args(
+        [
+            "swagger.yaml",
+            "getPetById",
+            "--rate",
+            "100",
+            "--requests",
+            "50",
+            "--params",
+            '{"petId": 42}',
+            "--header",
+            "X-Test: 1",
+        ]
+    )
+
+    assert args.concurrency is None
+    assert args.rate == 100.0
+    assert args.duration is None
+    assert args.params == {"petId": 42}
+    assert args.header == ["X-Test: 1"]
+
+
+@pytest.mark.parametrize(
+    "argv",
+    (
+        ["--concurrency", "2", "--rate", "10"],
+        ["--params", "{}", "--params-generator", "module:function"],
+        ["--header", "X-Test"],
+    ),
+)
+def test_parse_args_invalid(argv):
+    with pytest.raises(SystemExit):
+        parse_args(["swagger.yaml", "getPetById"] + argv)
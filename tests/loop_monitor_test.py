@@ -0,0 +1,110 @@
+import asyncio
+import collections
+import time
+from unittest import mock
+
+import pytest
+
+from bravado_asyncio.loop_monitor import LOOP_SLOW_CALLBACKS
+from bravado_asyncio.loop_monitor import LoopAlert
+from bravado_asyncio.loop_monitor import LoopMonitor
+from bravado_asyncio.metrics import metrics
+
+
+@pytest.fixture
+def on_alert():
+    return mock.Mock(name="on_alert")
+
+
+def run_loop_for(loop, seconds):
+    loop.run_until_complete(asyncio.sleep(seconds))
+
+
+def block_loop(seconds):
+    time.sleep(seconds)
+
+
+def test_slow_callback(event_loop, on_alert):
+    metrics.reset()
+    monitor = LoopMonitor(
+        event_loop, slow_callback_duration=0.05, lag_threshold=10, on_alert=on_alert
+    ).start()
+    run_loop_for(event_loop, 0.01)
+
+    event_loop.call_soon(block_loop, 0.1)
+    run_loop_for(event_loop, 0.01)
+
+    assert monitor.slow_callbacks == 1
+    assert metrics.get_counter(LOOP_SLOW_CALLBACKS) == 1
+    alert = on_alert.call_args[0][0]
+    assert alert.kind == "slow_callback"
+    assert alert.value >= 0.1
+    assert "block_loop" in alert.callback
+
+
+def test_lag(event_loop, on_alert):
+    monitor = LoopMonitor(
+        event_loop,
+        interval=0.01,
+        lag_threshold=0.05,
+        slow_callback_duration=10,
+        on_alert=on_alert,
+    ).start()
+    run_loop_for(event_loop, 0.005)
+
+    event_loop.call_soon(block_loop, 0.1)
+    run_loop_for(event_loop, 0.05)
+
+    assert monitor.max_lag >= 0.05
+    assert LoopAlert(kind="lag", value=mock.ANY, threshold=0.05) in [
+        c[0][0] for c in on_alert.call_args_list
+    ]
+
+
+def test_pending_tasks(event_loop, on_alert):
+    monitor = LoopMonitor(
+        event_loop, interval=0.01, pending_tasks_threshold=3, on_alert=on_alert
+    ).start()
+    tasks = [event_loop.create_task(asyncio.sleep(1)) for _ in range(3)]
+    run_loop_for(event_loop, 0.05)
+
+    assert monitor.pending_tasks == 4  # includes the task running run_loop_for
+    on_alert.assert_any_call(LoopAlert(kind="pending_tasks", value=4, threshold=3))
+    for task in tasks:
+        task.cancel()
+    run_loop_for(event_loop, 0)
+
+
+def test_alert_callback_errors_are_logged(event_loop, on_alert):
+    on_alert.side_effect = ValueError
+    monitor = LoopMonitor(event_loop, interval=0.01, lag_threshold=0, on_alert=on_alert)
+    monitor.start()
+
+    run_loop_for(event_loop, 0.05)
+
+    assert on_alert.call_count > 0
+
+
+def test_stop(event_loop):
+    original_select = event_loop._selector.select
+    monitor = LoopMonitor(event_loop, interval=0.01).start()
+    run_loop_for(event_loop, 0.01)
+    assert event_loop._ready.__class__ is not collections.deque
+
+    monitor.stop()
+    run_loop_for(event_loop, 0.01)
+
+    assert event_loop._ready.__class__ is collections.deque
+    assert event_loop._selector.select == original_select
+    assert monitor._timer is None
+
+
+def test_unsupported_loop(on_alert):
+    loop = mock.Mock(name="loop", spec=asyncio.AbstractEventLoop)
+    loop.time.return_value = 0.0
+    monitor = LoopMonitor(loop)
+
+    monitor._start()
+
+    assert monitor._selector is None
+    loop.call_at.assert_called_once_with(mock.ANY, monitor._tick)
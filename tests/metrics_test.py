@@ -0,0 +1,52 @@
+from unittest import mock
+
+import pytest
+
+from bravado_asyncio.metrics import Metrics
+from bravado_asyncio.metrics import Timing
+
+
+@pytest.fixture
+def metrics():
+    return Metrics()
+
+
+def test_increment(metrics):
+    metrics.increment("requests")
+    metrics.increment("requests", 2)
+
+    assert metrics.get_counter("requests") == 3
+    assert metrics.get_counter("unknown") == 0
+
+
+def test_observe(metrics):
+    metrics.observe("latency", 0.5)
+    metrics.observe("latency", 1.5)
+
+    assert metrics.get_timing("latency") == Timing(samples=2, total=2.0, max=1.5)
+    assert metrics.get_timing("unknown") == Timing()
+
+
+def test_listeners(metrics):
+    listener = mock.Mock(name="listener")
+    metrics.add_listener(listener)
+
+    metrics.increment("requests")
+    metrics.observe("latency", 0.5)
+    metrics.remove_listener(listener)
+    metrics.increment("requests")
+
+    assert listener.call_args_list == [
+        mock.call("requests", 1),
+        mock.call("latency", 0.5),
+    ]
+
+
+def test_reset(metrics):
+    metrics.increment("requests")
+    metrics.observe("latency", 0.5)
+
+    metrics.reset()
+
+    assert metrics.get_counter("requests") == 0
+    assert metrics.get_timing("latency") == Timing()
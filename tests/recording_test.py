@@ -0,0 +1,278 @@
+import gzip
+import threading
+from unittest import mock
+
+import aiohttp
+import pytest
+from multidict import CIMultiDict
+from multidict import CIMultiDictProxy
+
+from bravado_asyncio.definitions import AsyncioResponse
+from bravado_asyncio.definitions import ResponseSizeConfig
+from bravado_asyncio.recording import decode_exchange
+from bravado_asyncio.recording import encode_exchange
+from bravado_asyncio.recording import get_request_body
+from bravado_asyncio.recording import read_recording
+from bravado_asyncio.recording import RecordedExchange
+from bravado_asyncio.recording import Recorder
+from bravado_asyncio.recording import ReplayedResponse
+from bravado_asyncio.recording import Replayer
+from bravado_asyncio.recording import ReplayMissError
+from bravado_asyncio.response_adapter import CallingThreadResponseAdapter
+
+URL = "http://localhost/pet/42"
+
+
+def make_exchange(url=URL, body=b'{"id": 42}', **kwargs):
+    return RecordedExchange(
+        **{
+            "method": "GET",
+            "url": url,
+            "request_headers": {"Accept": "application/json"},
+            "request_body": None,
+            "status": 200,
+            "reason": "OK",
+            "headers": [("Content-Type", "application/json; charset=utf-8")],
+            "body": body,
+            "elapsed": 0.1,
+            "duration": 0.3,
+            **kwargs,
+        }
+    )
+
+
+@pytest.mark.parametrize("request_body", (None, b"", b"name=Lili\n\x00"))
+def test_encode_exchange(request_body):
+    exchange = make_exchange(request_body=request_body, body=b"\xff\n")
+    line = encode_exchange(exchange)
+
+    assert b"\n" not in line
+    assert decode_exchange(line) == exchange
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    (
+        (b"body", b"body"),
+        (bytearray(b"body"), b"body"),
+        ("body", b"body"),
+        (aiohttp.BytesPayload(b"name=Lili"), b"name=Lili"),
+        (aiohttp.FormData({"name": "Lili"}), None),
+    ),
+)
+def test_get_request_body(data, expected):
+    assert get_request_body(data) == expected
+
+
+def test_recorder_appends(tmp_path):
+    path = str(tmp_path / "traffic.rec")
+    first, second = make_exchange(), make_exchange(url=URL + "?x=1")
+
+    recorder = Recorder(path)
+    recorder.write(first)
+    # the file is complete after every write
+    assert read_recording(path) == [first]
+    recorder.close()
+    recorder.write(second)
+
+    recorder = Recorder(path)
+    recorder.write(second)
+    recorder.close()
+    assert read_recording(path) == [first, second]
+    with open(path, "rb") as f:
+        assert gzip.decompress(f.read()).count(b"\n") == 2
+
+
+def test_recorder_record(event_loop, tmp_path):
+    path = str(tmp_path / "traffic.rec")
+    response = mock.Mock(name="response", spec=aiohttp.ClientResponse)
+    response.status = 201
+    response.reason = "Created"
+    response.headers = CIMultiDictProxy(
+        CIMultiDict(
+            [
+                ("Content-Type", "application/json"),
+                ("Content-Encoding", "gzip"),
+                ("Content-Length", "30"),
+                ("Set-Cookie", "a=1"),
+                ("Set-Cookie", "b=2"),
+            ]
+        )
+    )
+    response.read.return_value = b'{"id": 42}'
+
+    async def request():
+        return response
+
+    recorder = Recorder(path)
+    result = event_loop.run_until_complete(
+        recorder.record(
+            request(),
+            "POST",
+            URL,
+            {"Content-Type": "application/x-www-form-urlencoded"},
+            aiohttp.BytesPayload(b"name=Lili"),
+        )
+    )
+    recorder.close()
+
+    assert result is response
+    (exchange,) = read_recording(path)
+    assert exchange._replace(elapsed=0, duration=0) == RecordedExchange(
+        method="POST",
+        url=URL,
+        request_headers={"Content-Type": "application/x-www-form-urlencoded"},
+        request_body=b"name=Lili",
+        status=201,
+        reason="Created",
+        headers=[
+            ("Content-Type", "application/json"),
+            ("Set-Cookie", "a=1"),
+            ("Set-Cookie", "b=2"),
+        ],
+        body=b'{"id": 42}',
+        elapsed=0,
+        duration=0,
+    )
+    assert 0 <= exchange.elapsed <= exchange.duration
+
+
+def test_recorder_record_writes_in_background(event_loop, tmp_path):
+    path = str(tmp_path / "traffic.rec")
+    response = mock.Mock(name="response", spec=aiohttp.ClientResponse)
+    response.status = 200
+    response.reason = "OK"
+    response.headers = CIMultiDictProxy(CIMultiDict())
+    response.read.return_value = b"{}"
+    recorder = Recorder(path)
+    write = recorder.write
+    threads = []
+
+    def write_in_thread(exchange):
+        threads.append(threading.current_thread().name)
+        if exchange.url == URL:
+            raise OSError("No space left on device")
+        write(exchange)
+
+    async def request():
+        return response
+
+    async def record():
+        for url in (URL, URL + "?x=1"):
+            await recorder.record(request(), "GET", url, {}, None)
+
+    with mock.patch.object(recorder, "write", side_effect=write_in_thread), mock.patch(
+        "bravado_asyncio.recording.log", autospec=True
+    ) as mock_log:
+        event_loop.run_until_complete(record())
+        # waits for the pending writes
+        recorder.close()
+
+    assert [exchange.url for exchange in read_recording(path)] == [URL + "?x=1"]
+    assert len(threads) == 2
+    assert all(name.startswith("bravado-asyncio-recording") for name in threads)
+    assert mock_log.warning.call_count == 1
+
+
+@pytest.mark.parametrize("content_length, recorded", ((10, True), (11, False)))
+def test_recorder_record_max_size(event_loop, tmp_path, content_length, recorded):
+    path = str(tmp_path / "traffic.rec")
+    response = mock.Mock(name="response", spec=aiohttp.ClientResponse)
+    response.status = 200
+    response.reason = "OK"
+    response.headers = CIMultiDictProxy(CIMultiDict())
+    response.content_length = content_length
+    response.read.return_value = b"x" * content_length
+
+    async def request():
+        return response
+
+    recorder = Recorder(path)
+    result = event_loop.run_until_complete(
+        recorder.record(request(), "GET", URL, {}, None, max_size=10)
+    )
+    recorder.close()
+
+    assert result is response
+    assert response.read.call_count == int(recorded)
+    assert len(read_recording(path)) == int(recorded)
+
+
+def test_replayer_cycles_through_responses():
+    first, second = make_exchange(body=b"1"), make_exchange(body=b"2")
+    other = make_exchange(url=URL + "?x=1")
+    replayer = Replayer([first, other, second])
+
+    assert [replayer.next_exchange("GET", URL) for _ in range(3)] == [
+        first,
+        second,
+        first,
+    ]
+    assert replayer.next_exchange("GET", URL + "?x=1") == other
+    with pytest.raises(ReplayMissError) as excinfo:
+        replayer.next_exchange("POST", URL)
+    assert excinfo.value.url == URL
+
+
+def test_replayer_from_file(tmp_path):
+    path = str(tmp_path / "traffic.rec")
+    recorder = Recorder(path)
+    recorder.write(make_exchange())
+    recorder.close()
+
+    replayer = Replayer.from_file(path, replay_latency=True)
+
+    assert replayer.replay_latency is True
+    assert replayer.next_exchange("GET", URL) == make_exchange()
+
+
+@pytest.mark.parametrize(
+    "replay_latency, expected_sleeps", ((False, []), (True, [0.1, 0.2]))
+)
+def test_replay_latency(event_loop, replay_latency, expected_sleeps):
+    replayer = Replayer([make_exchange()], replay_latency=replay_latency)
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(round(delay, 6))
+
+    async def replay():
+        response = await replayer.replay("GET", URL)
+        return await response.read(), await response.read()
+
+    with mock.patch("asyncio.sleep", side_effect=sleep):
+        assert event_loop.run_until_complete(replay()) == (b'{"id": 42}',) * 2
+    assert sleeps == expected_sleeps
+
+
+def test_replayed_response(event_loop):
+    response = ReplayedResponse(
+        make_exchange(
+            headers=[("Content-Type", "text/plain; charset=latin-1")], body=b"\xe9t\xe9"
+        )
+    )
+
+    assert response.status == 200
+    assert response.headers["Content-Length"] == "3"
+    assert response.content_length == 3
+    assert response.connection is None
+    assert response.charset == "latin-1"
+    assert event_loop.run_until_complete(response.text()) == "été"
+    response.close()
+    assert response.closed
+
+
+@pytest.mark.parametrize("response_size", (None, ResponseSizeConfig(max_size=1024)))
+def test_replayed_response_adapter(event_loop, response_size):
+    adapter = CallingThreadResponseAdapter(event_loop, response_size=response_size)(
+        AsyncioResponse(
+            response=ReplayedResponse(make_exchange()), remaining_timeout=None
+        )
+    )
+
+    assert adapter.status_code == 200
+    assert adapter.headers["Content-Type"] == "application/json; charset=utf-8"
+    assert adapter.raw_bytes == b'{"id": 42}'
+    assert adapter.text == '{"id": 42}'
+    assert adapter.json() == {"id": 42}
+    adapter.release()
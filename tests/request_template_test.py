@@ -0,0 +1,100 @@
+from unittest import mock
+
+import aiohttp
+import pytest
+from bravado_core.operation import Operation
+
+from bravado_asyncio.request_template import EMPTY_HEADERS
+from bravado_asyncio.request_template import get_request_template
+from bravado_asyncio.request_template import MAX_CACHED_TIMEOUTS
+from bravado_asyncio.request_template import RequestTemplate
+
+
+@pytest.fixture
+def operation():
+    return mock.Mock(name="operation", spec=Operation)
+
+
+@pytest.mark.parametrize(
+    "method, skip_auto_headers, empty_form_body",
+    (
+        ("GET", ["Content-Type"], b""),
+        ("DELETE", ["Content-Type"], b""),
+        ("POST", None, None),
+        ("PUT", None, None),
+    ),
+)
+def test_template_by_method(method, skip_auto_headers, empty_form_body):
+    template = RequestTemplate(method)
+
+    assert template.skip_auto_headers == skip_auto_headers
+    assert template.empty_form_body == empty_form_body
+
+
+def test_get_timeout():
+    template = RequestTemplate("GET")
+
+    assert template.get_timeout(None, None) is None
+    timeout = template.get_timeout(1.0, 0.1)
+    assert timeout == aiohttp.ClientTimeout(total=1.0, connect=0.1)
+    assert template.get_timeout(1.0, 0.1) is timeout
+    assert template.get_timeout(None, 0.1) == aiohttp.ClientTimeout(connect=0.1)
+
+
+def test_get_timeout_limits_cache_size():
+    template = RequestTemplate("GET")
+
+    for i in range(MAX_CACHED_TIMEOUTS + 5):
+        assert template.get_timeout(float(i + 1), None) == aiohttp.ClientTimeout(
+            total=float(i + 1)
+        )
+
+    assert len(template._timeouts) == MAX_CACHED_TIMEOUTS
+
+
+@pytest.mark.parametrize(
+    "headers, expected_headers",
+    (
+        ({}, {}),
+        ({"X-Foo": "bar"}, {"X-Foo": "bar"}),
+        ({"X-Foo": b"bar", "X-Answer": 42}, {"X-Foo": "bar", "X-Answer": "42"}),
+    ),
+)
+def test_get_headers(headers, expected_headers):
+    converted = RequestTemplate.get_headers(headers)
+
+    assert converted == expected_headers
+    # the headers are modified later on (e.g. for compression), so they can't be shared
+    assert converted is not headers
+
+
+def test_get_headers_empty():
+    # requests without headers share one read-only mapping instead of allocating a dict each
+    assert RequestTemplate.get_headers({}) is EMPTY_HEADERS
+    with pytest.raises(TypeError):
+        EMPTY_HEADERS["X-Foo"] = "bar"
+
+
+def test_get_request_template_without_operation():
+    template = get_request_template(None, "GET")
+
+    assert template.method == "GET"
+    assert get_request_template(None, "GET") is template
+    assert get_request_template(None, "POST") is not template
+
+
+def test_get_request_template_stored_on_operation(operation):
+    template = get_request_template(operation, "GET")
+
+    assert operation._bravado_asyncio_request_template is template
+    assert get_request_template(operation, "GET") is template
+
+
+def test_get_request_template_method_changed(operation):
+    template = get_request_template(operation, "GET")
+
+    new_template = get_request_template(operation, "POST")
+
+    assert new_template is not template
+    assert new_template.method == "POST"
+    assert new_template.skip_auto_headers is None
@@ -1,13 +1,29 @@
 import asyncio
+import concurrent.futures
+import io
+import itertools
+import mmap
+import os
 from unittest import mock
 
 import aiohttp
 import pytest
 
 from bravado_asyncio.definitions import AsyncioResponse
+from bravado_asyncio.definitions import JsonDecodeConfig
+from bravado_asyncio.definitions import ResponseSizeConfig
+from bravado_asyncio.metrics import JSON_DECODE_LOOP_BLOCKING
+from bravado_asyncio.metrics import JSON_DECODE_OFFLOADED
+from bravado_asyncio.metrics import metrics
+from bravado_asyncio.metrics import REQUESTS_CANCELLED_ON_TIMEOUT
+from bravado_asyncio.metrics import RESPONSES_SPILLED
+from bravado_asyncio.metrics import RESPONSES_TOO_LARGE
+from bravado_asyncio.response_adapter import _PrefixedContent
 from bravado_asyncio.response_adapter import AioHTTPResponseAdapter
 from bravado_asyncio.response_adapter import AsyncioHTTPResponseAdapter
-from testing.loop_runner import LoopRunner
+from bravado_asyncio.response_adapter import CallingThreadResponseAdapter
+from bravado_asyncio.response_adapter import decode_json
+from bravado_asyncio.response_adapter import ResponseTooLargeError
 
 
 @pytest.fixture(params=(AioHTTPResponseAdapter, AsyncioHTTPResponseAdapter))
@@ -21,6 +37,7 @@ def mock_incoming_response():
     response.text.return_value = "response text"
     response.read.return_value = b"raw response"
     response.json.return_value = {"json": "response"}
+    response.charset = None
     return response
 
 
@@ -45,15 +62,6 @@ def test_properties(response_adapter, asyncio_response, mock_incoming_response):
     assert response_adapter.headers is mock_incoming_response.headers
 
 
-@pytest.fixture
-def loop_runner():
-    loop_runner = LoopRunner(asyncio.new_event_loop())
-    loop_runner.start()
-    yield loop_runner
-    loop_runner.stop()
-    loop_runner.join()
-
-
 def test_thread_methods(asyncio_response, loop_runner):
     response_adapter = AioHTTPResponseAdapter(loop_runner.loop)(asyncio_response)
 
@@ -62,6 +70,65 @@ def test_thread_methods(asyncio_response, loop_runner):
     assert response_adapter.json() == {"json": "response"}
 
 
+def call_on_loop_thread(loop, func):
+    future = concurrent.futures.Future()
+
+    def call():
+        try:
+            future.set_result(func())
+        except Exception as e:
+            future.set_exception(e)
+
+    loop.call_soon_threadsafe(call)
+    return future.result(timeout=1)
+
+
+def test_thread_methods_on_loop_thread(json_response, loop_runner):
+    json_response.response.get_encoding.return_value = "utf-8"
+    response_adapter = AioHTTPResponseAdapter(loop_runner.loop)(json_response)
+    asyncio.run_coroutine_threadsafe(
+        response_adapter.preload_body(json_response.response), loop_runner.loop
+    ).result(timeout=1)
+
+    assert (
+        call_on_loop_thread(loop_runner.loop, lambda: response_adapter.text)
+        == '{"json": "response"}'
+    )
+    assert call_on_loop_thread(loop_runner.loop, response_adapter.json) == {
+        "json": "response"
+    }
+    # the body is read only once
+    assert json_response.response.read.call_count == 1
+
+
+def test_thread_methods_on_loop_thread_body_not_read(
+    asyncio_response, mock_incoming_response, loop_runner
+):
+    response_adapter = AioHTTPResponseAdapter(loop_runner.loop)(asyncio_response)
+
+    with pytest.raises(RuntimeError):
+        call_on_loop_thread(loop_runner.loop, lambda: response_adapter.raw_bytes)
+    # nothing was run on the loop thread
+    assert mock_incoming_response.read.await_count == 0
+
+
+def test_thread_methods_on_loop_thread_preload_failed(asyncio_response, loop_runner):
+    response_adapter = AioHTTPResponseAdapter(
+        loop_runner.loop, response_size=ResponseSizeConfig(max_size=10)
+    )(asyncio_response)
+
+    with mock.patch.object(
+        response_adapter, "_receive_body", side_effect=ResponseTooLargeError(10)
+    ), pytest.raises(ResponseTooLargeError):
+        asyncio.run_coroutine_threadsafe(
+            response_adapter.preload_body(asyncio_response.response),
+            loop_runner.loop,
+        ).result(timeout=1)
+
+    with pytest.raises(ResponseTooLargeError):
+        call_on_loop_thread(loop_runner.loop, lambda: response_adapter.raw_bytes)
+
+
 @pytest.mark.asyncio
 async def test_asyncio_methods(asyncio_response):
     response_adapter = AsyncioHTTPResponseAdapter(asyncio.get_event_loop())(
@@ -76,3 +143,365 @@ async def test_asyncio_methods(asyncio_response):
 
     result = await response_adapter.json()
     assert result == {"json": "response"}
+
+
+@pytest.fixture
+def json_response(mock_incoming_response):
+    mock_incoming_response.read.return_value = b'{"json": "response"}'
+    return AsyncioResponse(response=mock_incoming_response, remaining_timeout=5)
+
+
+@pytest.mark.parametrize(
+    "body, encoding, expected",
+    (
+        (b'{"a": 1}', None, {"a": 1}),
+        ('{"a": "\u00e4"}'.encode("latin-1"), "latin-1", {"a": "\u00e4"}),
+        (b"  ", None, None),
+    ),
+)
+def test_decode_json(body, encoding, expected):
+    assert decode_json(body, encoding) == expected
+
+
+@pytest.mark.parametrize("offload_threshold", (0, 1024))
+def test_thread_json_decoded_on_calling_thread(
+    json_response, loop_runner, offload_threshold
+):
+    response_adapter = AioHTTPResponseAdapter(
+        loop_runner.loop, JsonDecodeConfig(offload_threshold=offload_threshold)
+    )(json_response)
+
+    with mock.patch(
+        "bravado_asyncio.response_adapter.decode_json", wraps=decode_json
+    ) as mock_decode_json:
+        assert response_adapter.json() == {"json": "response"}
+
+    mock_decode_json.assert_called_once_with(b'{"json": "response"}', None)
+    assert json_response.response.json.call_count == 0
+    # only bodies at or above the threshold count as offloaded, like in FULL_ASYNCIO mode
+    assert metrics.get_counter(JSON_DECODE_OFFLOADED) == (
+        1 if offload_threshold == 0 else 0
+    )
+
+
+def test_thread_json_decoded_in_executor(json_response, loop_runner):
+    executor = mock.Mock(name="executor", spec=concurrent.futures.Executor)
+    executor.submit.return_value.result.return_value = {"json": "response"}
+    response_adapter = AioHTTPResponseAdapter(
+        loop_runner.loop, JsonDecodeConfig(offload_threshold=10, executor=executor)
+    )(json_response)
+
+    assert response_adapter.json() == {"json": "response"}
+    executor.submit.assert_called_once_with(decode_json, b'{"json": "response"}', None)
+    executor.submit.return_value.result.assert_called_once_with(5)
+
+
+def test_thread_json_decoded_inline_on_loop_thread(json_response, loop_runner):
+    executor = mock.Mock(name="executor", spec=concurrent.futures.Executor)
+    response_adapter = AioHTTPResponseAdapter(
+        loop_runner.loop, JsonDecodeConfig(offload_threshold=0, executor=executor)
+    )(json_response)
+    asyncio.run_coroutine_threadsafe(
+        response_adapter.preload_body(json_response.response), loop_runner.loop
+    ).result(timeout=1)
+
+    assert call_on_loop_thread(loop_runner.loop, response_adapter.json) == {
+        "json": "response"
+    }
+    assert executor.submit.call_count == 0
+    assert metrics.get_timing(JSON_DECODE_LOOP_BLOCKING).samples == 1
+    assert metrics.get_counter(JSON_DECODE_OFFLOADED) == 0
+
+
+@pytest.mark.asyncio
+async def test_asyncio_json_decoded_on_loop(json_response):
+    response_adapter = AsyncioHTTPResponseAdapter(
+        asyncio.get_event_loop(), JsonDecodeConfig()
+    )(json_response)
+
+    assert await response_adapter.json() == {"json": "response"}
+    assert metrics.get_timing(JSON_DECODE_LOOP_BLOCKING).samples == 1
+    assert metrics.get_counter(JSON_DECODE_OFFLOADED) == 0
+
+
+@pytest.mark.asyncio
+async def test_asyncio_json_decoded_in_executor(json_response):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        response_adapter = AsyncioHTTPResponseAdapter(
+            asyncio.get_event_loop(),
+            JsonDecodeConfig(offload_threshold=10, executor=executor),
+        )(json_response)
+
+        assert await response_adapter.json() == {"json": "response"}
+
+    assert metrics.get_timing(JSON_DECODE_LOOP_BLOCKING).samples == 0
+    assert metrics.get_counter(JSON_DECODE_OFFLOADED) == 1
+
+
+@pytest.fixture
+def slow_response(mock_incoming_response):
+    async def read():
+        await asyncio.sleep(1)
+
+    mock_incoming_response.read.side_effect = read
+    return AsyncioResponse(response=mock_incoming_response, remaining_timeout=0.01)
+
+
+def test_thread_read_timeout(slow_response, mock_incoming_response, loop_runner):
+    response_adapter = AioHTTPResponseAdapter(loop_runner.loop)(slow_response)
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        response_adapter.raw_bytes
+
+    # closing happens on the loop thread
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop_runner.loop).result()
+    mock_incoming_response.close.assert_called_once_with()
+    assert metrics.get_counter(REQUESTS_CANCELLED_ON_TIMEOUT) == 1
+
+
+@pytest.mark.asyncio
+async def test_asyncio_read_timeout(slow_response, mock_incoming_response):
+    response_adapter = AsyncioHTTPResponseAdapter(asyncio.get_event_loop())(
+        slow_response
+    )
+
+    with pytest.raises(asyncio.TimeoutError):
+        await response_adapter.raw_bytes
+
+    mock_incoming_response.close.assert_called_once_with()
+    assert metrics.get_counter(REQUESTS_CANCELLED_ON_TIMEOUT) == 1
+
+
+def test_release(response_adapter, mock_loop, asyncio_response):
+    with mock.patch(
+        "bravado_asyncio.response_adapter.release_response", autospec=True
+    ) as mock_release_response:
+        response_adapter(asyncio_response).release()
+
+    mock_release_response.assert_called_once_with(asyncio_response.response, mock_loop)
+
+
+@pytest.fixture
+def calling_thread_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_calling_thread_methods(asyncio_response, calling_thread_loop):
+    response_adapter = CallingThreadResponseAdapter(calling_thread_loop)(
+        asyncio_response
+    )
+
+    assert response_adapter.text == "response text"
+    assert response_adapter.raw_bytes == b"raw response"
+    assert response_adapter.json() == {"json": "response"}
+
+
+def test_calling_thread_read_timeout(
+    slow_response, mock_incoming_response, calling_thread_loop
+):
+    response_adapter = CallingThreadResponseAdapter(calling_thread_loop)(slow_response)
+
+    with pytest.raises(asyncio.TimeoutError):
+        response_adapter.raw_bytes
+
+    mock_incoming_response.close.assert_called_once_with()
+    assert metrics.get_counter(REQUESTS_CANCELLED_ON_TIMEOUT) == 1
+
+
+@pytest.fixture
+def streamed_response(mock_incoming_response):
+    mock_incoming_response.content = mock.Mock(
+        name="content", spec=aiohttp.StreamReader
+    )
+    mock_incoming_response.content.at_eof.return_value = False
+    # like aiohttp, keep returning an empty chunk at the end of the body
+    mock_incoming_response.content.readany = mock.AsyncMock(
+        side_effect=itertools.chain([b"abc", b"defg"], itertools.repeat(b""))
+    )
+    return AsyncioResponse(response=mock_incoming_response, remaining_timeout=5)
+
+
+def test_readinto(streamed_response, loop_runner):
+    response_adapter = AioHTTPResponseAdapter(loop_runner.loop)(streamed_response)
+    buffer = bytearray(5)
+
+    assert response_adapter.readinto(buffer) == 5
+    assert buffer == b"abcde"
+    assert response_adapter.readinto(memoryview(buffer)[1:]) == 2
+    assert buffer == b"afgde"
+    assert response_adapter.readinto(buffer) == 0
+    assert streamed_response.response.read.call_count == 0
+
+
+def test_readinto_body_read_already(
+    streamed_response, mock_incoming_response, loop_runner
+):
+    mock_incoming_response.content.at_eof.return_value = True
+    mock_incoming_response.content.readany.side_effect = itertools.repeat(b"")
+    response_adapter = AioHTTPResponseAdapter(loop_runner.loop)(streamed_response)
+    buffer = bytearray(20)
+
+    assert response_adapter.readinto(buffer) == 12
+    assert buffer[:12] == b"raw response"
+    assert response_adapter.readinto(buffer) == 0
+
+
+@pytest.mark.parametrize("target_type", ("path", "str", "fd", "file"))
+def test_download_to(streamed_response, loop_runner, tmp_path, target_type):
+    response_adapter = AioHTTPResponseAdapter(loop_runner.loop)(streamed_response)
+    path = tmp_path / "download"
+
+    if target_type == "fd":
+        fd = os.open(str(path), os.O_WRONLY | os.O_CREAT)
+        assert response_adapter.download_to(fd) == 7
+        os.close(fd)
+    elif target_type == "file":
+        with open(str(path), "wb") as f:
+            assert response_adapter.download_to(f) == 7
+    else:
+        target = path if target_type == "path" else str(path)
+        assert response_adapter.download_to(target) == 7
+
+    assert path.read_bytes() == b"abcdefg"
+
+
+def test_calling_thread_readinto(streamed_response):
+    loop = asyncio.new_event_loop()
+    response_adapter = CallingThreadResponseAdapter(loop)(streamed_response)
+    buffer = bytearray(10)
+
+    assert response_adapter.readinto(buffer) == 7
+    assert buffer[:7] == b"abcdefg"
+    loop.close()
+
+
+@pytest.mark.asyncio
+async def test_asyncio_readinto_and_download_to(streamed_response, tmp_path):
+    response_adapter = AsyncioHTTPResponseAdapter(asyncio.get_event_loop())(
+        streamed_response
+    )
+    buffer = bytearray(2)
+
+    assert await response_adapter.readinto(buffer) == 2
+    assert buffer == b"ab"
+    assert await response_adapter.download_to(tmp_path / "download") == 5
+    assert (tmp_path / "download").read_bytes() == b"cdefg"
+
+
+@pytest.fixture
+def sized_response(streamed_response, mock_incoming_response):
+    mock_incoming_response.content_length = None
+    mock_incoming_response.get_encoding.return_value = "utf-8"
+    return streamed_response
+
+
+def test_max_size_content_length(sized_response, mock_incoming_response, loop_runner):
+    mock_incoming_response.content_length = 8
+    response_adapter = AioHTTPResponseAdapter(
+        loop_runner.loop, response_size=ResponseSizeConfig(), max_size=7
+    )(sized_response)
+
+    with pytest.raises(ResponseTooLargeError) as excinfo:
+        response_adapter.raw_bytes
+    assert excinfo.value.max_size == 7
+    assert mock_incoming_response.content.readany.call_count == 0
+    mock_incoming_response.close.assert_called_once_with()
+    assert metrics.get_counter(RESPONSES_TOO_LARGE) == 1
+
+
+def test_max_size_while_streaming(sized_response, mock_incoming_response, loop_runner):
+    response_adapter = AioHTTPResponseAdapter(
+        loop_runner.loop, response_size=ResponseSizeConfig(), max_size=5
+    )(sized_response)
+
+    with pytest.raises(ResponseTooLargeError):
+        response_adapter.json()
+    with pytest.raises(ResponseTooLargeError):
+        response_adapter.download_to(io.BytesIO())
+    assert mock_incoming_response.content.readany.call_count == 2
+    mock_incoming_response.close.assert_called_once_with()
+
+
+def test_max_size_not_exceeded(sized_response, mock_incoming_response, loop_runner):
+    response_adapter = AioHTTPResponseAdapter(
+        loop_runner.loop, response_size=ResponseSizeConfig(), max_size=7
+    )(sized_response)
+
+    assert response_adapter.raw_bytes == b"abcdefg"
+    assert response_adapter.text == "abcdefg"
+    assert isinstance(response_adapter._body, bytes)
+    assert mock_incoming_response.read.call_count == 0
+
+
+def test_spill_to_disk(sized_response, loop_runner, tmp_path):
+    response_adapter = AioHTTPResponseAdapter(
+        loop_runner.loop,
+        response_size=ResponseSizeConfig(
+            spill_threshold=4, spill_directory=str(tmp_path)
+        ),
+    )(sized_response)
+
+    buffer = response_adapter.raw_buffer
+    assert buffer.readonly
+    assert bytes(buffer) == b"abcdefg"
+    assert isinstance(response_adapter._body, mmap.mmap)
+    assert response_adapter.raw_bytes == b"abcdefg"
+    assert metrics.get_counter(RESPONSES_SPILLED) == 1
+    # the temporary file has been deleted already, only the mapping is left
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_spill_threshold_not_exceeded(
+    sized_response, mock_incoming_response, loop_runner
+):
+    mock_incoming_response.content_length = 7
+    response_adapter = AioHTTPResponseAdapter(
+        loop_runner.loop, response_size=ResponseSizeConfig(spill_threshold=7)
+    )(sized_response)
+
+    assert bytes(response_adapter.raw_buffer) == b"abcdefg"
+    assert isinstance(response_adapter._body, bytes)
+    assert metrics.get_counter(RESPONSES_SPILLED) == 0
+
+
+@pytest.mark.asyncio
+async def test_asyncio_max_size_and_spill(sized_response):
+    response_adapter = AsyncioHTTPResponseAdapter(
+        asyncio.get_event_loop(),
+        response_size=ResponseSizeConfig(spill_threshold=2),
+        max_size=10,
+    )(sized_response)
+
+    assert await response_adapter.text == "abcdefg"
+    assert bytes(await response_adapter.raw_buffer) == b"abcdefg"
+    assert metrics.get_counter(RESPONSES_SPILLED) == 1
+
+
+def test_prefixed_content(event_loop):
+    stream = aiohttp.StreamReader(
+        mock.Mock(_reading_paused=False), 2**16, loop=event_loop
+    )
+    stream.feed_data(b"ghi")
+    content = _PrefixedContent([b"abc", b"", b"def"], stream)
+
+    async def read():
+        return [
+            await content.readany(),
+            await content.read(2),
+            await content.read(5),
+            await content.readany(),
+        ]
+
+    assert event_loop.run_until_complete(read()) == [b"abc", b"de", b"f", b"ghi"]
+    assert not content.at_eof()
+    stream.feed_data(b"jkl")
+    stream.feed_eof()
+    assert event_loop.run_until_complete(content.read(2)) == b"jk"
+    assert event_loop.run_until_complete(content.read()) == b"l"
+    assert content.at_eof()
+
+    error = aiohttp.ClientConnectionError()
+    content.set_exception(error)
+    assert content.exception() is stream.exception() is error
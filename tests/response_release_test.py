@@ -0,0 +1,104 @@
+import asyncio
+import gc
+from unittest import mock
+
+import aiohttp
+import pytest
+
+from bravado_asyncio.metrics import metrics
+from bravado_asyncio.metrics import RESPONSES_LEAKED
+from bravado_asyncio.response_release import drain_small_body
+from bravado_asyncio.response_release import release_response
+from bravado_asyncio.response_release import track_response
+
+
+@pytest.fixture
+def mock_response():
+    response = mock.Mock(name="response", spec=aiohttp.ClientResponse)
+    response.connection = mock.Mock(name="connection")
+    return response
+
+
+@pytest.fixture
+def mock_loop():
+    loop = mock.Mock(name="loop", spec=asyncio.AbstractEventLoop)
+    loop.is_closed.return_value = False
+    return loop
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "content_length, read", ((10, True), (100, True), (101, False), (None, False))
+)
+async def test_drain_small_body(mock_response, content_length, read):
+    mock_response.content_length = content_length
+
+    async def request():
+        return mock_response
+
+    assert await drain_small_body(request(), drain_threshold=100) is mock_response
+    assert mock_response.read.called is read
+
+
+def test_release_response_from_other_thread(mock_response, mock_loop):
+    release_response(mock_response, mock_loop)
+
+    mock_loop.call_soon_threadsafe.assert_called_once_with(mock_response.release)
+    mock_response.release.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_release_response_on_loop(mock_response):
+    release_response(mock_response, asyncio.get_running_loop())
+
+    mock_response.release.assert_called_once_with()
+
+
+@pytest.mark.parametrize("released, loop_closed", ((True, False), (False, True)))
+def test_release_response_nothing_to_do(
+    mock_response, mock_loop, released, loop_closed
+):
+    if released:
+        mock_response.connection = None
+    mock_loop.is_closed.return_value = loop_closed
+
+    release_response(mock_response, mock_loop)
+
+    mock_loop.call_soon_threadsafe.assert_not_called()
+
+
+class HttpFuture:
+    pass
+
+
+def test_track_response_leaked(mock_response, mock_loop, caplog):
+    future = asyncio.Future(loop=mock_loop)
+    future.set_result(mock_response)
+    http_future = HttpFuture()
+
+    track_response(http_future, future, mock_loop)
+    del http_future
+    gc.collect()
+
+    assert metrics.get_counter(RESPONSES_LEAKED) == 1
+    assert "test_track_response_leaked" in caplog.text
+    mock_loop.call_soon_threadsafe.assert_called_once_with(mock_response.release)
+
+
+@pytest.mark.parametrize("outcome", ("pending", "cancelled", "exception", "released"))
+def test_track_response_not_leaked(mock_response, mock_loop, outcome):
+    future = asyncio.Future(loop=mock_loop)
+    if outcome == "cancelled":
+        future.cancel()
+    elif outcome == "exception":
+        future.set_exception(aiohttp.ClientError())
+    elif outcome == "released":
+        mock_response.connection = None
+        future.set_result(mock_response)
+    http_future = HttpFuture()
+
+    track_response(http_future, future, mock_loop)
+    del http_future
+    gc.collect()
+
+    assert metrics.get_counter(RESPONSES_LEAKED) == 0
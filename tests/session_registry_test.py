@@ -0,0 +1,184 @@
+import asyncio
+from unittest import mock
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from bravado_asyncio.definitions import SessionConfig
+from bravado_asyncio.in_process import InProcessConnector
+from bravado_asyncio.session_registry import create_client_session
+from bravado_asyncio.session_registry import get_session_registry
+from bravado_asyncio.session_registry import SessionRegistry
+
+
+@pytest.fixture
+def mock_create_client_session():
+    with mock.patch(
+        "bravado_asyncio.session_registry.create_client_session", autospec=True
+    ) as _mock:
+        _mock.side_effect = lambda loop, config: mock.Mock(
+            name="session for {}".format(config)
+        )
+        yield _mock
+
+
+@pytest.fixture
+def registry(mock_loop):
+    mock_loop.is_closed.return_value = False
+    mock_loop.is_running.return_value = False
+    return SessionRegistry(mock_loop)
+
+
+def test_get_session_registry():
+    loop1 = mock.Mock(name="loop1", spec=asyncio.AbstractEventLoop)
+    loop2 = mock.Mock(name="loop2", spec=asyncio.AbstractEventLoop)
+
+    registry = get_session_registry(loop1)
+
+    assert registry.loop is loop1
+    assert get_session_registry(loop1) is registry
+    assert get_session_registry(loop2) is not registry
+
+
+@pytest.mark.usefixtures("mock_create_client_session")
+def test_acquire_shares_sessions_per_config(registry):
+    bulk_config = SessionConfig(limit=500)
+    session1 = registry.acquire(SessionConfig())
+    session2 = registry.acquire(SessionConfig())
+    session3 = registry.acquire(bulk_config)
+
+    assert session1 is session2
+    assert session1 is not session3
+    assert registry.refcount(SessionConfig()) == 2
+    assert registry.refcount(bulk_config) == 1
+
+
+@pytest.mark.usefixtures("mock_create_client_session")
+def test_release_closes_unused_session(registry, mock_loop):
+    session = registry.acquire(SessionConfig())
+    registry.acquire(SessionConfig())
+
+    registry.release(SessionConfig())
+    assert mock_loop.run_until_complete.call_count == 0
+
+    registry.release(SessionConfig())
+    mock_loop.run_until_complete.assert_called_once_with(session.close.return_value)
+    assert registry.refcount(SessionConfig()) == 0
+    assert registry.acquire(SessionConfig()) is not session
+
+
+@pytest.mark.usefixtures("mock_create_client_session")
+def test_release_keeps_pinned_session(registry, mock_loop):
+    session = registry.get(SessionConfig())
+    assert registry.acquire(SessionConfig()) is session
+
+    registry.release(SessionConfig())
+
+    assert mock_loop.run_until_complete.call_count == 0
+    assert registry.get(SessionConfig()) is session
+
+
+@pytest.mark.usefixtures("mock_create_client_session")
+def test_close_all(registry, mock_loop):
+    registry.get(SessionConfig())
+    registry.acquire(SessionConfig(limit=1))
+
+    registry.close_all()
+
+    assert mock_loop.run_until_complete.call_count == 2
+    assert registry.refcount(SessionConfig(limit=1)) == 0
+
+
+def test_close_callbacks(registry, mock_loop):
+    class Owner:
+        def __init__(self):
+            self.closed_loops = []
+
+        def on_close(self, loop):
+            self.closed_loops.append(loop)
+
+    owner = Owner()
+    gone = Owner()
+    registry.add_close_callback(owner.on_close)
+    registry.add_close_callback(gone.on_close)
+    del gone
+
+    registry.close_all()
+    registry.close_all()
+
+    # called once, and not for objects that don't exist anymore
+    assert owner.closed_loops == [mock_loop]
+    assert len(registry._close_callbacks) == 0
+
+
+def test_close_session_on_running_loop(event_loop):
+    registry = get_session_registry(event_loop)
+    session = mock.Mock(name="session", spec=aiohttp.ClientSession)
+    session.close = mock.AsyncMock()
+
+    async def close():
+        registry._close_session(session)
+        await asyncio.sleep(0)
+
+    event_loop.run_until_complete(close())
+
+    session.close.assert_awaited_once_with()
+
+
+def test_create_client_session(event_loop):
+    config = SessionConfig(
+        limit=5, force_close=True, timeout=aiohttp.ClientTimeout(total=3)
+    )
+
+    async def create():
+        session = create_client_session(event_loop, config)
+        connector = session.connector
+        await session.close()
+        return session, connector
+
+    session, connector = event_loop.run_until_complete(create())
+
+    assert connector.limit == 5
+    assert connector.force_close is True
+    assert session.timeout == config.timeout
+
+
+def test_create_client_session_default_config(event_loop):
+    with mock.patch("aiohttp.ClientSession", autospec=True) as mock_client_session:
+        create_client_session(event_loop, SessionConfig())
+
+    mock_client_session.assert_called_once_with(loop=event_loop)
+
+
+def test_create_client_session_unix_socket(event_loop):
+    config = SessionConfig(unix_socket_path="/run/sidecar.sock", limit=5)
+
+    async def create():
+        session = create_client_session(event_loop, config)
+        connector = session.connector
+        await session.close()
+        return connector
+
+    connector = event_loop.run_until_complete(create())
+
+    assert isinstance(connector, aiohttp.UnixConnector)
+    assert connector.path == "/run/sidecar.sock"
+    assert connector.limit == 5
+
+
+def test_create_client_session_in_process(event_loop):
+    app = web.Application()
+    config = SessionConfig(in_process_app=app, limit=5)
+
+    async def create():
+        session = create_client_session(event_loop, config)
+        connector = session.connector
+        await session.close()
+        return connector
+
+    connector = event_loop.run_until_complete(create())
+
+    assert isinstance(connector, InProcessConnector)
+    assert connector._app is app
+    assert connector.limit == 5
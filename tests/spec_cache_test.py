@@ -0,0 +1,260 @@
+import asyncio
+import json
+import os
+import time
+from unittest import mock
+
+import aiohttp
+import pytest
+
+from bravado_asyncio.definitions import SpecCacheConfig
+from bravado_asyncio.metrics import metrics
+from bravado_asyncio.metrics import SPEC_CACHE_HITS
+from bravado_asyncio.metrics import SPEC_CACHE_REVALIDATIONS
+from bravado_asyncio.metrics import SPEC_CACHE_UPDATES
+from bravado_asyncio.spec_cache import _get_write_executor
+from bravado_asyncio.spec_cache import CachedSpec
+from bravado_asyncio.spec_cache import SpecCache
+
+URL = "http://localhost/swagger.json"
+SPEC = {"swagger": "2.0", "paths": {}}
+
+
+@pytest.fixture
+def spec_cache(tmp_path):
+    return SpecCache(SpecCacheConfig(str(tmp_path / "specs")))
+
+
+def wait_for_writes():
+    _get_write_executor().submit(lambda: None).result(timeout=1)
+
+
+def store_spec(spec_cache, headers=None):
+    spec_cache.put(
+        URL,
+        headers or {"Content-Type": "application/json", "ETag": '"1"'},
+        json.dumps(SPEC).encode(),
+    )
+    return spec_cache.get(URL)
+
+
+def test_put_and_get(spec_cache):
+    assert spec_cache.get(URL) is None
+
+    spec_cache.put(
+        URL,
+        {"Content-Type": "application/json", "ETag": '"1"', "Server": "test"},
+        b'{"swagger": "2.0"}',
+    )
+
+    spec = spec_cache.get(URL)
+    assert spec.url == URL
+    assert spec.body == b'{"swagger": "2.0"}'
+    assert spec.headers == {"Content-Type": "application/json", "ETag": '"1"'}
+    assert spec.validated_at == pytest.approx(time.time(), abs=5)
+    assert os.listdir(spec_cache.config.directory) == [
+        os.path.basename(spec_cache._path(URL, ".spec"))
+    ]
+
+
+def test_get_corrupt_entry(spec_cache):
+    store_spec(spec_cache)
+    with open(spec_cache._path(URL, ".spec"), "wb") as f:
+        f.write(b"not json\n{}")
+
+    assert spec_cache.get(URL) is None
+
+
+def test_remove(spec_cache):
+    store_spec(spec_cache)
+
+    spec_cache.remove(URL)
+    spec_cache.remove(URL)
+
+    assert spec_cache.get(URL) is None
+
+
+@pytest.mark.parametrize(
+    "url, headers, size, expected",
+    (
+        (URL, {}, 10, True),
+        ("http://localhost/spec", {"Content-Type": "application/json"}, 10, True),
+        ("http://localhost/spec", {"Content-Type": "text/vnd.yaml"}, 10, True),
+        ("http://localhost/spec.yml?v=2", {}, 10, True),
+        ("http://localhost/blob", {"Content-Type": "image/png"}, 10, False),
+        (URL, {}, 20 * 1024 * 1024, False),
+    ),
+)
+def test_is_cacheable(spec_cache, url, headers, size, expected):
+    assert spec_cache.is_cacheable(url, headers, size) is expected
+
+
+@pytest.mark.parametrize(
+    "revalidate_after, age, expected",
+    ((None, 3600, False), (60, 10, False), (60, 61, True), (0, 0, True)),
+)
+def test_needs_revalidation(tmp_path, revalidate_after, age, expected):
+    spec_cache = SpecCache(SpecCacheConfig(str(tmp_path), revalidate_after))
+    spec = CachedSpec(URL, {}, b"{}", validated_at=time.time() - age)
+
+    assert spec_cache.needs_revalidation(spec) is expected
+
+
+def test_load_json_stores_parsed_spec(spec_cache):
+    spec = store_spec(spec_cache)
+
+    assert spec_cache.load_json(spec) == SPEC
+    with mock.patch("bravado_asyncio.spec_cache.decode_json") as mock_decode_json:
+        assert spec_cache.load_json(spec) == SPEC
+    assert mock_decode_json.call_count == 0
+
+
+def test_load_json_ignores_outdated_parsed_spec(spec_cache):
+    spec_cache.load_json(store_spec(spec_cache))
+    spec_cache.put(URL, {}, b'{"swagger": "2.0", "paths": {"/pet": {}}}')
+
+    assert spec_cache.load_json(spec_cache.get(URL)) == {
+        "swagger": "2.0",
+        "paths": {"/pet": {}},
+    }
+
+
+def test_cached_future(spec_cache):
+    spec = store_spec(spec_cache, {"Content-Type": "application/json; charset=utf-8"})
+
+    response = spec_cache.cached_future(spec).result(timeout=0)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json; charset=utf-8"
+    assert response.raw_bytes == response.content == json.dumps(SPEC).encode()
+    assert response.text == json.dumps(SPEC)
+    assert response.json() == SPEC
+    assert metrics.get_counter(SPEC_CACHE_HITS) == 1
+
+
+def chunked_response(event_loop, *chunks):
+    """Return a 200 response without a Content-Length, of which chunks have arrived so far."""
+    content = aiohttp.StreamReader(
+        mock.Mock(_reading_paused=False), 2**16, loop=event_loop
+    )
+    for chunk in chunks:
+        content.feed_data(chunk)
+    response = mock.Mock(
+        name="response",
+        status=200,
+        headers={"Content-Type": "application/json"},
+        content_length=None,
+        content=content,
+    )
+
+    async def read():
+        # like aiohttp, keeps the body once it has been read
+        if response._body is None:
+            response._body = await response.content.read()
+        return response._body
+
+    response._body = None
+    response.read = read
+    return response
+
+
+def test_fetch_chunked_spec(spec_cache, event_loop):
+    response = chunked_response(event_loop, b'{"swagger": ', b'"2.0"}')
+    response.content.feed_eof()
+
+    async def request():
+        return response
+
+    assert event_loop.run_until_complete(spec_cache.fetch(request(), URL)) is response
+    wait_for_writes()
+
+    assert spec_cache.get(URL).body == b'{"swagger": "2.0"}'
+    assert event_loop.run_until_complete(response.read()) == b'{"swagger": "2.0"}'
+
+
+def test_fetch_chunked_spec_too_large(tmp_path, event_loop):
+    spec_cache = SpecCache(SpecCacheConfig(str(tmp_path), max_size=50))
+    # the rest of the body hasn't arrived yet
+    response = chunked_response(event_loop, b"[" + b"0," * 20, b"0," * 20)
+    stream = response.content
+
+    async def request():
+        return response
+
+    assert (
+        event_loop.run_until_complete(
+            asyncio.wait_for(spec_cache.fetch(request(), URL), timeout=1)
+        )
+        is response
+    )
+    stream.feed_data(b"0]")
+    stream.feed_eof()
+    wait_for_writes()
+
+    assert spec_cache.get(URL) is None
+    assert event_loop.run_until_complete(response.read()) == b"[" + b"0," * 40 + b"0]"
+
+
+def mock_session(status, headers, body=b""):
+    response = mock.Mock(name="response", status=status, headers=headers)
+    response.read = mock.AsyncMock(return_value=body)
+    session = mock.MagicMock(name="session")
+    session.get.return_value.__aenter__.return_value = response
+    return session
+
+
+def test_revalidate_not_modified(spec_cache, event_loop):
+    spec = store_spec(spec_cache)._replace(validated_at=0)
+    session = mock_session(304, {"ETag": '"2"'})
+
+    event_loop.run_until_complete(
+        spec_cache._revalidate(spec, session, {"Authorization": "secret"})
+    )
+    wait_for_writes()
+
+    session.get.assert_called_once_with(
+        URL, headers={"Authorization": "secret", "If-None-Match": '"1"'}
+    )
+    updated_spec = spec_cache.get(URL)
+    assert updated_spec.body == spec.body
+    assert updated_spec.headers["ETag"] == '"2"'
+    assert updated_spec.validated_at > 0
+    assert metrics.get_counter(SPEC_CACHE_REVALIDATIONS) == 1
+    assert metrics.get_counter(SPEC_CACHE_UPDATES) == 0
+
+
+def test_revalidate_changed(spec_cache, event_loop):
+    spec = store_spec(spec_cache, {"Last-Modified": "Mon, 19 Oct 2026 10:00:00 GMT"})
+    session = mock_session(200, {"Content-Type": "application/json"}, b"{}")
+
+    event_loop.run_until_complete(spec_cache._revalidate(spec, session, {}))
+    wait_for_writes()
+
+    session.get.assert_called_once_with(
+        URL, headers={"If-Modified-Since": "Mon, 19 Oct 2026 10:00:00 GMT"}
+    )
+    assert spec_cache.get(URL).body == b"{}"
+    assert metrics.get_counter(SPEC_CACHE_UPDATES) == 1
+
+
+def test_revalidate_error_keeps_spec(spec_cache, event_loop):
+    spec = store_spec(spec_cache)
+    session = mock.MagicMock(name="session")
+    session.get.side_effect = OSError("connection refused")
+
+    event_loop.run_until_complete(spec_cache._revalidate(spec, session, {}))
+
+    assert spec_cache.get(URL) == spec
+    assert spec_cache._revalidating == set()
+
+
+def test_revalidate_in_background_only_once(spec_cache):
+    spec = store_spec(spec_cache)
+    loop = mock.Mock(name="loop", spec=asyncio.AbstractEventLoop)
+
+    with mock.patch("asyncio.run_coroutine_threadsafe") as mock_run_coroutine:
+        spec_cache.revalidate_in_background(spec, mock.sentinel.session, loop, {})
+        spec_cache.revalidate_in_background(spec, mock.sentinel.session, loop, {})
+
+    assert mock_run_coroutine.call_count == 1
+    mock_run_coroutine.call_args[0][0].close()
@@ -0,0 +1,92 @@
+import concurrent.futures
+from unittest import mock
+
+import pytest
+
+from bravado_asyncio.spec_prefetch import find_references
+from bravado_asyncio.spec_prefetch import prefetch_specs
+
+URL = "http://localhost/api/swagger.json"
+
+
+@pytest.mark.parametrize(
+    "body, expected",
+    (
+        (b'{"$ref": "#/definitions/Pet"}', set()),
+        (
+            b'{"$ref": "definitions.json#/Pet", "x": {"$ref":"../common.json"}}',
+            {"http://localhost/api/definitions.json", "http://localhost/common.json"},
+        ),
+        (
+            b"schema:\n  $ref: 'pet.yaml#/Pet'\nother:\n  $ref: other.yml\n",
+            {"http://localhost/api/pet.yaml", "http://localhost/api/other.yml"},
+        ),
+        (
+            b'{"$ref": "https://example.com/spec.json#/Pet"}',
+            {"https://example.com/spec.json"},
+        ),
+        (b'{"$ref": "file:///etc/spec.json"}', set()),
+    ),
+)
+def test_find_references(body, expected):
+    assert find_references(URL, body) == expected
+
+
+def make_future(body=None, exception=None):
+    future = mock.Mock(name="future")
+    if exception is not None:
+        future.result.side_effect = exception
+    else:
+        future.result.return_value = mock.Mock(
+            raw_bytes=body, headers={"Content-Type": "application/json"}
+        )
+    return future
+
+
+def test_prefetch_specs_follows_references():
+    documents = {
+        URL: b'{"a": {"$ref": "a.json#/A"}, "b": {"$ref": "b.json#/B"}}',
+        "http://localhost/api/a.json": b'{"A": {"$ref": "b.json#/B"}}',
+        "http://localhost/api/b.json": b'{"B": {"$ref": "c.json"}}',
+    }
+    futures = {}
+
+    def request(request_params):
+        url = request_params["url"]
+        futures[url] = (
+            make_future(documents[url])
+            if url in documents
+            else make_future(exception=concurrent.futures.TimeoutError())
+        )
+        return futures[url]
+
+    client = mock.Mock(name="client")
+    client.request.side_effect = request
+
+    specs = prefetch_specs(client, [URL + "#/definitions"], {"X-Token": "1"})
+
+    assert set(specs) == set(documents)
+    assert specs[URL].body == documents[URL]
+    assert specs[URL].headers == {"Content-Type": "application/json"}
+    # every document is requested once, even when it is referenced several times
+    assert sorted(call[0][0]["url"] for call in client.request.call_args_list) == [
+        "http://localhost/api/a.json",
+        "http://localhost/api/b.json",
+        "http://localhost/api/c.json",
+        URL,
+    ]
+    assert client.request.call_args[0][0]["headers"] == {"X-Token": "1"}
+    futures["http://localhost/api/c.json"].cancel.assert_called_once_with()
+
+
+def test_prefetch_specs_limits_documents():
+    client = mock.Mock(name="client")
+    client.request.return_value = make_future(
+        b'{"a": {"$ref": "a.json"}, "b": {"$ref": "b.json"}}'
+    )
+
+    with mock.patch("bravado_asyncio.spec_prefetch.MAX_DOCUMENTS", 2):
+        specs = prefetch_specs(client, [URL])
+
+    assert len(specs) == 2
+    assert client.request.call_count == 2
@@ -0,0 +1,97 @@
+import asyncio
+import concurrent.futures
+from unittest import mock
+
+import pytest
+
+from bravado_asyncio.submission_queue import get_submission_queue
+from bravado_asyncio.submission_queue import SubmissionQueue
+from bravado_asyncio.submission_queue import submit_coroutine
+
+
+async def double(value):
+    return value * 2
+
+
+async def fail():
+    raise ValueError("failed")
+
+
+def test_get_submission_queue():
+    loop = mock.Mock(name="loop", spec=asyncio.AbstractEventLoop)
+    queue = get_submission_queue(loop)
+
+    assert queue.loop is loop
+    assert get_submission_queue(loop) is queue
+
+
+def test_single_wakeup_for_burst(mock_loop):
+    queue = SubmissionQueue(mock_loop)
+
+    coroutines = [double(i) for i in range(3)]
+    for coroutine in coroutines:
+        queue.submit(coroutine)
+    queue.submit_many([])
+
+    mock_loop.call_soon_threadsafe.assert_called_once_with(queue._start_pending)
+    for coroutine in coroutines:
+        coroutine.close()
+
+
+def test_submit(loop_runner):
+    queue = get_submission_queue(loop_runner.loop)
+
+    futures = [queue.submit(double(i)) for i in range(10)]
+
+    assert [future.result(timeout=1) for future in futures] == list(range(0, 20, 2))
+
+
+def test_submit_many(loop_runner):
+    futures = get_submission_queue(loop_runner.loop).submit_many([double(21), fail()])
+
+    assert futures[0].result(timeout=1) == 42
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=1)
+
+
+def test_submit_coroutine(loop_runner):
+    assert submit_coroutine(double(2), loop=loop_runner.loop).result(timeout=1) == 4
+
+
+def test_cancel_before_start(mock_loop):
+    queue = SubmissionQueue(mock_loop)
+    coroutine = mock.Mock(name="coroutine")
+
+    queue.submit(coroutine).cancel()
+    queue._start_pending()
+
+    coroutine.close.assert_called_once_with()
+    assert mock_loop.create_task.call_count == 0
+
+
+def test_cancel_running(loop_runner):
+    started = concurrent.futures.Future()
+
+    async def sleep():
+        started.set_result(None)
+        await asyncio.sleep(10)
+
+    future = get_submission_queue(loop_runner.loop).submit(sleep())
+    started.result(timeout=1)
+
+    assert future.cancel()
+    with pytest.raises(concurrent.futures.CancelledError):
+        future.result(timeout=1)
+    # wait for the cancellation to reach the task
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0.01), loop_runner.loop).result(1)
+    assert all(task.done() for task in asyncio.all_tasks(loop_runner.loop))
+
+
+def test_task_cancelled_on_loop(loop_runner):
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    future = get_submission_queue(loop_runner.loop).submit(cancelled())
+
+    with pytest.raises(concurrent.futures.CancelledError):
+        future.result(timeout=1)
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+from unittest import mock
+
+from bravado_asyncio.thread_loop import close_calling_thread_loop
+from bravado_asyncio.thread_loop import get_calling_thread_loop
+
+
+def run_in_thread(func):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(func()))
+    thread.start()
+    thread.join()
+    return results[0]
+
+
+def test_calling_thread_loop_per_thread():
+    loop = get_calling_thread_loop()
+
+    assert get_calling_thread_loop() is loop
+    assert not loop.is_running()
+    assert run_in_thread(get_calling_thread_loop) is not loop
+
+
+def test_calling_thread_loop_closed_on_thread_exit():
+    loop = run_in_thread(get_calling_thread_loop)
+
+    assert loop.is_closed()
+
+
+def test_calling_thread_loop_replaced_if_closed():
+    loop = get_calling_thread_loop()
+    loop.close()
+
+    assert get_calling_thread_loop() is not loop
+
+
+def test_close_calling_thread_loop_running_loop():
+    loop = mock.Mock(name="loop", spec=asyncio.AbstractEventLoop)
+    loop.is_closed.return_value = False
+    loop.is_running.return_value = True
+
+    close_calling_thread_loop(loop)
+
+    loop.close.assert_not_called()
+
+
+def test_close_calling_thread_loop_error(caplog):
+    loop = mock.Mock(name="loop", spec=asyncio.AbstractEventLoop)
+    loop.is_closed.return_value = False
+    loop.is_running.return_value = False
+    loop.close.side_effect = RuntimeError
+
+    close_calling_thread_loop(loop)
+
+    assert "Error closing event loop" in caplog.text
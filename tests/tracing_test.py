@@ -0,0 +1,304 @@
+import asyncio
+import concurrent.futures
+import contextvars
+from unittest import mock
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from bravado_asyncio.definitions import SessionConfig
+from bravado_asyncio.definitions import TracingConfig
+from bravado_asyncio.http_client import AsyncioClient
+from bravado_asyncio.http_client import RunMode
+from bravado_asyncio.tracing import create_trace_config
+from bravado_asyncio.tracing import current_span_context
+from bravado_asyncio.tracing import InMemorySpanSink
+from bravado_asyncio.tracing import parse_traceparent
+from bravado_asyncio.tracing import Span
+from bravado_asyncio.tracing import SpanContext
+from bravado_asyncio.tracing import SpanSink
+from bravado_asyncio.tracing import use_span_context
+
+PARENT = SpanContext("0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331")
+
+
+async def echo_trace_headers(request):
+    return web.json_response(
+        {
+            "traceparent": request.headers.get("traceparent"),
+            "tracestate": request.headers.get("tracestate"),
+        }
+    )
+
+
+async def redirect(request):
+    raise web.HTTPFound("/echo")
+
+
+async def reset(request):
+    request.transport.abort()
+    return web.Response()
+
+
+def create_app():
+    app = web.Application()
+    app.router.add_get("/echo", echo_trace_headers)
+    app.router.add_get("/redirect", redirect)
+    app.router.add_get("/reset", reset)
+    return app
+
+
+@pytest.fixture
+def sink():
+    return InMemorySpanSink()
+
+
+@pytest.fixture
+def make_client(sink):
+    clients = []
+
+    def make_client(run_mode=RunMode.CALLING_THREAD, **tracing_kwargs):
+        client = AsyncioClient(
+            run_mode=run_mode,
+            session_config=SessionConfig(in_process_app=create_app()),
+            tracing=TracingConfig(sink, **tracing_kwargs),
+        )
+        clients.append(client)
+        return client
+
+    yield make_client
+
+    for client in clients:
+        client.close()
+
+
+def get(client, path, **params):
+    return client.request(
+        dict(method="GET", url="http://in-process" + path, **params)
+    ).result(timeout=5)
+
+
+@pytest.mark.parametrize(
+    "traceparent, expected",
+    (
+        (
+            "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01",
+            PARENT,
+        ),
+        (
+            "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-00",
+            PARENT._replace(sampled=False),
+        ),
+        # later versions may have more fields
+        (
+            "01-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01-extra",
+            PARENT,
+        ),
+        ("00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01-extra", None),
+        ("ff-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01", None),
+        ("00-00000000000000000000000000000000-b7ad6b7169203331-01", None),
+        ("00-0af7651916cd43dd8448eb211c80319c-0000000000000000-01", None),
+        ("00-0AF7651916CD43DD8448EB211C80319C-b7ad6b7169203331-01", None),
+        ("garbage", None),
+    ),
+)
+def test_parse_traceparent(traceparent, expected):
+    assert parse_traceparent(traceparent) == expected
+
+
+def test_traceparent_round_trip():
+    assert parse_traceparent(PARENT.to_traceparent(), "vendor=1") == PARENT._replace(
+        tracestate="vendor=1"
+    )
+
+
+def test_span(make_client, sink):
+    client = make_client()
+
+    response = get(client, "/echo")
+
+    (span,) = sink.spans
+    assert span.name == "HTTP GET"
+    assert span.url == "http://in-process/echo"
+    assert span.status_code == 200
+    assert span.error is None
+    assert span.parent is None
+    assert len(span.context.trace_id) == 32
+    assert len(span.context.span_id) == 16
+    assert response.json() == {
+        "traceparent": span.context.to_traceparent(),
+        "tracestate": None,
+    }
+    assert span.retries == 0
+    assert span.redirects == 0
+    assert set(span.phases()) == {"queued", "connect", "wait", "body"}
+    assert sum(span.phases().values()) <= span.duration
+
+
+def test_span_of_operation(make_client, sink):
+    client = make_client()
+    operation = mock.Mock(operation_id="getEcho", path_name="/{name}")
+
+    # only waits for the response, without unmarshalling it for the operation
+    client.request(
+        {"method": "GET", "url": "http://in-process/echo"}, operation=operation
+    ).future.result(timeout=5)
+
+    (span,) = sink.spans
+    assert span.name == "getEcho"
+    assert span.operation_id == "getEcho"
+    assert span.url_template == "/{name}"
+
+
+def test_parent_from_calling_thread(make_client, sink):
+    client = make_client(run_mode=RunMode.THREAD)
+
+    with use_span_context(PARENT._replace(tracestate="vendor=1")):
+        response = get(client, "/echo")
+    assert current_span_context.get() is None
+
+    (span,) = sink.spans
+    assert span.parent.span_id == PARENT.span_id
+    assert span.context.trace_id == PARENT.trace_id
+    assert span.context.span_id != PARENT.span_id
+    assert response.json() == {
+        "traceparent": span.context.to_traceparent(),
+        "tracestate": "vendor=1",
+    }
+
+
+def test_parent_with_batch_submissions(sink):
+    client = AsyncioClient(
+        session_config=SessionConfig(in_process_app=create_app()),
+        tracing=TracingConfig(sink),
+        batch_submissions=True,
+    )
+    try:
+        with use_span_context(PARENT), client.batch():
+            futures = [
+                client.request({"method": "GET", "url": "http://in-process/echo"})
+                for _ in range(3)
+            ]
+        for future in futures:
+            future.result(timeout=5)
+    finally:
+        client.close()
+
+    assert len(sink.spans) == 3
+    assert {span.context.trace_id for span in sink.spans} == {PARENT.trace_id}
+
+
+def test_span_context_is_current_on_the_loop(make_client):
+    seen = []
+
+    class Sink(SpanSink):
+        def on_start(self, span):
+            seen.append(current_span_context.get())
+
+    client = make_client(run_mode=RunMode.THREAD)
+    tracer = client._tracer
+    tracer.sink = Sink()
+
+    async def request():
+        seen.append(current_span_context.get())
+        return mock.Mock(status=200)
+
+    with use_span_context(PARENT):
+        span = tracer.start_span("GET", "http://in-process/", None)
+        client._run_coroutine(tracer.trace(request(), span), client.loop).result(
+            timeout=5
+        )
+
+    # the sink sees the parent on the calling thread, the request its own span context on the loop
+    assert seen == [PARENT, span.context]
+
+
+def test_redirects(make_client, sink):
+    client = make_client()
+
+    get(client, "/redirect", follow_redirects=True)
+
+    (span,) = sink.spans
+    assert span.redirects == 1
+    assert span.retries == 0
+    assert span.status_code == 200
+
+
+def test_error(make_client, sink):
+    client = make_client()
+
+    with pytest.raises(aiohttp.ClientError):
+        get(client, "/reset")
+
+    (span,) = sink.spans
+    assert span.status_code is None
+    assert isinstance(span.error, aiohttp.ClientError)
+    assert span.ended is not None
+
+
+def test_no_propagation(make_client, sink):
+    client = make_client(propagate=False)
+
+    response = get(client, "/echo")
+
+    assert response.json() == {"traceparent": None, "tracestate": None}
+    assert len(sink.spans) == 1
+
+
+def test_no_request_phases(make_client, sink):
+    client = make_client(request_phases=False)
+
+    get(client, "/echo")
+
+    assert not client.session_config.trace_requests
+    assert set(sink.spans[0].phases()) == {"queued"}
+
+
+def test_sink_errors_are_logged(make_client):
+    sink = mock.Mock(spec=SpanSink)
+    sink.on_start.side_effect = sink.on_end.side_effect = RuntimeError
+    client = make_client()
+    client._tracer.sink = sink
+
+    with mock.patch("bravado_asyncio.tracing.log", autospec=True) as mock_log:
+        response = get(client, "/echo")
+
+    assert response.status_code == 200
+    assert mock_log.exception.call_count == 2
+
+
+def test_callbacks_run_in_calling_context(make_client):
+    variable = contextvars.ContextVar("variable")
+    client = make_client(run_mode=RunMode.THREAD)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    seen = concurrent.futures.Future()
+
+    variable.set("caller")
+    try:
+        client.request(
+            {"method": "GET", "url": "http://in-process/echo"}
+        ).add_done_callback(
+            lambda result: seen.set_result(variable.get(None)), executor=executor
+        )
+        assert seen.result(timeout=5) == "caller"
+    finally:
+        executor.shutdown()
+
+
+def test_retries_are_counted_per_attempt():
+    span = Span(PARENT, None, "GET", "http://in-process/echo", None)
+    context = mock.Mock(trace_request_ctx=span)
+    trace_config = create_trace_config()
+
+    async def attempts():
+        # a request sent twice on a persistent connection, then redirected
+        for _ in range(2):
+            await trace_config.on_request_headers_sent[0](None, context, None)
+        await trace_config.on_request_redirect[0](None, context, None)
+        await trace_config.on_request_headers_sent[0](None, context, None)
+
+    asyncio.run(attempts())
+
+    assert span.retries == 1
+    assert span.redirects == 1